@@ -0,0 +1,255 @@
+"""--------------------------------------------
+benchmark module. Micro-benchmarks of the hot paths of the AI and the paths generation, without any screen.
+The positions are generated with fixed seeds (Or loaded from a file of serialized positions), so two runs
+over the same commit measure the same work. The results are saved in JSON, to compare them between commits.
+Usage:
+    python benchmark.py -o results.json
+    python benchmark.py -o new.json --compare results.json
+Have the following classes:
+    Benchmark
+--------------------------------------------"""
+
+__all__ = ['Benchmark']
+__version__ = '1.0'
+__author__ = 'David Flaity Pardo'
+
+#Python libraries
+import os
+import sys
+import json
+import time
+import random
+import platform
+import argparse
+import statistics
+import subprocess
+
+#Selfmade libraries
+from obj.rules import Rules, Piece, GameState
+from obj.paths import Path, PathAppraiser
+from obj.search import SearchAgent, SearchToken, MonteCarloSearch, EvaluationCache
+from obj.utilities.logger import Logger as LOG
+from tournament import Tournament, PRESETS, SEATS, get_topology
+
+class Benchmark(object):
+    """Benchmark class. Generates the positions, runs each case a fixed number of rounds, and collects the results.
+    Attributes:
+        presets (List->String): Board presets of the positions. The ones in which the pieces don't fit are skipped.
+        seeds (List->int):  Seeds of the positions of each preset. Each seed is a different game.
+        plies (int):    Random movements played from the starting position to get each position.
+        rounds (int):   Times that each case is measured. The statistics are done over the rounds.
+        search_time (float):    Seconds of each montecarlo search.
+        depth (int):    Depth of the alpha-beta searchs.
+        positions (List->Dict): Serialized positions.
+        results (Dict->String:Dict):    Result of each case. Key is the name of the case."""
+    def __init__(self, presets=('classic',), seeds=(0, 1, 2), plies=20, rounds=5, search_time=1, depth=2, positions=None):
+        self.presets = [preset for preset in presets if Tournament.fits(preset, 2)]
+        self.seeds = list(seeds)
+        self.plies = plies
+        self.rounds = rounds
+        self.search_time = search_time
+        self.depth = depth
+        self.positions = positions if positions else self.generate_positions()
+        self.results = {}
+
+    def generate_positions(self):
+        """Plays random movements from the starting position of each preset and seed, and serializes the reached positions.
+        Returns:
+            (List->Dict):   Positions. Preset, seed, player with the turn and pieces (index, owner, type)."""
+        positions = []
+        for preset in self.presets:
+            for seed in self.seeds:
+                rng = random.Random(seed)
+                state = GameState.new_game(get_topology(preset), [1, 2], rng=rng, seats=SEATS[2], **PRESETS[preset][1](2))
+                for _ in range(0, self.plies):
+                    if state.is_over():
+                        break
+                    if state.pending_promotion is not None:
+                        state.promote()
+                        continue
+                    movements = state.get_movements()
+                    if movements:
+                        state.apply_movement(rng.choice(movements))
+                    else:
+                        state.throw_dice()
+                positions.append({'preset': preset, 'seed': seed, 'player': state.get_current_player(),\
+                                'pieces': sorted([index, piece.owner_uuid, piece.get_type()] for index, piece in state.pieces.items())})
+        return positions
+
+    @staticmethod
+    def load_position(position):
+        """Creates the state of a serialized position.
+        Returns:
+            (:obj: GameState):  The state, with the turn of the player of the position."""
+        state = GameState(get_topology(position['preset']), [1, 2], {index: Piece(owner, char_type) for index, owner, char_type in position['pieces']})
+        state.player_index = state.players.index(position['player'])
+        return state
+
+    def positions_of(self, preset):
+        """Returns:
+            (List->:obj: GameState):    The states of the positions of a preset."""
+        return [Benchmark.load_position(position) for position in self.positions if position['preset'] == preset]
+
+    def measure(self, name, method, operations=1, counter=None):
+        """Runs a case the configured rounds after a warm up call, and saves its statistics.
+        The evaluation cache is emptied before each round, so the rounds don't reuse the evaluations of the previous ones.
+        The status of the cache after the last round is saved too.
+        Args:
+            name (String):  Name of the case.
+            method (Callable):  Case itself. Each call is a round.
+            operations (int, default=1):    Operations done in each round, to get the operations per second.
+            counter (Callable, default=None):   If supplied, it's called with the return of each round and returns the operations done in it.
+                                                Used when the work done is not fixed (Nodes of a search...)."""
+        times, ops = [], []
+        method()    #Warming up, the first call fills the movements LUT and the caches
+        for _ in range(0, self.rounds):
+            random.seed(0)
+            EvaluationCache.clear()
+            start = time.perf_counter()
+            result = method()
+            times.append(time.perf_counter()-start)
+            ops.append(counter(result) if counter else operations)
+        self.results[name] = {'rounds': self.rounds, 'mean': statistics.mean(times), 'min': min(times),\
+                            'stdev': statistics.stdev(times) if len(times) > 1 else 0.0, 'operations': statistics.mean(ops),\
+                            'ops_per_second': sum(ops)/sum(times) if sum(times) else 0.0, 'evaluation_cache': EvaluationCache.stats()}
+        LOG.log('warning', name, ': ', round(self.results[name]['ops_per_second'], 2), ' ops/s')
+
+    def run(self):
+        """Runs all the cases over all the presets, and returns the results."""
+        for preset in self.presets:
+            self.bench_paths_factory(preset)
+            states = self.positions_of(preset)
+            self.bench_get_paths(preset, states)
+            self.bench_rate_movements(preset, states)
+            self.bench_change_map(preset, states)
+            self.bench_minimax(preset, states)
+            self.bench_montecarlo(preset, states)
+        return self.results
+
+    def bench_paths_factory(self, preset):
+        """Path.all_paths_factory of each different restriction, in the board of the preset."""
+        topology = get_topology(preset)
+        done = set()
+        for char_type, restriction in Rules.RESTRICTIONS.items():
+            if hash(restriction) in done:   #Same restriction than a previous type
+                continue
+            done.add(hash(restriction))
+            self.measure('all_paths_factory['+char_type+']['+preset+']',\
+                        lambda: Path.all_paths_factory(topology.graph, topology.distances, topology.level_size, restriction))
+
+    def bench_get_paths(self, preset, states):
+        """get_paths of each type of piece, for all the pieces of that type in the positions. The Characters use the same Rules."""
+        topology = get_topology(preset)
+        for char_type in Piece.TYPES.keys():
+            cases = [(piece, index, state.get_map(piece.owner_uuid)) for state in states for index, piece in state.pieces.items()\
+                    if piece.get_type() == char_type]
+            if not cases:
+                continue
+            self.measure('get_paths['+char_type+']['+preset+']', lambda: [piece.get_paths(topology.graph, topology.distances, current_map, index, topology.level_size)\
+                                                                        for piece, index, current_map in cases], operations=len(cases))
+
+    def bench_rate_movements(self, preset, states):
+        """PathAppraiser.rate_movements and rate_movements_lite of all the movements of the player with the turn."""
+        topology = get_topology(preset)
+        cases = []
+        for state in states:
+            current_map = state.get_map()
+            for index, piece in state.get_movable_pieces().items():
+                destinies = [path[-1] for path in piece.get_paths(topology.graph, topology.distances, current_map, index, topology.level_size)]
+                cases.append((index, destinies, current_map, state.pieces))
+        self.measure('rate_movements['+preset+']', lambda: [PathAppraiser.rate_movements(index, destinies, topology.graph, topology.distances,\
+                                                            current_map, pieces, topology.level_size) for index, destinies, current_map, pieces in cases],\
+                    operations=len(cases))
+        self.measure('rate_movements_lite['+preset+']', lambda: [PathAppraiser.rate_movements_lite(index, destinies, topology.graph,\
+                                                                current_map, pieces, topology.level_size) for index, destinies, current_map, pieces in cases],\
+                    operations=len(cases))
+
+    def bench_change_map(self, preset, states):
+        """SearchAgent.change_map to each player, in all the positions."""
+        cases = [(state.get_map(), state.pieces, player) for state in states for player in state.players]
+        self.measure('change_map['+preset+']', lambda: [SearchAgent.change_map(current_map, pieces, player) for current_map, pieces, player in cases],\
+                    operations=len(cases))
+
+    def bench_minimax(self, preset, states):
+        """Alpha-beta search until the configured depth in each position. Measured in nodes per second."""
+        topology = get_topology(preset)
+        def search():
+            nodes = 0
+            for state in states:
+                agent = SearchAgent(topology.graph, topology.distances, topology.level_size, ai_mode='alpha-beta', max_depth=self.depth,\
+                                    adaptative_max_depth=False, timeout=3600)
+                token = SearchToken(3600)
+                agent.generate_alpha_beta(0, {index: piece.copy() for index, piece in state.pieces.items()}, state.get_map(),\
+                                        state.get_current_player(), state.players, stop_token=token)
+                nodes += token.nodes
+            return nodes
+        self.measure('minimax_nodes['+preset+']', search, counter=lambda nodes: nodes)
+
+    def bench_montecarlo(self, preset, states):
+        """Montecarlo search of the configured time in the first position, with and without RAVE. Measured in iterations per second."""
+        topology = get_topology(preset)
+        state = states[0]
+        for name, rave in (('mcts_iterations', 0), ('mcts_rave_iterations', MonteCarloSearch.RAVE_EQUIVALENCE)):
+            def search():
+                token = SearchToken(self.search_time)
+                MonteCarloSearch.monte_carlo_tree_search(topology.graph, topology.distances, topology.level_size, hash(topology),\
+                                                        {index: piece.copy() for index, piece in state.pieces.items()}, state.get_map(),\
+                                                        state.get_current_player(), state.players, self.search_time, stop_token=token, rave=rave)
+                return token.rollouts
+            self.measure(name+'['+preset+']', search, counter=lambda rollouts: rollouts)
+
+    def metadata(self):
+        """Returns:
+            (Dict->String:Any): Machine, python version, commit and settings of this run."""
+        try:
+            commit = subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)),\
+                                            stderr=subprocess.DEVNULL).decode().strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = None
+        return {'commit': commit, 'date': time.strftime('%Y-%m-%dT%H:%M:%S'), 'python': platform.python_version(),\
+                'machine': platform.platform(), 'processor': platform.processor(), 'presets': self.presets, 'seeds': self.seeds,\
+                'plies': self.plies, 'rounds': self.rounds, 'search_time': self.search_time, 'depth': self.depth}
+
+    def save(self, filename):
+        """Saves the metadata, the positions and the results in a JSON file."""
+        with open(filename, 'w') as output:
+            json.dump({'metadata': self.metadata(), 'positions': self.positions, 'results': self.results}, output, indent=2)
+
+    @staticmethod
+    def compare(results, previous):
+        """Returns a table with the speedup of each case against the results of a previous run (Higher is better)."""
+        lines = ['{:<48}{:>14}{:>14}{:>9}'.format('case', 'before ops/s', 'after ops/s', 'speedup')]
+        for name, result in results.items():
+            if name in previous and previous[name]['ops_per_second']:
+                before = previous[name]['ops_per_second']
+                lines.append('{:<48}{:>14.2f}{:>14.2f}{:>8.2f}x'.format(name[:47], before, result['ops_per_second'], result['ops_per_second']/before))
+        return '\n'.join(lines)
+
+def parse_arguments(args):
+    """Parses the command line arguments of the benchmarks."""
+    parser = argparse.ArgumentParser(description='Micro-benchmarks of the AI and the paths generation.')
+    parser.add_argument('-o', '--output', default='benchmark.json', help='JSON file in which to save the results')
+    parser.add_argument('-b', '--boards', nargs='+', default=['classic', 'great wheel'], choices=sorted(PRESETS.keys()), help='Board presets')
+    parser.add_argument('-s', '--seeds', nargs='+', type=int, default=[0, 1, 2], help='Seeds of the positions')
+    parser.add_argument('--plies', type=int, default=20, help='Random movements played to reach each position')
+    parser.add_argument('-r', '--rounds', type=int, default=5, help='Rounds of each case')
+    parser.add_argument('-t', '--search-time', type=float, default=1, help='Seconds of each montecarlo search')
+    parser.add_argument('-d', '--depth', type=int, default=2, help='Depth of the alpha-beta searchs')
+    parser.add_argument('--positions', default=None, help='Use the positions of a previous JSON output instead of generating them')
+    parser.add_argument('--compare', default=None, help='JSON output of a previous run to compare with')
+    return parser.parse_args(args)
+
+if __name__ == "__main__":
+    arguments = parse_arguments(sys.argv[1:])
+    LOG.change_level('warning')
+    positions = None
+    if arguments.positions:
+        with open(arguments.positions) as positions_file:
+            positions = json.load(positions_file)['positions']
+        arguments.boards = sorted(set(position['preset'] for position in positions))
+    benchmark = Benchmark(arguments.boards, arguments.seeds, arguments.plies, arguments.rounds, arguments.search_time, arguments.depth, positions)
+    benchmark.run()
+    benchmark.save(arguments.output)
+    if arguments.compare:
+        with open(arguments.compare) as previous_file:
+            print(Benchmark.compare(benchmark.results, json.load(previous_file)['results']))
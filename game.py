@@ -18,6 +18,7 @@ import uuid
 from pygame.locals import *
 from pygame.key import *
 from obj.screen import Screen
+from obj.sprite import Sprite
 
 #Selfmade Libraries
 from dialog_generator import DialogGenerator
@@ -28,6 +29,8 @@ from obj.ui_element import UIElement, TextSprite, InfoBoard, Dialog
 from obj.utilities.colors import RED, BLACK, WHITE
 from obj.utilities.logger import Logger as LOG
 from obj.utilities.utility_box import UtilityBox
+from obj.utilities.profiler import FrameProfiler
+from obj.utilities.instrumentation import Instrumentation
 from obj.utilities.decorators import END_ALL_THREADS
 from board_generator import BoardGenerator
 from obj.utilities.exceptions import  NoScreensException, InvalidGameElementException, GameEndException,\
@@ -52,6 +55,14 @@ class Game(object):
         resolution (:tuple: int, int): Resolution of the screen. In pixels. The display surface will have this initial resolution.
         fps (int):  Current frames per second (Times that the display surface is updated in a second).
         fps_text (:obj: pygame.Surface):    Text of the current fps achieved. Useful to show if we are pushing our computer too far (Not reaching stable fps).
+        drawn_fps_text (:obj: pygame.Surface):  The fps text of the last frame. When it changes, its area is drawn again.
+        idle_throttling (boolean):  True to stop drawing and sleep until the next event after INIT_PARAMS.IDLE_FRAMES frames without activity.
+        quiet_frames (int): Frames in a row without input, changes in the sprites or animations.
+        fps_rect (:obj: pygame.Rect):   Area of the fps text in the last frame.
+        profiler (:obj: FrameProfiler): Times the phases of the frames while it is active. Toggled with INIT_PARAMS.PROFILER_KEY.
+        profile_text (:obj: pygame.Surface):    Table with the percentiles of the recorded frames, shown while the profiler is active.
+        drawn_profile_text (:obj: pygame.Surface):  The profile table of the last frame. When it changes, its area is drawn again.
+        profile_rect (:obj: pygame.Rect):   Area of the profile table in the last frame.
         last_inputs (List->String): Saves the latest keystrokes of the player. Useful to trigger easter eggs.
         last_command (String):  Last command received from a dialog. Switches between a value and None. Used to know when a dialog was just shown and when
                                 to execute the command contained within it.
@@ -83,6 +94,14 @@ class Game(object):
         self.resolution     = resolution
         self.fps            = fps
         self.fps_text       = None
+        self.drawn_fps_text = None
+        self.fps_rect       = pygame.Rect(0, 0, 0, 0)
+        self.profiler       = FrameProfiler(INIT_PARAMS.PROFILER_FRAMES)
+        self.profile_text   = None
+        self.drawn_profile_text = None
+        self.profile_rect   = pygame.Rect(0, 0, 0, 0)
+        self.idle_throttling= INIT_PARAMS.IDLE_THROTTLING
+        self.quiet_frames   = 0
         self.last_inputs    = []    #Easter Eggs 
         self.last_command   = None
         self.current_screen = None  #Created in Game.start()
@@ -228,6 +247,8 @@ class Game(object):
                     self.todo.append(self.waiting_for.pop(0)[1:])
                 self.count_lock.release()
                 self.fps_text = UtilityBox.generate_fps(self.clock, size=tuple(int(x*0.05) for x in self.resolution))
+                if FrameProfiler.ACTIVE:
+                    self.profile_text = self.profiler.render(height=int(self.resolution[1]*0.02))
         except AttributeError:
             LOG.error_traceback()
 
@@ -235,6 +256,7 @@ class Game(object):
         """Makes the actions that show the end of a game. Shows a lose or win popup, and makes you go back to the main menu after a set time.
         Args:
             win (boolean, default=False): Flag that is True if you won the game, and False otherwise."""
+        self.call_screens_method('board', Board.stop_ai_search)    #No need to keep the CPU players thinking
         if win:
             self.show_popup('win')
         else:
@@ -420,6 +442,7 @@ class Game(object):
         else:
             self.display = pygame.display.set_mode(self.resolution, SCREEN_FLAGS.WINDOWED)
         ResizedSurface.clear_lut()  #Clear the lut of resized surfaces
+        self.call_screens_method('board', Board.stop_ai_search)    #The CPU player moves with the best result until now
         for screen in self.screens:
             screen.set_resolution(resolution)
         for popup in self.popups.sprites():
@@ -463,6 +486,17 @@ class Game(object):
             if affects_boards:
                 self.call_screens_method('board', Screen.set_song, value)
 
+    @staticmethod
+    def coalesce_events(events):
+        """Collapses all the mouse movement events of a frame in the last one. The screens use the current mouse position
+        anyway, so the previous movements would only repeat the same hover checks.
+        Args:
+            events (List->pygame.Event):    Events of the frame, in order.
+        Returns:
+            (List->pygame.Event):   The same events, with only the last mouse movement."""
+        last_motion = next((event for event in reversed(events) if event.type == pygame.MOUSEMOTION), None)
+        return [event for event in events if event.type != pygame.MOUSEMOTION or event is last_motion]
+
     def event_handler(self, events):
         """Even if it's called event handler, what this method does is detecting the user inputs (By keyboard and mouse), and
         processing them/redirect them to whichever screen, in a case by case basis.
@@ -478,11 +512,14 @@ class Game(object):
         all_mouse_buttons   = pygame.mouse.get_pressed()        #Get all the pressed mouse buttons
         mouse_pos           = pygame.mouse.get_pos()            #Get the current mouse position
         mouse_mvnt          = pygame.mouse.get_rel()!=(0,0)     #True if get_rel returns non zero vaalues 
-        for event in events:
+        movements           = 0     #Events that were sent with the mouse movement, to cap the hover checks
+        for event in Game.coalesce_events(events):
             if event.type == pygame.MOUSEBUTTONDOWN:
                 self.hide_popups()
             #For every event we will call this
-            self.current_screen.event_handler(event, all_keys, all_mouse_buttons, mouse_movement=mouse_mvnt, mouse_pos=mouse_pos)
+            event_mvnt = mouse_mvnt and movements < INIT_PARAMS.MOUSE_MOVEMENTS_PER_FRAME
+            movements += event_mvnt
+            self.current_screen.event_handler(event, all_keys, all_mouse_buttons, mouse_movement=event_mvnt, mouse_pos=mouse_pos)
             if event.type == pygame.QUIT:               
                 return True
             elif event.type == pygame.KEYDOWN:
@@ -490,6 +527,15 @@ class Game(object):
                     self.esc_handler()
                 elif event.key == pygame.K_F4 and (all_keys[pygame.K_LALT] or all_keys[pygame.K_RALT]):
                     return True
+                elif event.key == INIT_PARAMS.PROFILER_KEY:
+                    self.toggle_profiler()
+                elif event.key == INIT_PARAMS.PROFILER_DUMP_KEY:
+                    self.save_profile()
+                elif event.key == INIT_PARAMS.INSTRUMENTATION_KEY:
+                    LOG.log('INFO', 'Instrumentation ', 'started' if Instrumentation.toggle() else 'stopped')
+                elif event.key == INIT_PARAMS.INSTRUMENTATION_DUMP_KEY:
+                    Instrumentation.save(INIT_PARAMS.INSTRUMENTATION_FILE)
+                    LOG.log('INFO', 'Saved the instrumentation measures in ', INIT_PARAMS.INSTRUMENTATION_FILE)
                 else:   #How to differentiate when to writing in an input box and when to start an easter egg
                     self.process_last_input(event)
             elif event.type >= pygame.USEREVENT:        
@@ -703,6 +749,7 @@ class Game(object):
                 self.current_screen.play_music()
             else:
                 self.current_screen = self.screens[new_index]
+            self.current_screen.invalidate()
             LOG.log('DEBUG', "Changed to  ", self.current_screen.id)
         else:  
             raise ScreenNotFoundException('A screen with any of the keywords'+ str(keywords)+'wasn`t found')
@@ -776,14 +823,96 @@ class Game(object):
         self.started = True 
         return True
 
+    def get_dirty_rects(self):
+        """Returns the areas of the display that changed since the last frame, adding the fps text and the popups to the ones of the current screen.
+        Returns:
+            (List->pygame.Rect||None):  The changed areas. None if the whole display must be drawn."""
+        rects = self.current_screen.get_dirty_rects()
+        if rects is None or any(popup.visible for popup in self.popups):
+            return None
+        if self.fps_text is not self.drawn_fps_text:
+            rects.append(self.fps_rect)
+            if self.fps_text:
+                rects.append(self.fps_text.get_rect(topleft=tuple(int(x*0.02) for x in self.resolution)))
+        if self.profile_text is not self.drawn_profile_text:
+            rects.append(self.profile_rect)
+            if self.profile_text:
+                rects.append(self.profile_text.get_rect(topleft=(int(self.resolution[0]*0.02), int(self.resolution[1]*0.1))))
+        return rects
+
+    def toggle_profiler(self):
+        """Starts or stops the recording of the frames, showing or hiding the profile table with it."""
+        active = self.profiler.toggle()
+        self.profile_text = None
+        LOG.log('INFO', 'Frame profiler ', 'started' if active else 'stopped')
+
+    def save_profile(self, frames=None):
+        """Saves the recorded frames in INIT_PARAMS.PROFILER_FILE.json, and as a Chrome trace in INIT_PARAMS.PROFILER_FILE.trace.json.
+        Args:
+            frames (int, default=None): Number of frames saved, the last ones. All the recorded ones if None."""
+        if not self.profiler.frames:
+            LOG.log('INFO', 'There are no recorded frames to save, start the frame profiler first')
+            return
+        self.profiler.save(INIT_PARAMS.PROFILER_FILE+'.json', frames=frames)
+        self.profiler.save(INIT_PARAMS.PROFILER_FILE+'.trace.json', frames=frames, chrome_trace=True)
+        LOG.log('INFO', 'Saved ', len(self.profiler.frames) if not frames else min(frames, len(self.profiler.frames)),\
+                ' frames in ', INIT_PARAMS.PROFILER_FILE, '.json and ', INIT_PARAMS.PROFILER_FILE, '.trace.json')
+
+    def is_idle(self, events):
+        """Checks if there was any activity in this frame. The one second timer doesn't count as activity.
+        Args:
+            events (List->pygame.event.Event):  Events handled in this frame.
+        Returns:
+            (boolean):  True if there was no input, no pending execution, no change reported by the sprites
+                        and nothing animated in the current screen or the popups."""
+        return not self.todo and not Sprite.DIRTY_RECTS and all(event.type == USEREVENTS.TIMER_ONE_SEC for event in events)\
+                and self.current_screen.is_idle() and not any(popup.visible for popup in self.popups)
+
+    def wait_events(self, timeout):
+        """Sleeps until the next event or until the timeout.
+        Args:
+            timeout (int):  Maximum time to sleep. In milliseconds.
+        Returns:
+            (List->pygame.event.Event): The events in the queue. Empty if the timeout was reached."""
+        event = pygame.event.wait(timeout)
+        if event.type == pygame.NOEVENT:
+            return []
+        return [event]+pygame.event.get()
+
+    def update(self):
+        """Fixed-timestep update pass. Advances one step the clock of the animations, and the animations
+        of the current screen and the popups with it. Executed INIT_PARAMS.UPDATES_PER_SECOND times per second, whatever the fps."""
+        Sprite.tick()
+        self.current_screen.update()
+        for popup in self.popups:
+            popup.advance()
+
     def draw(self):
-        """Draws the entire application in the screen. Also updates the display to show the changes."""
+        """Draws the entire application in the screen. Also updates the display to show the changes.
+        If the current screen reports the areas that changed, the drawing is clipped to them, and only them are updated.
+        The screen is still drawn each frame, so the sprites keep their animations going."""
+        self.profiler.start_phase('screen')
+        rects = self.get_dirty_rects()
+        if rects is not None:
+            self.display.set_clip(rects[0].unionall(rects[1:]) if rects else pygame.Rect(0, 0, 0, 0))
         self.current_screen.draw(self.display)
         if self.fps_text:
-            self.display.blit(self.fps_text, tuple(int(x*0.02) for x in self.resolution))
+            self.fps_rect = self.fps_text.get_rect(topleft=tuple(int(x*0.02) for x in self.resolution))
+            self.display.blit(self.fps_text, self.fps_rect)
+        self.drawn_fps_text = self.fps_text
+        if self.profile_text:
+            self.profile_rect = self.profile_text.get_rect(topleft=(int(self.resolution[0]*0.02), int(self.resolution[1]*0.1)))
+            self.display.blit(self.profile_text, self.profile_rect)
+        self.drawn_profile_text = self.profile_text
+        self.profiler.start_phase('popups')
         for popup in self.popups:
             popup.draw(self.display)
-        pygame.display.update()
+        self.display.set_clip(None)
+        self.profiler.start_phase('display')
+        if rects is None:
+            pygame.display.update()
+        elif rects:
+            pygame.display.update(rects)
 
     def start(self, *first_screen_keywords):
         """Starts the game instance. Perform checks and start all the methods needed. 
@@ -802,20 +931,44 @@ class Game(object):
             self.current_screen = self.get_screen(*first_screen_keywords)
             self.current_screen.play_music()
             end = False
+            step_time = 1/INIT_PARAMS.UPDATES_PER_SECOND
+            lag = 0     #Time not updated yet
             while not end:
                 try:
-                    self.clock.tick(self.fps)
+                    if self.idle_throttling and self.quiet_frames >= INIT_PARAMS.IDLE_FRAMES:
+                        events = self.wait_events(INIT_PARAMS.IDLE_TIMEOUT)
+                        self.clock.tick()   #The time slept is not animated
+                        lag = 0
+                        if not events and self.is_idle(events):
+                            continue    #Still idle, nothing to draw
+                    else:
+                        lag += self.clock.tick(self.fps)/1000   #The fps only throttle the drawing
+                        events = pygame.event.get()
+                    self.profiler.start_frame()     #The time slept in the clock or the event queue is not part of the frame
                     if len(self.todo) > 0:
+                        self.profiler.start_phase('todo')
                         timed_exec = self.todo.pop(0)                   #One execution per frame
                         timed_exec[0](*timed_exec[1], **timed_exec[2])  #Executing the method
-                    end = self.event_handler(pygame.event.get())
+                    self.profiler.start_phase('events')
+                    end = self.event_handler(events)
+                    self.profiler.start_phase('update')
+                    updates = 0
+                    while lag >= step_time and updates < INIT_PARAMS.MAX_UPDATES_PER_FRAME:
+                        self.update()
+                        lag -= step_time
+                        updates += 1
+                    lag = min(lag, step_time)   #Too far behind, the lost time is dropped instead of speeding up the animations
+                    self.quiet_frames = self.quiet_frames+1 if self.is_idle(events) else 0
                     self.draw()
+                    self.profiler.end_frame()
                 except GameEndException:
                     end = True
         except Exception:
             LOG.error_traceback()
         for screen in self.screens:
             screen.destroy()
+        if Instrumentation.ENABLED:
+            Instrumentation.save(INIT_PARAMS.INSTRUMENTATION_FILE)
         END_ALL_THREADS()
         sys.exit()
 
@@ -35,6 +35,7 @@ from obj.utilities.logger import Logger as LOG
 from obj.utilities.surface_loader import ResizedSurface, no_size_limit
 from obj.utilities.utility_box import UtilityBox
 from obj.utilities.decorators import time_it, run_async
+from obj.utilities.instrumentation import Instrumentation
 
 #Music files of the menus and board
 MENU_SONGS = UtilityBox.get_all_files(PATHS.MENU_SONGS, *EXTENSIONS.MUSIC_FORMATS)
@@ -434,6 +435,8 @@ if __name__ == "__main__":
         INIT_PARAMS.INITIAL_RESOLUTION = new_initial_resolution
     if any('debug' in arg for arg in arguments):
         LOG.change_level('debug')
+    if any('instrument' in arg for arg in arguments):
+        Instrumentation.enable()    #Saved in INIT_PARAMS.INSTRUMENTATION_FILE when the game ends
     animations = False if any('no_anim' in arg for arg in arguments) else True
     game = pre_start(test=test, animations=animations) 
     game.start('main', 'menu')
\ No newline at end of file
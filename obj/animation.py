@@ -120,6 +120,10 @@ class ScriptedSprite(AnimatedSprite):
             for real_frame in self.real_frames[fps]:
                 self.frames[fps].append(tuple(real_axis*res for real_axis, res in zip(real_frame, self.resolution)))
 
+    def advance(self):
+        """The scripted movements already have a frame for each draw in each fps mode, so these sprites advance in each draw."""
+        self.step_animation()
+
     def update(self):
         """Changes the image to the next surface when its time.
         After that, it updates the position of the sprite, following the scripted
@@ -127,7 +131,9 @@ class ScriptedSprite(AnimatedSprite):
         Returns:
             (boolean):  True if the movement has ended. False otherwise."""
         super().update()    #This changes the image to the next frame.
+        self.set_dirty()
         self.rect.topleft = self.frames[self.fps][self.index]
+        self.set_dirty()
         self.update_sprites()
         self.index += self.frame_jump
         if self.index >= len(self.frames[self.fps]):
@@ -143,7 +149,9 @@ class ScriptedSprite(AnimatedSprite):
     def restart(self):
         """Restarts the movement's attributes and the position to the initial ones."""
         self.index = 0
+        self.set_dirty()
         self.rect.topleft = self.start_pos
+        self.set_dirty()
 
     def set_refresh_rate(self, fps):
         """Updates the refresh rate and the number of frames of the movements of this sprite. Also fix the frame index if the sprite was active.
@@ -24,11 +24,13 @@ from external.PAdLib import draw as drawing
 from settings import MESSAGES, USEREVENTS, PATHS
 from obj.screen import Screen, LoadingScreen
 from obj.dice import Dice
-from obj.cell import Cell, Quadrant
-from obj.paths import Path, PathAppraiser
-from obj.ai_player import ComputerPlayer
+from obj.cell import Cell, Quadrant, PolarIndex
+from obj.paths import Path, PathAppraiser, OccupancyMap
+from obj.rules import Topology, Rules, RandomStreams
+from obj.ai_player import ComputerPlayer, SearchToken
+from obj.search import OpeningBook, ZobristHash
 from obj.players import Player, Character, Restriction
-from obj.sprite import Sprite, AnimatedSprite, OnceAnimatedSprite
+from obj.sprite import Sprite, AnimatedSprite, OnceAnimatedSprite, SpriteLayer
 from obj.ui_element import ButtonAction, TextSprite, InfoBoard, Dialog, ScrollingText
 from obj.polygons import Circle, Rectangle, Circumference
 from obj.counter import CounterSprite
@@ -67,10 +69,18 @@ class Board(Screen):
             max_levels (int):   Number of levels/big circles/circumferences.
             path_color (:tuple: int, int, int): RGB color of the paths of the board.
             path_width (int):   Size of the paths themselves. In pixels.
+            search_stats_overlay (boolean): Shows the statistics of the last computer player movement on the screen.
+            search_stats_file (str):    File in which the statistics of each computer player movement are appended (JSON lines). None to not save them.
+            dirty_rects (boolean):  Draws only the areas of the screen that changed in each frame. False to draw the whole board always.
+            static_layer (boolean): Draws the background, platform, paths and cells from a cached surface, drawing again only
+                                    the cells that change. False to draw all of them each frame.
     Attributes:
         turn (int): Current turn in the board.
         loading (:obj: LoadingScreen):  Loading Screen that will be shown when the board hasn't ended loading stuff.
         cells (:obj: pygame.sprite.Group):  The cells/circles themselves. A SpriteGroup containing them.
+        cells_by_index (:list: Cell):   The same cells, each one in the position of its real index. None in the gaps.
+        cells_by_position (:dict: (int, int), Cell):    The same cells, by (level, index).
+        polar_index (:obj: PolarIndex): Geometric index of the cells and circumferences, to find the ones under the mouse.
         quadrants (:dict: int, Quadrant):   Dict containing the quadrants. Each key is the number, and the item is
                                             the quadrant. Each quadrant contain the belonging cells.
         possible_dests (:obj: pygame.sprite.Group): Saves the possible cells that each character can move to (In their turn).
@@ -92,6 +102,8 @@ class Board(Screen):
         loaded_players (int):   Counter with the total of players that have been succesfully loaded onto the board (With their chars).
         players (:list: Player):List with all the Player objects.
         player_index (int):     Index of the current player playing.
+        search_stats (:list: SearchStats):  Statistics of all the computer player movements of the game, in order.
+        search_stats_sprite (:obj: pygame.sprite.GroupSingle):  Text with the statistics of the last one. Only with the search_stats_overlay param.
         """
     __default_config = {'quadrants_overlap'     : True,
                         'random_filling'        : True,
@@ -120,7 +132,12 @@ class Board(Screen):
                         'fitness_button_texture': None,
                         'help_button_texture'   : None,
                         'counter_round_time'    : None,
-                        'show_last_mov_line'    : True
+                        'show_last_mov_line'    : True,
+                        'seed'                  : None,
+                        'search_stats_overlay'  : False,
+                        'search_stats_file'     : None,
+                        'dirty_rects'           : True,
+                        'static_layer'          : True
     }
     #CHANGE MAYBE THE THREADS OF CHARACTER TO JOIN INSTEAD OF NUM PLAYERS AND SHIT
     def __init__(self, id_, event_id, end_event_id, resolution, *players, empty=False, initial_dice_screen=True, **params):
@@ -144,6 +161,9 @@ class Board(Screen):
         self.overlay_console= None
         self.console_active = True
         self.cells          = pygame.sprite.Group()
+        self.cells_by_index = []
+        self.cells_by_position = {}
+        self.polar_index    = None  #Created in Board.adjust_cells
         self.quadrants      = {}
         self.locked_cells   = []
         self.possible_dests = pygame.sprite.Group()
@@ -155,6 +175,7 @@ class Board(Screen):
         self.help_button    = pygame.sprite.GroupSingle()
         self.thinking_sprite= pygame.sprite.GroupSingle()
         self.counter_sprite = pygame.sprite.GroupSingle()
+        self.search_stats_sprite = pygame.sprite.GroupSingle()
         self.paths          = pygame.sprite.Group()
         self.effects        = pygame.sprite.Group()
         self.characters     = pygame.sprite.OrderedUpdates()
@@ -180,7 +201,7 @@ class Board(Screen):
         #Paths and maping
         self.distances      = None  #Created in Board.generate
         self.enabled_paths  = None  #Created in Board.generate
-        self.current_map    = {}
+        self.current_map    = OccupancyMap()
         
         #Players 
         self.total_players  = 0
@@ -195,12 +216,16 @@ class Board(Screen):
         self.dices_values   = {}
         self.ai_turn        = False
         self.ai_turn_flag   = threading.Event()
+        self.ai_search_token= None
+        self.search_stats   = []
         self.started        = False
         self.finished       = False
         self.generated      = False
         self.admin_mode     = False
         self.swapper        = None
         self.end            = False
+        self.random         = None  #Created in Board.generate
+        self.opening_book   = None  #Created in Board.generate
         Board.generate(self, empty, initial_dice_screen, *players)
     
     ###SIMULATES ON_SCREEN CONSOLEEEE
@@ -219,6 +244,8 @@ class Board(Screen):
         """Method called in the constructor. Creates the complex objects (Not basic types)"""
         self.start_timestamp = time.time()
         UtilityBox.join_dicts(self.params, Board.__default_config)
+        self.dirty_rendering = self.params['dirty_rects']
+        self.random = RandomStreams(self.params['seed'])    #Each use its own stream, so the searchs don't change the dice
         #INIT
         self.ai_turn_flag.set()
         self.generate_events()
@@ -270,13 +297,13 @@ class Board(Screen):
         return self.params['platform_sprite']
 
     def generate_mapping(self):
-        """Adds the map related structures, like the enabled paths graph and the distances matrix."""
-        axis_size = self.params['circles_per_lvl']*self.params['max_levels']
-        if self.params['center_cell']:
-            axis_size += 1
-        dimensions          = (axis_size, axis_size)
-        self.distances      = numpy.full(dimensions, -888, dtype=int)   #Says the distance between cells
-        self.enabled_paths  = numpy.zeros(dimensions, dtype=bool)       #Shows if the path exist
+        """Adds the map related structures, like the enabled paths graph and the distances matrix.
+        Both belong to the headless topology of the board, they are only referenced here."""
+        self.topology       = Topology(self.params['circles_per_lvl'], self.params['max_levels'], self.params['center_cell'],\
+                                        self.params['inter_path_frequency'])
+        self.distances      = self.topology.distances       #Says the distance between cells
+        self.enabled_paths  = self.topology.graph           #Shows if the path exist
+        self.opening_book   = OpeningBook.load(self.topology)   #Empty if this shape of board has no book
 
     @time_it
     def generate_environment(self, initial_dice_screen=False):
@@ -314,6 +341,8 @@ class Board(Screen):
             counter_sprite.set_center((counter_sprite_center_x, self.thinking_sprite.sprite.rect.centery)) #Could also use self.infoboard.rect.centerx instead of the dice. But its the same.
             counter_sprite.set_enabled(False)
             self.counter_sprite.add(counter_sprite)
+        if self.params['search_stats_overlay']:
+            self.search_stats_sprite.add(TextSprite('search_stats', (0, 0), (self.resolution[0]//2, self.resolution[1]//30), self.resolution, 'No searchs yet'))
         HelpDialogs.add_help_dialogs(self.id, (fitness_button, help_button), self.resolution)
         #End, and saving to the sprites attribute of screen so the set_canvas_size resize them when necessary.
         self.save_sprites()
@@ -340,7 +369,8 @@ class Board(Screen):
                 dice_screen.add_text_element(str(player.uuid), player.name, 4//len(player_list), scale=0.60)
             for player in player_list:
                 dice = Dice(str(player.uuid), (0, 0), tuple(0.15*x for x in self.resolution), self.resolution, shuffle_time=1500,\
-                            sprite_folder=self.params['dice_textures_folder'], animation_delay=3, limit_throws=1, overlay=False)
+                            sprite_folder=self.params['dice_textures_folder'], animation_delay=3, limit_throws=1, overlay=False,\
+                            rng=self.random.get('dice', 'start', player.order))
                 dice.add_turn(player.uuid)
                 dice_screen.add_sprite_to_elements(4//len(player_list), dice)
                 if player.human:
@@ -366,10 +396,20 @@ class Board(Screen):
             if growing_cells:   small_radius = int(small_radius*growing_ratio)
         if self.params['center_cell']:
             self.cells.add(self.__generate_center_cell(small_radius, self.params['circles_per_lvl'], self.params['max_levels'], texture=self.params['cell_texture']))
+        self.index_cells()
         LOG.log('DEBUG', "Generated cells of ", self.id)
         self.LOG_ON_SCREEN("All the cells have been generated")
         self.assign_quadrants()
 
+    def index_cells(self):
+        """Builds the tables of cells by real index and by (level, index), so the lookups don't go through all the cells."""
+        cells = self.cells.sprites()
+        self.cells_by_index = [None]*(max(cell.get_real_index() for cell in cells)+1) if cells else []
+        self.cells_by_position = {}
+        for cell in cells:
+            self.cells_by_index[cell.get_real_index()] = cell
+            self.cells_by_position[(cell.get_level(), cell.get_index())] = cell
+
     def __generate_cells(self, radius, center, circle_radius, circle_number, lvl, initial_offset=-90, **cell_params):
         """Generate the cells of one circumference/level of the board. 
         Args:
@@ -401,13 +441,10 @@ class Board(Screen):
 
     def __generate_center_cell(self, radius, circle_number, lvl_number, **cell_params):
         """Creates the center cell if the center_cell flag of **params is true."""
-        index = circle_number*lvl_number
-        for i in range(0, 4):
-            self.enabled_paths[i][index], self.enabled_paths[index][i] = True, True
-            self.distances[i][index], self.distances[index][i] = 1, 1
+        index = circle_number*lvl_number    #Its paths are mapped in the topology
         cell = Cell((lvl_number-1, circle_number), index, tuple(center-radius for center in self.platform.rect.center), (radius*2, radius*2), self.resolution, **cell_params)
         cell.promotion = True
-        cell.owner = 11110000
+        cell.owner = Rules.CENTER_OWNER
         if self.params['cell_border']:
             cell.add_border(self.params['cell_border'])
         cell.set_center(self.platform.rect.center)
@@ -422,7 +459,7 @@ class Board(Screen):
             if cell.get_level() < 1\
             or cell.get_real_index() >= self.params['circles_per_lvl']*self.params['max_levels']: 
                 continue   #We are not interested in this cell, next one
-            quads = self.__get_quadrant(cell.get_index())
+            quads = self.topology.get_quadrant(cell.get_index())
             for quadrant in quads:
                 try:                quadrants[quadrant].append(cell)
                 except KeyError:    quadrants[quadrant] = [cell]
@@ -432,90 +469,15 @@ class Board(Screen):
         if not self.params['quadrants_overlap']:
             Quadrant.delete_overlapping_cells(*self.quadrants.values())
 
-    def __get_quadrant(self, cell_index):
-        """Gets the respective quadrant of the cell index received.
-        Returns:
-            (tuple: int):   Numerical id of the appropiate quadrant.
-                            Can be one or two quadrants if the cell is a border."""
-        ratio = self.params['circles_per_lvl']//4
-        result, rest = (cell_index+ratio//2)//ratio,  (cell_index+ratio//2)%ratio
-        if result >= 4:                 #We gone beyond the last quadrant boi, circular shape ftw
-            if rest is 0:   return 3, 0 #Last and first quadrant, it's that shared cell
-            else:           return 0,    #Associated with first quadrant
-        if rest is 0 and result is not 0: return result, result-1
-        return result,
-    
     @run_async
     def generate_map_board(self):
         """Fills the essential graphs of the current board.
         One graph of booleans for directly connected cells.
-        One graph of ints for connected cells (Without change of direction).""" 
-        self.__map_enabled_paths()
-        self.__map_distances()
-    
-    def __map_enabled_paths(self):
-        """Fills the graph of directly connected cells.
-        The code is a bit different for the inside level, since it doesn't have
-        then same number of cells as the outside levels (circumferences)."""
-        lvls, circles = self.params['max_levels'], self.params['circles_per_lvl']
-        for x in range(0, circles*lvls):
-            interior_limit = 4
-            self.enabled_paths[x][x] = True
-            #Center
-            if x < interior_limit:
-                if x is interior_limit-1:           #Have to connect w/ the other end of the circle               
-                    self.enabled_paths[0][interior_limit-1], self.enabled_paths[interior_limit-1][0] = True, True 
-                    continue    #next iteration                    
-            
-            #Those dont exist at all
-            elif interior_limit <= x < circles:     #Those dont exist (4 -> circles-1)
-                self.enabled_paths[x][x] = None
-                continue        #next iteration
-            
-            #If first circle, check interpaths to get that done
-            elif circles <= x < circles*2:
-                interpath_exists = self.__get_inside_cell(x) #Check if interpath in this circle
-                if interpath_exists is not None:
-                    self.enabled_paths[x][interpath_exists], self.enabled_paths[interpath_exists][x] = True, True
-                    for y in range(x, (lvls-1)*circles, circles):   #From interior -> exterior
-                        self.enabled_paths[y][y+circles], self.enabled_paths[y+circles][y] = True, True
-
-            #No more special conditions, normal cells
-            if (x+1)%circles is 0:                  #last circle of this lvl, connect with first one:
-                self.enabled_paths[x][(x-circles)+1], self.enabled_paths[(x-circles)+1][x] = True, True
-            else:                                   #Connect with next circle
-                self.enabled_paths[x][x+1], self.enabled_paths[x+1][x] = True, True
-        LOG.log('DEBUG', "Paths of this map: \n", self.enabled_paths)       
-
-    def __map_distances(self):
-        """Fills the graph of connected cells. Does this by checking (every cell vs every other cell)
-        if they are in the same inter-circumference path or the same circumference. 
-        In that case, writes the distance between both."""
-        lvls, circles = self.params['max_levels'], self.params['circles_per_lvl']
-        #First level
-        interior_limit = 4
-        for x in range(0, interior_limit):
-            for y in range(x, interior_limit):
-                self.distances[x][y], self.distances[y][x] = abs(x-y), abs(x-y)
-
-        #Exterior levels
-        for x in range(circles, lvls*circles):
-            for y in range(x, lvls*circles):
-                if x//circles is y//circles: #If they are in teh same level
-                    self.distances[x][y], self.distances[y][x] = abs(x-y), abs(x-y)
-
-        #Distances first complete circle among interpaths
-        for x in range(circles, circles*2):
-            interpath_exists = self.__get_inside_cell(x) #Check if interpath in this circle
-            if interpath_exists is not None:
-                for y in range(x, lvls*circles, circles):
-                    self.distances[interpath_exists][y], self.distances[y][interpath_exists] = abs(y-interpath_exists)//circles, abs(y-interpath_exists)//circles
-                for y in range(x, lvls*circles, circles):   #From interior -> exterior
-                    for z in range(y, lvls*circles, circles):
-                        self.distances[y][z], self.distances[z][y] = abs(y-z)//circles, abs(y-z)//circles
-
-        self.__parse_two_way_distances()
-        LOG.log('DEBUG', "Distances of this map: \n", self.distances)  
+        One graph of ints for connected cells (Without change of direction).
+        The mapping itself is done by the headless topology of this board."""
+        self.topology.generate()
+        LOG.log('DEBUG', "Paths of this map: \n", self.enabled_paths)
+        LOG.log('DEBUG', "Distances of this map: \n", self.distances)
 
     @run_async
     @no_size_limit
@@ -563,7 +525,8 @@ class Board(Screen):
     @run_async
     def generate_dice(self):
         """Creates and adds the board dice (NOT the dice screen)."""
-        dice = Dice('dice', (0, 0), tuple(0.1*x for x in self.resolution), self.resolution, shuffle_time=1500, sprite_folder=self.params['dice_textures_folder'], animation_delay=2)
+        dice = Dice('dice', (0, 0), tuple(0.1*x for x in self.resolution), self.resolution, shuffle_time=1500, sprite_folder=self.params['dice_textures_folder'], animation_delay=2,\
+                    rng=self.random.get('dice'))
         dice.set_position((self.infoboard.rect.centerx-dice.rect.width//2, self.resolution[1]-(dice.rect.height*2)))
         self.dice.add(dice)
         self.LOG_ON_SCREEN("Dice has been generated")
@@ -619,7 +582,7 @@ class Board(Screen):
         #This loop goes outside-inside over the circumferences, getting the cells with the same index IN THAT LEVEL.
         for i in range(self.params['max_levels']-1, 0, -1):
             point_list.append(self.get_cell(i, index).center)
-        point_list.append(self.get_cell(0, self.__get_inside_cell(index)).center) #Final point
+        point_list.append(self.get_cell(0, self.topology.get_inside_cell(index)).center) #Final point
         UtilityBox.draw_bezier(surface, color=self.params['path_color'], width=self.params['path_width'], *(tuple(point_list)))
 
     ###UPDATING OF THE ELEMENTS MID-GAME
@@ -672,15 +635,32 @@ class Board(Screen):
             cell.rect.x -= offset*math.cos(cell.angle)
             cell.rect.y -= offset*math.sin(cell.angle)
             cell.set_position(cell.rect.topleft)
+        self.generate_polar_index()
+
+    def generate_polar_index(self):
+        """Builds the geometric index of the cells and circumferences in their current positions."""
+        self.polar_index = PolarIndex(self.platform.rect.center, self.cells.sprites(), self.paths.sprites())
 
     def save_sprites(self):
         """Copies all the references of the sprites to the sprites list declared on the superclass.
         Do this to modify all the graphical elements at once when needed in a more seamless manner.
         Also because the super().draw method only draws the self.sprites.
-        Only adds the graphics regarding the board, the characters and player addons will be drawn later."""
+        Only adds the graphics regarding the board, the characters, effects and player addons will be drawn later."""
         self.sprites.add(self.platform, self.inter_paths.sprite, *self.paths.sprites(), *self.cells.sprites(),\
                         self.infoboard, self.dice, self.fitness_button, self.help_button, self.thinking_sprite,\
-                        self.counter_sprite, self.effects)
+                        self.counter_sprite, self.search_stats_sprite)
+        if self.params['static_layer']:
+            self.save_static_layer()
+
+    def save_static_layer(self):
+        """Creates the cached layer with the elements of the board that only change on hover, highlight or fitness display:
+        The background, the platform, the inter paths, the circumferences and the cells. Replaces the previous one."""
+        if self.layer:
+            self.layer.clear()
+        static_sprites = (self.platform, self.inter_paths.sprite, *self.paths.sprites(), *self.cells.sprites())
+        if not self.animated_background:
+            static_sprites = (self.background,)+static_sprites
+        self.layer = SpriteLayer(self.resolution, *static_sprites)
 
     def __adjust_number_of_paths(self):
         """Checks the inter path frequency. If the circles are not divisible by that frequency,
@@ -690,35 +670,6 @@ class Board(Screen):
             self.params['inter_path_frecuency'] = circles//math.ceil(circles/paths) 
             LOG.log('DEBUG', "Changed number of paths from ", paths, " to ", self.params['inter_path_frecuency'])                                
         
-    def __parse_two_way_distances(self):
-        """Since our circumferencial path has a circular shape, to go from one cell to another,
-        we can go by two ways. This means that the maximum distance is half the distance of a circumference.
-        This methos parses those distances that need it, since they were generated without taking into account
-        this detail."""
-        lvls, circles = self.params['max_levels'], self.params['circles_per_lvl']
-        interior_limit = 4
-        limit = interior_limit//2
-        #Interior circle
-        for x in range(0, interior_limit):
-            for y in range(0, interior_limit):
-                if self.distances[x][y] > limit:
-                    dist = abs(self.distances[x][y]-limit)
-                    self.distances[x][y], self.distances[y][x] = dist, dist 
-        #Complete circles
-        limit = circles//2
-        for x in range(circles, lvls*circles):
-            for y in range(circles, lvls*circles):
-                if self.distances[x][y] > limit:    
-                    dist = abs(circles-self.distances[x][y])
-                    self.distances[x][y],self.distances[y][x] = dist, dist   
-
-    #Map lvl 1 circles to the lvl0 circle (less circles)
-    def __get_inside_cell(self, index):
-        """Returns:
-            (int): The correspondant cell index of the inside circumference for an index of the outside levels."""
-        ratio = self.params['circles_per_lvl']//4
-        return (index%self.params['circles_per_lvl'])//ratio if (index+1)%self.params['inter_path_frequency'] is 0 else None
-
     def set_admin_mode(self, admin):
         """Changes the admin mode flag."""
         self.admin_mode = admin
@@ -748,35 +699,32 @@ class Board(Screen):
             lvl (int):  Level of the requested cell.
             index (int):Index of the requested cell.
         Returns:
-            (:obj: Cell):   The cell that has the level and index arguments."""
-        for cell in self.cells:
-            if lvl is cell.get_level() and index is cell.get_index():
-                return cell
-        return False
+            (:obj: Cell):   The cell that has the level and index arguments. False if there isn't one."""
+        return self.cells_by_position.get((lvl, index), False)
 
     def get_cell_by_real_index(self, index):
         """Args:
             index (int):    Real index of the requested cell.
         Returns:
-            (:obj: Cell):   The cell that has the real index."""
-        for cell in self.cells:
-            if index is cell.get_real_index():  
-                return cell
+            (:obj: Cell):   The cell that has the real index. False if there isn't one."""
+        if 0 <= index < len(self.cells_by_index):
+            return self.cells_by_index[index] or False
         return False
 
     def update_map(self):
-        """Generates the current map, changing enemies and allies of each Cell according to which player is asking.
-        Args:
-            to_who (str): Player who is asking.
+        """Makes the current map be seen by the current player. The enemies and allies of each path are derived from it.
+        The first time, the paths of all the cells are created, with the chars that are in them at that moment.
         """ 
-        for cell in self.cells:
-            self.current_map[cell.get_real_index()]=cell.to_path(self.current_player.uuid)
-        LOG.log('DEBUG', "Generated the map of paths for ", self.current_player.name)
+        if len(self.current_map) != len(self.cells):
+            for cell in self.cells:
+                self.current_map.add_cell(cell.pos, cell.get_real_index(), cell.get_char())
+        self.current_map.set_player(self.current_player.uuid)
+        LOG.log('DEBUG', "Changed the map of paths to ", self.current_player.name)
     
     def update_cells(self, *cells):
-        """Called after each complete board turn. Updates the current_map structure."""
+        """Called after each change in the chars of the cells. Updates the current_map structure with the char of the input cells."""
         for cell in cells:
-            self.current_map[cell.get_real_index()]=cell.to_path(self.current_player.uuid)
+            self.current_map.set_char(cell.get_real_index(), cell.get_char())
 
     def set_resolution(self, resolution):
         """Changes the resolution of the Screen. It also resizes all the Screen elements.
@@ -787,6 +735,10 @@ class Board(Screen):
         self.loading_screen.set_resolution(resolution)
         for player in self.players:
             player.set_resolution(resolution)
+        for effect in self.effects:
+            effect.set_canvas_size(resolution)
+        self.index_cells()
+        self.generate_polar_index()
         #Othewise the bezier curves just get fucked up when resizing back and forth.
         self.sprites.empty()
         for end_event in threads:   end_event.wait() #When those are done
@@ -871,7 +823,8 @@ class Board(Screen):
                         current_level -= 1
                         rank = character.rank
                     character.set_size(tuple(int(x*self.params['char_proportion'] )for x in self.cells.sprites()[0].rect.size))
-                    cell = self.quadrants[player.order].get_cell(border_level=current_level, random_cell=self.params['random_filling'])
+                    cell = self.quadrants[player.order].get_cell(border_level=current_level, random_cell=self.params['random_filling'],\
+                                                                rng=self.random.get('board', player.order))    #Players are added asynchronously, a stream each
                     cell.add_char(character)
                     character.set_cell(cell)
                     self.characters.add(character)  
@@ -908,7 +861,9 @@ class Board(Screen):
             (:obj:Threading.thread):    The thread doing the work. It is returned by the decorator."""
         if cpu:
             player = ComputerPlayer(self.enabled_paths, self.distances, self.params['circles_per_lvl'], player_name,\
-                                    player_number, chars_size, self.resolution, ai_mode=ai_mode, timeout=ai_time, **player_params)
+                                    player_number, chars_size, self.resolution, ai_mode=ai_mode, timeout=ai_time, rng=self.random.get('search', player_number),\
+                                    opening_book=self.opening_book, promotion_cells=[cell.get_real_index() for cell in self.cells if cell.promotion],\
+                                    **player_params)
         else:
             player = Player(player_name, player_number, chars_size, self.resolution, empty=empty, **player_params)
         self.__add_player(player)
@@ -917,13 +872,43 @@ class Board(Screen):
         """Shows a particle effect in the input position in the board"""
         effect = next((sprite for sprite in self.effects if id_.lower() in sprite.id.lower() or sprite.id.lower() in id_.lower()), None)
         if effect:
-            effect.rect.center = center_position
+            effect.set_center(center_position)     #Reports the old and new areas as changed
             effect.set_enabled(True)
     
     def get_effect(self, id_):
         """Return an effect if the id input matches, or None otherwise"""
         return next((sprite for sprite in self.effects if id_.lower() in sprite.id.lower() or sprite.id.lower() in id_.lower()), None)
 
+    def get_drawn_state(self):
+        """Returns:
+            (Tuple):    State of the elements that are drawn without reporting their changes. The current player (And its infoboard),
+                        the last movement line, and the overlays (scoreboard, promotion table, console)."""
+        return super().get_drawn_state()+(self.started, self.current_player, self.last_real_movm, self.show_score,\
+                                        self.show_promotion, self.console_active)
+
+    def needs_full_frame(self):
+        """Returns:
+            (boolean):  True if the whole board must be drawn in this frame. Also while loading,
+                        and while showing the scoreboard, the promotion table or the console."""
+        return super().needs_full_frame() or not self.started or self.show_score or self.show_promotion or self.console_active
+
+    def is_idle(self):
+        """Returns:
+            (boolean):  True if nothing in the board changes by itself. Not while loading messages arrive,
+                        while dragging a character, or in the turn of a computer player."""
+        if not self.started:
+            return super().is_idle() and not self.overlay_console.changed
+        return super().is_idle() and not self.drag_char.sprite and not self.ai_turn
+
+    def update(self):
+        """Fixed-timestep update pass of the board. Advances the animations of the sprites, the effects and the characters."""
+        if self.started:
+            super().update()
+            for sprite in self.effects:
+                sprite.advance()
+            for char in self.characters:
+                char.advance()
+
     def draw(self, surface):
         """Draws the board and all of its elements on the surface.
         Blits them all and then updates the display.
@@ -938,6 +923,7 @@ class Board(Screen):
                         self.overlay_console.draw(surface)
                 return
             super().draw(surface)   #Draws background and sprites
+            Sprite.draw_sprites(surface, self.effects)
             if self.params['show_last_mov_line'] and self.last_real_movm:
                 start_pos, end_pos = self.get_cell_by_real_index(self.last_real_movm[0]).rect.center, self.get_cell_by_real_index(self.last_real_movm[1]).rect.center
                 # direction = (1 if start_pos[0]<end_pos[0] else -1, 1 if start_pos[1]<end_pos[1] else -1)
@@ -945,8 +931,7 @@ class Board(Screen):
                 pygame.draw.lines(surface, BLACK, False, (start_pos, end_pos), (self.resolution[0]//300)+2)
                 pygame.draw.lines(surface, WHITE, False, (start_pos, end_pos), self.resolution[0]//300)
 
-            for char in self.characters:
-                char.draw(surface)
+            Sprite.draw_sprites(surface, self.characters)
             if self.current_player:
                 self.current_player.draw(surface)   #This draws the player's infoboard
             if self.promotion_table and self.show_promotion:
@@ -1061,33 +1046,34 @@ class Board(Screen):
             if not self.ai_turn:
                 #Checking if Im holding a sprite
                 if self.drag_char.sprite:
-                    self.drag_char.sprite.rect.center = mouse_position
+                    self.drag_char.sprite.set_center(mouse_position)   #Reports the old and new areas as changed
                     if self.get_effect('selection_effect'):
                         if not self.get_effect('selection_effect').enabled:
                             self.play_effect('selection_effect', mouse_position)
                         else:
-                            self.get_effect('selection_effect').rect.center = mouse_position
+                            self.get_effect('selection_effect').set_center(mouse_position)
                 
-                #Checking collision with cells (Using this instead of hit_sprite because the hit method is different)
-                collided_cell = pygame.sprite.spritecollideany(mouse_sprite, self.cells, collided=pygame.sprite.collide_circle)
-                self.set_active_cell(collided_cell)
-            #Checking collision with paths (Using this instead of hit_sprite because the hit method is different)
-            path = pygame.sprite.spritecollideany(mouse_sprite, self.paths, collided=pygame.sprite.collide_mask)
-            self.set_active_path(path)
-
-            if pygame.sprite.spritecollideany(mouse_sprite, self.dice, collided=pygame.sprite.collide_mask):
+                #Checking collision with cells (Using the distance and angle to the center instead of testing all of them)
+                self.set_active_cell(self.polar_index.get_cell(mouse_position))
+            #Checking collision with paths, the same way
+            self.set_active_path(self.polar_index.get_circumference(mouse_position))
+            #The masks are only tested if the mouse is inside the rect
+            if self.dice.sprite.rect.collidepoint(mouse_position)\
+            and pygame.sprite.spritecollideany(mouse_sprite, self.dice, collided=pygame.sprite.collide_mask):
                 self.dice.sprite.set_hover(True)
             else:
                 self.dice.sprite.set_hover(False)
 
-            if pygame.sprite.spritecollideany(mouse_sprite, self.fitness_button, collided=pygame.sprite.collide_mask):
+            if self.fitness_button.sprite.rect.collidepoint(mouse_position)\
+            and pygame.sprite.spritecollideany(mouse_sprite, self.fitness_button, collided=pygame.sprite.collide_mask):
                 self.fitness_button.sprite.set_active(True)
                 self.fitness_button.sprite.set_hover(True)
             else:
                 self.fitness_button.sprite.set_active(False)
                 self.fitness_button.sprite.set_hover(False)
                 
-            if pygame.sprite.spritecollideany(mouse_sprite, self.help_button, collided=pygame.sprite.collide_mask):
+            if self.help_button.sprite.rect.collidepoint(mouse_position)\
+            and pygame.sprite.spritecollideany(mouse_sprite, self.help_button, collided=pygame.sprite.collide_mask):
                 self.help_button.sprite.set_active(True)
                 self.help_button.sprite.set_hover(True)
             else:
@@ -1107,6 +1093,7 @@ class Board(Screen):
             new_char = yield
             cell = self.get_cell_by_real_index(original_char.current_pos)
             cell.add_char(new_char)
+            self.update_cells(cell)
             player = next(player for player in self.players if player.uuid == original_char.owner_uuid)
             player.revive_char(new_char, original_char)
             new_char.set_size(tuple(x*self.params['char_proportion'] for x in cell.rect.size))
@@ -1255,11 +1242,7 @@ class Board(Screen):
             if not 'mother' in char.get_type():
                 char.set_active(True)
                 char.set_state('idle')
-        for path in self.current_map:
-            if path.ally:   #Not to worry, those changes will be cleared in the next player turn
-                path.ally = False
-                path.enemy = True
-                path.access = True
+        self.current_map.set_player(None)   #Every char is an enemy. Not to worry, the next player turn changes it again
 
     def move_character(self, character):
         """Moves effectively the input character, cleaning the last cell and adding it to the new one.
@@ -1289,13 +1272,13 @@ class Board(Screen):
         #Not last cell anymore, char was dropped succesfully
         self.last_cell.empty()
         #THIS CONDITION TO SHOW THE UPGRADE TABLE STARTS HERE
-        if active_cell.promotion and (None != active_cell.owner != character.owner_uuid):
+        if Rules.triggers_promotion(active_cell.promotion, active_cell.owner, character):
             if 'champion' in self.drag_char.sprite.get_type().lower():
                 self.update_character(self.drag_char.sprite)
             elif self.drag_char.sprite.upgradable\
-            and any(not char.upgradable for char in self.current_player.fallen):
+            and Rules.promotion_choices(self.current_player.fallen):
                 self.promotion_flag.clear()
-                self.update_promotion_table(*tuple(char for char in self.current_player.fallen if not char.upgradable))
+                self.update_promotion_table(*tuple(Rules.promotion_choices(self.current_player.fallen)))
                 self.show_promotion = True
                 self.swapper.send(self.drag_char.sprite)
                 return
@@ -1307,9 +1290,7 @@ class Board(Screen):
         To execute when placed on the promotion cell (If the char fills the conditions).
         Args:
             char(:Obj:Character):   Character to make changes to."""
-        char.can_kill = True
-        char.can_die = True
-        char.value *= 3
+        Rules.upgrade_champion(char)
 
     def next_char_turn(self, char):
         """Advances a character turn. Each movement of a character ends with this method.
@@ -1363,6 +1344,21 @@ class Board(Screen):
         if not self.current_player.human:
             self.current_player.pause_characters()  #We don't want the human players fiddling with the chars
             self.do_ai_player_turn()
+        else:
+            self.ponder_next_ai_player()
+
+    def ponder_next_ai_player(self):
+        """If the player after the current one is a computer player, makes it start searching in the background
+        while the current (human) player thinks his movement."""
+        next_index = self.player_index
+        for _ in range(0, len(self.players)):
+            next_index = next_index+1 if next_index < len(self.players)-1 else 0
+            if not self.players[next_index].dead:
+                break
+        next_player = self.players[next_index]
+        if next_player is not self.current_player and not next_player.human:
+            next_player.ponder(self.__hash__(), self.current_map, self.cells, self.current_player.uuid, next_player.uuid,\
+                                [player.uuid for player in self.players])
 
     @run_async_not_pooled
     def do_ai_player_turn(self, result=None):
@@ -1393,9 +1389,16 @@ class Board(Screen):
         if self.char_turns is not 0:    #If we moved a character that can move more than once
             char_that_must_move.append(self.get_cell_by_real_index(self.last_real_movm[-1]).get_char())
             restricted_movements = self.last_real_movm
+        self.ai_search_token = SearchToken(self.current_player.round_timeout)
         movement = self.current_player.get_movement(self.__hash__(), self.current_map, self.cells, self.current_player.uuid, [player.uuid for player in self.players],\
-                                                    chars_allowed=char_that_must_move, restricted_movements=restricted_movements)
+                                                    chars_allowed=char_that_must_move, restricted_movements=restricted_movements, stop_token=self.ai_search_token)
+        if self.end:    #The board was destroyed while searching, the search was stopped and its result doesn't matter anymore
+            self.thinking_sprite.sprite.set_visible(False)
+            self.ai_turn = False
+            self.ai_turn_flag.set()
+            return
         LOG.log('debug', "Movement chosen was ", movement)
+        self.add_search_stats(self.current_player.get_search_stats())
         character = self.get_cell_by_real_index(movement[0]).get_char()
         self.drag_char.add(character)
         self.last_cell.add(self.get_cell_by_real_index(movement[0]))
@@ -1405,7 +1408,7 @@ class Board(Screen):
         if self.show_promotion: #If the update table was triggered
             self.promotion_flag.wait()
             #Should get the highest valued char. And wait until it is full. Also do this for usual players (human ones), but whatever
-            char_revived = random.choice(self.promotion_table.elements.sprites())
+            char_revived = self.random.get('promotion', self.current_player.order).choice(self.promotion_table.elements.sprites())
             self.swapper.send(char_revived)
             should_go_next_turn = True
         self.drag_char.empty()
@@ -1450,7 +1453,9 @@ class Board(Screen):
         if player.has_lost():
             self.characters.remove(player.characters)
             for char in player.characters:
-                self.get_cell_by_real_index(char.current_pos).empty_cell()
+                cell = self.get_cell_by_real_index(char.current_pos)
+                cell.empty_cell()
+                self.update_cells(cell)
             if sum(1 for player in self.players if not player.dead) <= 1:  #WE HAVE A WINNER!
                 self.win()
 
@@ -1508,9 +1513,50 @@ class Board(Screen):
             path.set_hover(True)
             self.active_path.add(path)
         
+    def stop_ai_search(self):
+        """Stops the current computer player search and all the background (ponder) searchs. 
+        The current search returns the best movement found until now."""
+        if self.ai_search_token:
+            self.ai_search_token.stop()
+        for player in self.players:
+            if not player.human:
+                player.stop_search()
+
+    def get_ai_progress(self):
+        """Returns:
+            (Dict->String:Any): Progress of the search of the current computer player (nodes, depth, best movement...).
+                                None if the current player is not a computer player."""
+        if self.current_player and not self.current_player.human:
+            return self.current_player.get_search_progress()
+        return None
+
+    def add_search_stats(self, stats):
+        """Saves the statistics of a computer player movement, shows them in the overlay and appends them to the
+        search_stats_file, if those params are set.
+        Args:
+            stats (:obj: SearchStats):  Statistics of the movement. Ignored if None."""
+        if not stats:
+            return
+        self.search_stats.append(stats)
+        if self.search_stats_sprite.sprite:
+            self.search_stats_sprite.sprite.set_text(str(stats))
+        if self.params['search_stats_file']:
+            stats.save(self.params['search_stats_file'], board=self.id, levels=self.params['max_levels'], circles=self.params['circles_per_lvl'],\
+                        center=self.params['center_cell'], turn=self.turn)
+
+    def get_search_stats(self, player=None):
+        """Args:
+            player (int, default=None): Unique identifier of a player. If None, the statistics of all of them are returned.
+        Returns:
+            (List->SearchStats):    Statistics of the computer player movements of this game, in order."""
+        return [stats for stats in self.search_stats if player is None or stats.player == player]
+
     def destroy(self):
-        """Sets the end flag to true. This will end the methods that depends on it."""
+        """Sets the end flag to true. This will end the methods that depends on it.
+        Also stops the searchs of the computer players, and deletes the zobrist keys of their players."""
         self.end = True
+        self.stop_ai_search()
+        ZobristHash.clear()
 
     def __hash__(self):
         """Returns the hash value of this board instance."""
@@ -4,15 +4,18 @@ and the Quadrant object (Organization of Cells on the board).
 Have the following classes, inheriting represented by tabs:
     Cell
     Quadrant
+    PolarIndex
 --------------------------------------------"""
 
-__all__ = ['Cell', 'Quadrant']
+__all__ = ['Cell', 'Quadrant', 'PolarIndex']
 __version__ = '1.0'
 __author__ = 'David Flaity Pardo'
 
 import functools
 import pygame
 import random
+import math
+import bisect
 from settings import PATHS
 from obj.paths import Path
 from obj.sprite import Sprite, MultiSprite
@@ -85,6 +88,7 @@ class Cell(Circle):
         try:
             self.set_fitness_value(fitness_value)
             self.fitness_active = True
+            self.set_dirty()
         except pygame.error:
             LOG.log('warning', 'Couldnt modify the cell ', self.index)
 
@@ -93,9 +97,11 @@ class Cell(Circle):
         """Hides the small dialog with the fitness value of this cell in this turn.
         Non blocking method."""
         try:
+            drawn_rect = self.get_drawn_rect()
             self.fitness_active = False
             self.overlay = self.def_overlay   #Value -1 holds the default overlay
             self.current_fitness = -1
+            self.set_dirty(previous_rect=drawn_rect)
         except pygame.error:
             LOG.log('warning', 'Couldnt modify the cell ', self.index)
 
@@ -112,6 +118,26 @@ class Cell(Circle):
         except KeyError:
             pass
 
+    def get_blits(self, offset=None):
+        """Returns the surfaces that draw this cell, with the fitness value if it's shown.
+        Returns:
+            (List->Tuple->pygame.Surface, Tuple->int, int): The (surface, position) pairs."""
+        blits = super().get_blits(offset)
+        try:
+            if self.fitness_active:
+                blits.extend(self.fitnesses_sprites[self.current_fitness][1].get_blits(offset))
+        except KeyError:
+            pass
+        return blits
+
+    def get_drawn_rect(self):
+        """Returns:
+            (:obj: pygame.Rect):    Area of the screen that this cell covers when drawn, with the fitness value if it's shown."""
+        rect = super().get_drawn_rect()
+        if self.fitness_active and self.current_fitness in self.fitnesses_sprites:
+            return rect.union(self.fitnesses_sprites[self.current_fitness][1].get_drawn_rect())
+        return rect
+
     def set_canvas_size(self, canvas_size):
         """Set a new resolution for the container element (Can be the screen itself). 
         Updates self.real_rect and self.resolution.
@@ -370,11 +396,12 @@ class Quadrant(object):
             else border_levels[1] if border_level > border_levels[1] else border_level
             return level
 
-    def get_cell(self, border_level=None, center_level=None, random_cell=True):
+    def get_cell(self, border_level=None, center_level=None, random_cell=True, rng=random):
         """Gets a random cell from the quadrant, returns it and deletes it.
         Args:
             zone (string, default=None):    Zone from where to get the Cell. Kinda like a restriction or to specify.
                                             Options: center, border, None.
+            rng (:obj: random.Random, default=random):  Source of the random numbers when random_cell is True.
         Returns:
             (None||:obj: Cell): A cell of the requested zone as the input says so. 
                                 None if the input cant be recognized.
@@ -404,7 +431,7 @@ class Quadrant(object):
             choosable_pool.extend(self.cells)   #Lets just get whatever cell is still available 
         #And now we can choose
         if random_cell:
-            cell = random.choice(choosable_pool)
+            cell = rng.choice(choosable_pool)
         else:
             choosable_pool.sort(key=lambda cell: cell.cell.get_level(), reverse=True)
             cell = choosable_pool[0]    #The first one after sorting
@@ -459,4 +486,93 @@ class Quadrant(object):
             and (cell.cell.get_index()+offset)%level_size < index_interval[1]\
             and (cell.cell.get_index()+offset)%level_size > index_interval[0]:
                 center.append(cell)
-        return center
\ No newline at end of file
+        return center
+
+class PolarIndex(object):
+    """PolarIndex class. Geometric index of the cells and circumferences of a board, to find the one under a point
+    without testing all of them. The board is a set of concentric circles, so the distance from the point to the center
+    gives the level, and its angle gives the index of the cell in that level. Built from the current positions of the sprites,
+    so it has to be built again when they move (Like in a change of resolution).
+    Attributes:
+        center (:tuple: int, int):  Center of the board. In pixels.
+        levels (List->Tuple->float, float, List->Cell): Distance to the center, angle of the first cell, and cells in order of index,
+                                                        of each level. Sorted by distance.
+        distances (List->float):    Distance to the center of each level, in the same order. Used to bisect.
+        center_cells (List->Cell):  Cells placed in the center of the board.
+        circumferences (List->Tuple->float, float, Circumference):  Outer and inner radius of each circumference, and the sprite.
+                                                                    Sorted by radius.
+        outer_radiuses (List->float):   Outer radius of each circumference, in the same order. Used to bisect.
+    """
+    def __init__(self, center, cells, circumferences=()):
+        """PolarIndex constructor.
+        Args:
+            center (:tuple: int, int):  Center of the board. In pixels.
+            cells (Iterable->Cell): Cells of the board, already in their final position.
+            circumferences (Iterable->Circumference, default=()):   Circular paths of the board."""
+        self.center = center
+        self.levels = []
+        self.center_cells = []
+        self.circumferences = []
+        PolarIndex.generate(self, cells, circumferences)
+
+    @staticmethod
+    def generate(self, cells, circumferences):
+        """Generate method, called in the constructor. Groups the cells by level, and measures the levels and circumferences."""
+        levels = {}
+        for cell in cells:
+            if self.get_distance(cell.rect.center) <= cell.rect.width/2:    #The center cell shares level with the last circumference
+                self.center_cells.append(cell)
+            else:
+                levels.setdefault(cell.get_level(), []).append(cell)
+        for level_cells in levels.values():
+            level_cells.sort(key=lambda cell: cell.get_index())
+            distance = sum(self.get_distance(cell.rect.center) for cell in level_cells)/len(level_cells)
+            self.levels.append((distance, self.get_angle(level_cells[0].rect.center), level_cells))
+        self.levels.sort(key=lambda level: level[0])
+        self.distances = [level[0] for level in self.levels]
+        for circumference in circumferences:    #The width attribute is measured only in the constructor, so it's measured again here
+            outer_radius = circumference.rect.width/2
+            self.circumferences.append((outer_radius, outer_radius-UtilityBox.get_circumference_width(circumference.image), circumference))
+        self.circumferences.sort(key=lambda circumference: circumference[0])
+        self.outer_radiuses = [circumference[0] for circumference in self.circumferences]
+
+    def get_distance(self, position):
+        """Returns:
+            (float):    Distance from the input position to the center. In pixels."""
+        return math.hypot(position[0]-self.center[0], position[1]-self.center[1])
+
+    def get_angle(self, position):
+        """Returns:
+            (float):    Angle of the input position around the center. In radians, in the same direction than the cells are placed."""
+        return math.atan2(position[1]-self.center[1], position[0]-self.center[0])
+
+    def get_cell(self, position):
+        """Finds the cell under a position. Only the levels next to the distance of the position are checked, and in each one, 
+        only the cell of the angle of the position.
+        Args:
+            position (:tuple: int, int):    Position to check. In pixels.
+        Returns:
+            (:obj: Cell):   The cell under the position. None if there is no one."""
+        for cell in self.center_cells:
+            if math.hypot(position[0]-cell.rect.centerx, position[1]-cell.rect.centery) <= cell.rect.width/2:
+                return cell
+        distance = self.get_distance(position)
+        level_index = bisect.bisect_left(self.distances, distance)
+        angle = self.get_angle(position)
+        for _, first_angle, level_cells in self.levels[max(0, level_index-1):level_index+2]:
+            cell = level_cells[int(round((angle-first_angle)*len(level_cells)/(2*math.pi)))%len(level_cells)]
+            if math.hypot(position[0]-cell.rect.centerx, position[1]-cell.rect.centery) <= cell.rect.width/2:
+                return cell
+        return None
+
+    def get_circumference(self, position):
+        """Finds the circumference whose line is under a position.
+        Args:
+            position (:tuple: int, int):    Position to check. In pixels.
+        Returns:
+            (:obj: Circumference):  The circumference under the position. None if there is no one."""
+        distance = self.get_distance(position)
+        index = bisect.bisect_left(self.outer_radiuses, distance)
+        if index < len(self.circumferences) and self.circumferences[index][1] <= distance:
+            return self.circumferences[index][2]
+        return None
@@ -71,16 +71,26 @@ class CounterSprite(AnimatedSprite):
         if self.check_counter():
             self.animation_frame()
             self.image = self.current_sprite()
+            self.set_dirty()
 
     def draw_overlay(self, surface, offset=None):
         """no need for an overlay in a counter, so we override the superclass with an empty method."""
         pass
 
+    def get_overlay_blits(self, position):
+        """no need for an overlay in a counter, so we override the superclass with an empty method."""
+        return []
+
+    def animate_overlay(self):
+        """no need for an overlay in a counter, so we override the superclass with an empty method."""
+        pass
+
     def start_counter(self):
         """Starts/restarts the counter itself, and updates the start time."""
         self.animation_index = 0
         self.image = self.surfaces[self.animation_index]
         self.last_change = time.time()
+        self.set_dirty()
 
     def set_canvas_size(self, canvas_size):
         """Set a new resolution for the container element (Can be the screen itself). 
@@ -14,6 +14,7 @@ import math
 from settings import USEREVENTS
 from obj.sprite import Sprite, AnimatedSprite
 from obj.utilities.colors import LIGHTGRAY
+from obj.rules import Rules
 from obj.utilities.decorators import run_async_not_pooled
 from obj.utilities.logger import Logger as LOG
 
@@ -21,12 +22,12 @@ class Dice(AnimatedSprite):
     """Dice class, inherits from AnimatedSprite.
     Have an animated dice, variables related to value limits, and all the logic
     that a dice can need on top of only a sprite."""
-    GOLD_VALUE = 6
-    MAX_DICE_VALUE = 6
+    GOLD_VALUE = Rules.GOLD_VALUE
+    MAX_DICE_VALUE = Rules.MAX_DICE_VALUE
     WEIGHTS = [1 for _ in range(1, MAX_DICE_VALUE+1)]
     VALUES = [i for i in range(1, MAX_DICE_VALUE+1)]
-    def __init__(self, id_, position, size, canvas_size, shuffle_time=0, rotate_kw='rot', result_kw='res', limit_throws=3, **params):
-        """Dice constructor, Shuffle_time is in miliseconds."""
+    def __init__(self, id_, position, size, canvas_size, shuffle_time=0, rotate_kw='rot', result_kw='res', limit_throws=3, rng=None, **params):
+        """Dice constructor, Shuffle_time is in miliseconds. rng is the source of the random values (The random module if None)."""
         super().__init__(id_, position, size, canvas_size, **params)
         self.currently_shuffling = False
         self.shuffle_time = shuffle_time
@@ -41,6 +42,7 @@ class Dice(AnimatedSprite):
         self.current_result = 1
         self.overlay = None
         self.has_input = False
+        self.rng = rng if rng else random
 
     @run_async_not_pooled
     def shuffle(self):
@@ -89,6 +91,7 @@ class Dice(AnimatedSprite):
         self.overlay = Sprite.generate_overlay(self.surfaces[self.animation_index], LIGHTGRAY)
         self.locked = True
         self.set_enabled(False)
+        self.set_dirty()
 
     def increase_animation_delay(self):
         """Increases the time between frame, 'slowing down' the dice."""
@@ -109,11 +112,7 @@ class Dice(AnimatedSprite):
     def get_random_value(self):
         """Returns a random value.
         The chances of each value vary after each player and his statistics."""
-        weights = Dice.WEIGHTS.copy()
-        x = math.log10(self.turns/(self.throws[self.current_player]*3))
-        weights[-1] += math.tanh(x)
-        weights[-1] = max(0.3, weights[-1])
-        return random.choices(Dice.VALUES, weights)[0]
+        return Rules.dice_value(self.turns, self.throws[self.current_player], self.rng)
 
     def throw(self):
         """Executes a throw of the dices. This yield a random value by the means of an event, and changes
@@ -27,6 +27,7 @@ from obj.board_server import Server
 from obj.ui_element import ScrollingText
 from obj.board import Board
 from obj.dice import Dice
+from obj.rules import RandomStreams
 from obj.players import Character
 from obj.utilities.colors import COLOR_CHOOSER
 from obj.utilities.utility_box import UtilityBox
@@ -60,6 +61,8 @@ class NetworkBoard(Board):
         player_names (Dict->somefshfoisofdhithing:obj:pygame.Surface):
         flags (dict):   Dict of threading.Event objects that block threads when they try to make an action that needs a not ready yet asset.
         reconnect (boolean):    True if to reconnect after losing connection, False otherwise.
+        pending_mouse (Dict):   Last mouse position or dragged character position not sent yet, due to the limit of NETWORK.MOUSE_SENDS_PER_SECOND.
+        last_mouse_send (float):    Timestamp of the last message with the mouse position.
     """
 
     def __init__(self, id_, event_id, end_event_id, resolution, obj_uuid=None, direct_connection=False, host=False, server=None, **params):
@@ -100,6 +103,8 @@ class NetworkBoard(Board):
         self.flags = {}     #Used only if client and not host.
         self.reconnect = True
         self.chars_locked = False
+        self.pending_mouse = None
+        self.last_mouse_send = 0
         NetworkBoard.generate(self, host, direct_connection)
 
     @staticmethod
@@ -250,7 +255,7 @@ class NetworkBoard(Board):
             self.request_data_async("players_data")     #To get the data of the players
             self.request_data_async("characters_data")  #To get the data of the characters
             self.LOG_ON_SCREEN('Sent the request, waiting for players and characters')
-        dice = random.randint(1, 6)
+        dice = self.random.get('dice', 'start', self.uuid).randint(1, 6)
         self.send_data_async({"start_dice": dice, "id": self.uuid})    #Sending dice result for the player assignments
         self.LOG_ON_SCREEN("rolled a "+str(dice))
 
@@ -308,6 +313,7 @@ class NetworkBoard(Board):
         if "params" in response and not self.server:    #REQUESTING THE BOARD GENERATION PARAMETERS
             self.LOG_ON_SCREEN('received the board params, creating board...')
             self.params.update(response["params"])
+            self.random = RandomStreams(self.params['seed'])    #The same seed that the host, so the game can be replayed
             self.generate_mapping()
             self.LOG_ON_SCREEN('created map...')
             self.generate_environment()
@@ -455,6 +461,7 @@ class NetworkBoard(Board):
         if char:
             cell = self.get_cell_by_real_index(character['cell'])
             cell.add_char(char)
+            self.update_cells(cell)
             char.set_cell(cell)
             self.characters.add(char)
             if cell.promotion:
@@ -486,7 +493,8 @@ class NetworkBoard(Board):
                 "circles_per_lvl"       : self.params["circles_per_lvl"],
                 "max_levels"            : self.params["max_levels"] ,
                 "center_cell"           : self.params["center_cell"],
-                "quadrants_overlap" : self.params["quadrants_overlap"]}
+                "quadrants_overlap" : self.params["quadrants_overlap"],
+                "seed"              : self.random.seed}
         return params
 
     def send_data(self, data_to_send, compression=None, max_tries=10):
@@ -568,7 +576,7 @@ class NetworkBoard(Board):
         for player in self.players:
             players.append(player.json())
             if not player.human:    #Sends the starting dice value, so the server can finally return the ordering of players
-                self.send_data_async({"start_dice": random.randint(1, 6), "cpu_player": player.uuid, "id":self.uuid})
+                self.send_data_async({"start_dice": self.random.get('dice', 'start', player.order).randint(1, 6), "cpu_player": player.uuid, "id":self.uuid})
         self.send_data_async({"players_data": players})
         chars = []
         for cell in self.cells:
@@ -599,13 +607,32 @@ class NetworkBoard(Board):
             super().mouse_handler(event, mouse_buttons, mouse_movement, mouse_position)
             return
         if self.ready:
+            if event.type == pygame.MOUSEBUTTONDOWN or event.type == pygame.MOUSEBUTTONUP:
+                self.send_mouse_data(force=True)    #The last position goes before the pick up or drop
             super().mouse_handler(event, mouse_buttons, mouse_movement, mouse_position)
             if mouse_movement:
                 if self.drag_char:
                     center = tuple(x/y for x,y in zip(self.drag_char.sprite.rect.center, self.resolution))
-                    self.send_data_async({"move_character":self.drag_char.sprite.uuid, "center": center, "player": self.my_player})
+                    self.pending_mouse = {"move_character":self.drag_char.sprite.uuid, "center": center, "player": self.my_player}
                 else:
-                    self.send_data_async({"mouse_position": self.my_player, "center": mouse_position})
+                    self.pending_mouse = {"mouse_position": self.my_player, "center": mouse_position}
+                self.send_mouse_data()
+
+    def send_mouse_data(self, force=False):
+        """Sends the last mouse position (or dragged character position) to the rest of the clients, no more than
+        NETWORK.MOUSE_SENDS_PER_SECOND times per second. The positions in between are dropped, and the last one is sent
+        in the update pass once the interval has passed.
+        Args:
+            force (boolean, default=False): Sends the pending position right now, whatever the time since the last one."""
+        if self.pending_mouse and (force or time.time()-self.last_mouse_send >= 1/NETWORK.MOUSE_SENDS_PER_SECOND):
+            self.send_data_async(self.pending_mouse)
+            self.pending_mouse = None
+            self.last_mouse_send = time.time()
+
+    def update(self):
+        """Fixed-timestep update pass of the board. Also sends the last mouse position if it was held back."""
+        super().update()
+        self.send_mouse_data()
 
     def pickup_character(self):
         """Picks up a character, and get the possible destinies if it is our turn. More info in this case in superclass method.
@@ -5,9 +5,11 @@ The classes in this module are:
     Movements
     Restriction
     Path
+    OccupancyPath
+    OccupancyMap
 --------------------------------------------"""
 
-__all__ = ['Movements', 'Restriction', 'Path']
+__all__ = ['Movements', 'Restriction', 'Path', 'OccupancyPath', 'OccupancyMap']
 __version__ = '1.0'
 __author__ = 'David Flaity Pardo'
 
@@ -16,7 +18,6 @@ import functools
 import math
 from obj.utilities.logger import Logger as LOG
 from obj.utilities.synch_dict import Dictionary
-from obj.utilities.decorators import time_it
 
 class Movements(object):
     """Movement class. Only contains static methods. Generates, contains and delivers
@@ -51,6 +52,12 @@ class Movements(object):
             paths = Path.all_paths_factory(graph, distances, level_size, restrictions)
             Movements.MOVEMENTS.add_item(hash_key, paths)
 
+    @staticmethod
+    def clear_movements():
+        """Deletes all the saved movements. They are only valid for the map that generated them,
+        so this must be called when the map changes."""
+        Movements.MOVEMENTS.clear()
+
 class Restriction(object):
     """Restriction class. Contains attributes that symbolizes and describe some
     of the restrictions that can exist in a movement. This class is useful for Character,
@@ -312,6 +319,120 @@ class Path(object):
         #LOG.log('DEBUG', "Number of iterations searching paths of distance ",restrictions.dist," -> ",iterations)
         return solutions
 
+class OccupancyPath(Path):
+    """OccupancyPath class. Inherits from Path. Path of an OccupancyMap, that doesn't save the ally, enemy and access flags.
+    Those are derived each time they are read, from the char of its cell and the player that the map is seen by.
+    A flag can still be set (The PathAppraiser simulations and the turncoat mode do it), and it overrides the derived one
+    until the cell changes or the map changes of player. The copies are plain Path objects, with the flags of the moment.
+    Attributes:
+        occupancy (:obj: OccupancyMap): Map that holds this path.
+        overrides (Dict->String:boolean):   Flags that were set from outside. None if there isn't any.
+    """
+    def __init__(self, occupancy, grid_pos, real_index):
+        """OccupancyPath constructor.
+        Args:
+            occupancy (:obj: OccupancyMap): Map that holds this path.
+            grid_pos (:tuple: int, int):    Position of the Cell corresponding to this path. Schema (level, index).
+            real_index (int):   Real position of the corresponding Cell."""
+        self.pos        = grid_pos
+        self.index      = real_index
+        self.occupancy  = occupancy
+        self.overrides  = None
+
+    def get_char(self):
+        """Returns:
+            (:obj: Character):  Char in the cell of this path. None if it's empty."""
+        return self.occupancy.chars.get(self.index)
+
+    def set_flag(self, flag, value):
+        """Overrides a flag until the cell changes or the map changes of player."""
+        if self.overrides is None:
+            self.overrides = {}
+            self.occupancy.overridden.add(self.index)
+        self.overrides[flag] = value
+
+    @property
+    def ally(self):
+        if self.overrides and 'ally' in self.overrides:
+            return self.overrides['ally']
+        char = self.get_char()
+        return char is not None and char.owner_uuid == self.occupancy.player
+
+    @ally.setter
+    def ally(self, ally):
+        self.set_flag('ally', ally)
+
+    @property
+    def enemy(self):
+        if self.overrides and 'enemy' in self.overrides:
+            return self.overrides['enemy']
+        char = self.get_char()
+        return char is not None and char.owner_uuid != self.occupancy.player
+
+    @enemy.setter
+    def enemy(self, enemy):
+        self.set_flag('enemy', enemy)
+
+    @property
+    def access(self):
+        if self.overrides and 'access' in self.overrides:
+            return self.overrides['access']
+        char = self.get_char()
+        return not (self.ally or (self.enemy and char is not None and not char.can_die))
+
+    @access.setter
+    def access(self, access):
+        self.set_flag('access', access)
+
+class OccupancyMap(dict):
+    """OccupancyMap class. Inherits from dict. Current map of the board, with an OccupancyPath for each real index.
+    It only saves the char of each cell and the player that the map is seen by, so changing of player is O(1),
+    and a movement only updates the two cells involved, instead of building a Path for every cell each turn.
+    Attributes:
+        player (int):   Unique identifier of the player that the map is seen by. If None, every char is an enemy.
+        chars (Dict->int:Character):    Char of each occupied cell, by real index.
+        overridden (Set->int):  Indexes of the paths with flags set from outside.
+    """
+    def __init__(self, player=None):
+        """OccupancyMap constructor.
+        Args:
+            player (int, default=None): Unique identifier of the player that the map is seen by."""
+        super().__init__()
+        self.player     = player
+        self.chars      = {}
+        self.overridden = set()
+
+    def add_cell(self, grid_pos, real_index, char=None):
+        """Adds the path of a cell to the map.
+        Args:
+            grid_pos (:tuple: int, int):    Position of the cell. Schema (level, index).
+            real_index (int):   Real index of the cell.
+            char (:obj: Character, default=None):   Char in the cell, if any."""
+        self[real_index] = OccupancyPath(self, grid_pos, real_index)
+        self.set_char(real_index, char)
+
+    def set_char(self, real_index, char=None):
+        """Updates the char of a cell, clearing the flags set from outside in its path.
+        Args:
+            real_index (int):   Real index of the cell.
+            char (:obj: Character, default=None):   Char that is now in the cell. None (or False) if it's empty now."""
+        if char:
+            self.chars[real_index] = char
+        else:
+            self.chars.pop(real_index, None)
+        if real_index in self.overridden:
+            self.overridden.discard(real_index)
+            self[real_index].overrides = None
+
+    def set_player(self, player):
+        """Changes the player that the map is seen by. The flags set from outside are cleared.
+        Args:
+            player (int):   Unique identifier of the player. None to see every char as an enemy."""
+        self.player = player
+        for real_index in self.overridden:
+            self[real_index].overrides = None
+        self.overridden.clear()
+
 class PathAppraiser(object):
     """PathAppraiser class. Holds all the static methods related to path evaluation.
     Used to get the fitness value of each movement."""
@@ -27,6 +27,7 @@ from settings import PATHS, CHARACTERS, EXTENSIONS
 from obj.sprite import Sprite, AnimatedSprite, TextSprite
 from obj.ui_element import InfoBoard
 from obj.paths import Restriction, Movements
+from obj.rules import Rules
 from obj.utilities.exceptions import BadCharacterInitException, StateNotFoundException, SwapFailedException
 from obj.utilities.resizer import Resizer
 from obj.utilities.colors import COLOR_CHOOSER
@@ -379,6 +380,14 @@ class Character(AnimatedSprite):
         """We dont want overlays being drawn like in normal animated sprites  """
         pass   
 
+    def get_overlay_blits(self, position):
+        """We dont want overlays being drawn like in normal animated sprites  """
+        return []
+
+    def animate_overlay(self):
+        """We dont want overlays being drawn like in normal animated sprites. Here animation_frame changes the surface of the character."""
+        pass
+
     def set_size(self, size, update_rects=True):
         """Changes the size of the Sprite. Updates rect and real_rect, and changes image and mask to match the size.
         Args:
@@ -401,6 +410,14 @@ class Character(AnimatedSprite):
         self.kill_sprite.set_position((self.rect.x, self.rect.y-self.kill_sprite.rect.height))
         self.movm_sprite.set_position((self.rect.x+self.kill_sprite.rect.width, self.rect.y-self.movm_sprite.rect.height))
 
+    def get_drawn_rect(self):
+        """Returns:
+            (:obj: pygame.Rect):    Area of the screen that this character covers when drawn, with the info sprites if they are shown."""
+        rect = super().get_drawn_rect()
+        if self.hover:
+            return rect.unionall((self.kill_sprite.rect, self.movm_sprite.rect))
+        return rect
+
     def get_type(self):
         """Returns a string containing the type of the character.
         Method to be overriden."""
@@ -418,6 +435,16 @@ class Character(AnimatedSprite):
             self.kill_sprite.draw(surface, offset=offset)
             self.movm_sprite.draw(surface, offset=offset)
 
+    def get_blits(self, offset=None):
+        """Returns the surfaces that draw this character, with the info sprites if hover is True.
+        Returns:
+            (List->Tuple->pygame.Surface, Tuple->int, int): The (surface, position) pairs."""
+        blits = super().get_blits(offset)
+        if blits and self.hover:
+            blits.extend(self.kill_sprite.get_blits(offset))
+            blits.extend(self.movm_sprite.get_blits(offset))
+        return blits
+
     def set_help_dialog_state(self, state):
         """Shows or hides the hover dialog, depending on the input parameter."""
         if self.hover_dialog:
@@ -448,15 +475,7 @@ class Character(AnimatedSprite):
         Returns:
             (:list: tuple): List with all the possible paths to take if the Character is in the index cell.
                             Each path is composed by all the steps to take (all the cell indexes from start until destiny)."""
-        result = Movements.get_movements(hash(movement_restriction))
-        if not result:
-            self.set_paths(graph, distances, movement_restriction, level_size)
-            result = Movements.get_movements(hash(movement_restriction))
-        paths = []
-        for path in result[index]:
-            if current_map[path[-1]].accessible() and not current_map[path[-1]].has_ally():
-                paths.append(path)
-        return paths
+        return Rules.restricted_paths(graph, distances, current_map, index, level_size, movement_restriction)
     
     def set_cell(self, cell):
         """Sets a cell as this character position."""
@@ -657,7 +676,7 @@ class Warrior(Character):
         DEFAULT_AMMOUNT (int):  Default ammount of this subtype of Character in a player. 
                                 Not used directly, this is for the player to read from an above method.
     """
-    RESTRICTIONS    = Restriction()
+    RESTRICTIONS    = Rules.RESTRICTIONS['warrior']
     DEFAULT_PATH    = PATHS.WARRIOR
     DEFAULT_AMMOUNT = 4
 
@@ -708,7 +727,7 @@ class Wizard(Character):
         DEFAULT_AMMOUNT (int):  Default ammount of this subtype of Character in a player. 
                                 Not used directly, this is for the player to read from an above method.
     """
-    RESTRICTIONS    = Restriction(max_dist=3)
+    RESTRICTIONS    = Rules.RESTRICTIONS['wizard']
     DEFAULT_PATH    = PATHS.WIZARD
     DEFAULT_AMMOUNT = 2
 
@@ -762,7 +781,7 @@ class Priestess(Character):
         DEFAULT_AMMOUNT (int):  Default ammount of this subtype of Character in a player. 
                                 Not used directly, this is for the player to read from an above method.
     """
-    RESTRICTIONS    = Restriction(max_dist=0, move_along_lvl=True, move_along_index=True)
+    RESTRICTIONS    = Rules.RESTRICTIONS['priestess']
     DEFAULT_PATH    = PATHS.PRIESTESS
     DEFAULT_AMMOUNT = 2
 
@@ -796,12 +815,7 @@ class Priestess(Character):
             (:list: tuple): List with all the possible paths to take if Priestess is in the index cell.
                             Each path is composed by all the steps to take (all the cell indexes from start until destiny).
         """
-        unfiltered_paths = super().get_paths(graph, distances, current_map, index, level_size, Priestess.RESTRICTIONS)
-        results = []
-        for path in unfiltered_paths:
-            if not any(current_map[path[i]].has_ally() or current_map[path[i]].has_enemy() for i in range(1, len(path)-1)):
-                results.append(path)
-        return results
+        return Rules.priestess_paths(graph, distances, current_map, index, level_size)
 
     def get_type(self):
         """Returns a string containing the type of the character."""
@@ -823,8 +837,8 @@ class Pawn(Character):
         DEFAULT_AMMOUNT (int):  Default ammount of this subtype of Character in a player. 
                                 Not used directly, this is for the player to read from an above method.
     """
-    RESTRICTIONS    = Restriction()
-    CHECK_ENEMIES   = Restriction(max_dist=0, move_along_lvl=True, move_along_index=True)
+    RESTRICTIONS    = Rules.RESTRICTIONS['pawn']
+    CHECK_ENEMIES   = Rules.CHECK_ENEMIES
     DEFAULT_PATH    = PATHS.PAWN
     DEFAULT_AMMOUNT = 8
 
@@ -857,36 +871,11 @@ class Pawn(Character):
             (:list: tuple): List with all the possible paths to take if Pawn is in the index cell.
                             Each path is composed by all the steps to take (all the cell indexes from start until destiny).
         """
-        unfiltered_paths = super().get_paths(graph, distances, current_map, index, level_size, Pawn.CHECK_ENEMIES)
-        results = []
-        enemies = {}
-        for path in unfiltered_paths:
-            enemies.update(self.get_enemies_distances(current_map, path))
-        #Now, we compare the enemies distance to those that we would have in the 2-4 possible positions
-        destinies = super().get_paths(graph, distances, current_map, index, level_size, Pawn.RESTRICTIONS)
-        if len(enemies) == 0:   #If no enemies detected, every path is possible
-            return destinies
-        #If enemies detected
-        for new_path in destinies:  #For each destiny possible for the pawn
-            if new_path[-1] in enemies.keys():  #If the enemy is in the immediate cell
-                results.append(new_path)
-                continue
-            unfiltered_new_paths = super().get_paths(graph, distances, current_map, new_path[-1], level_size, Pawn.CHECK_ENEMIES)   #We get the unfiltered paths that may end in enemies
-            for path in unfiltered_new_paths:   #For each one of those
-                if path[-1] in enemies.keys():  #We check if ends in an enemy of the old position, then we compare distances
-                    if (len(path)-1) < enemies[path[-1]]:
-                        results.append(new_path)
-                        break
-        return results
+        return Rules.pawn_paths(graph, distances, current_map, index, level_size)
 
     def get_enemies_distances(self, current_map, path):
         """Returns the enemies distances in a current map. Useful to check if a movement decreases any of those distances to an enemy."""
-        #If the destiny has an enemy and there is no ally in the middle. Those don't need to be checked again
-        enemies = {}
-        if current_map[path[-1]].has_enemy(): #Checking if in the end of this path tehre is an enemy
-            if not any(current_map[path[i]].has_ally() or current_map[path[i]].has_enemy() for i in range(1, len(path)-1)): #Checking if in the middle steps there is an ally
-                enemies[path[-1]] = len(path)-1
-        return enemies
+        return Rules.get_enemies_distances(current_map, path)
 
     def get_type(self):
         """Returns a string containing the type of the character."""
@@ -906,7 +895,7 @@ class MatronMother(Character):
         DEFAULT_AMMOUNT (int):  Default ammount of this subtype of Character in a player. 
                                 Not used directly, this is for the player to read from an above method.
     """
-    RESTRICTIONS    = Restriction()
+    RESTRICTIONS    = Rules.RESTRICTIONS['matron_mother']
     DEFAULT_PATH    = PATHS.MATRONMOTHER
     DEFAULT_AMMOUNT = 1
 
@@ -998,14 +987,7 @@ class HolyChampion(Character):
             (:list: tuple): List with all the possible paths to take if MatronMoter is in the index cell.
                             Each path is composed by all the steps to take (all the cell indexes from start until destiny).
         """
-        results = []
-        results.extend(super().get_paths(graph, distances, current_map, index, level_size, Wizard.RESTRICTIONS))
-        priestess_paths = super().get_paths(graph, distances, current_map, index, level_size, Priestess.RESTRICTIONS)
-        for path in priestess_paths:
-            if not any(current_map[path[i]].has_ally() or current_map[path[i]].has_enemy() for i in range(1, len(path)-1))\
-            and path not in results:
-                results.append(path)
-        return results
+        return Rules.holy_champion_paths(graph, distances, current_map, index, level_size)
 
     def get_type(self):
         """Returns a string containing the type of the character."""
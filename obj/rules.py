@@ -0,0 +1,847 @@
+"""--------------------------------------------
+rules module. Contains the game rules of the board, free of any pygame sprite,
+surface or thread pool. This way the same rules that the graphic Board uses can be
+run headless (Simulations, servers, balancing...).
+Have the following classes:
+    Topology
+    Rules
+    Piece
+    RandomStreams
+    GameState
+--------------------------------------------"""
+
+__all__ = ['Topology', 'Rules', 'Piece', 'RandomStreams', 'GameState']
+__version__ = '1.0'
+__author__ = 'David Flaity Pardo'
+
+#Python libraries
+import math
+import uuid
+import numpy
+import random
+#Selfmade libraries
+from obj.paths import Movements, Restriction, Path
+from obj.utilities.exceptions import TooManyCharactersException
+from obj.utilities.logger import Logger as LOG
+
+class Topology(object):
+    """Topology class. Holds the shape of a board: which cells exist, how they are connected (enabled paths graph)
+    and the distances between them, without drawing anything.
+    The board consists of levels (circumferences) of circles_per_lvl cells, connected between them by inter_paths
+    each inter_path_frequency cells. The first level has only 4 cells. An optional center cell connects with those 4.
+    Attributes:
+        level_size (int):   Number of cells in each circumference (Except the first one, that have 4).
+        levels (int):   Number of circumferences of the board.
+        center_cell (boolean):  True if the board has a center cell.
+        inter_path_frequency (int): Each how many cells there is an inter_path connecting the circumferences.
+        size (int): Total number of indexes of the matrixes.
+        graph (:obj: numpy.Matrix:boolean): Graph with all the directly connected cells (distance=1).
+        distances (:obj: numpy.Matrix:int): Graph of distances between cells connected (without changing direction).
+    """
+    INTERIOR_LIMIT = 4  #Number of cells in the first level
+
+    def __init__(self, circles_per_lvl=16, max_levels=4, center_cell=False, inter_path_frequency=2):
+        """Topology constructor. Doesn't fill the matrixes, generate does.
+        Args:
+            circles_per_lvl (int, default=16):  Number of cells in each circumference.
+            max_levels (int, default=4):    Number of circumferences.
+            center_cell (boolean, default=False):   True to add a center cell, connected to the first level.
+            inter_path_frequency (int, default=2):  Each how many cells there is an inter_path."""
+        self.level_size = circles_per_lvl
+        self.levels     = max_levels
+        self.center_cell= center_cell
+        self.inter_path_frequency = inter_path_frequency
+        self.size       = circles_per_lvl*max_levels + (1 if center_cell else 0)
+        self.distances  = numpy.full((self.size, self.size), -888, dtype=int)   #Says the distance between cells
+        self.graph      = numpy.zeros((self.size, self.size), dtype=bool)       #Shows if the path exist
+
+    def generate(self):
+        """Fills the essential graphs of the current topology.
+        One graph of booleans for directly connected cells.
+        One graph of ints for connected cells (Without change of direction).
+        Returns:
+            (:obj: Topology):   Itself, so it can be chained after the constructor."""
+        Movements.clear_movements() #The saved movements belong to the last map generated
+        self.map_enabled_paths()
+        self.map_distances()
+        if self.center_cell:
+            self.map_center_cell()
+        return self
+
+    def map_enabled_paths(self):
+        """Fills the graph of directly connected cells.
+        The code is a bit different for the inside level, since it doesn't have
+        then same number of cells as the outside levels (circumferences)."""
+        lvls, circles = self.levels, self.level_size
+        interior_limit = Topology.INTERIOR_LIMIT
+        for x in range(0, circles*lvls):
+            self.graph[x][x] = True
+            #Center
+            if x < interior_limit:
+                if x == interior_limit-1:           #Have to connect w/ the other end of the circle
+                    self.graph[0][interior_limit-1], self.graph[interior_limit-1][0] = True, True
+                    continue    #next iteration
+            #Those dont exist at all
+            elif interior_limit <= x < circles:     #Those dont exist (4 -> circles-1)
+                self.graph[x][x] = False
+                continue        #next iteration
+            #If first circle, check interpaths to get that done
+            elif circles <= x < circles*2:
+                interpath_exists = self.get_inside_cell(x) #Check if interpath in this circle
+                if interpath_exists is not None:
+                    self.graph[x][interpath_exists], self.graph[interpath_exists][x] = True, True
+                    for y in range(x, (lvls-1)*circles, circles):   #From interior -> exterior
+                        self.graph[y][y+circles], self.graph[y+circles][y] = True, True
+            #No more special conditions, normal cells
+            if (x+1)%circles == 0:                  #last circle of this lvl, connect with first one:
+                self.graph[x][(x-circles)+1], self.graph[(x-circles)+1][x] = True, True
+            else:                                   #Connect with next circle
+                self.graph[x][x+1], self.graph[x+1][x] = True, True
+
+    def map_distances(self):
+        """Fills the graph of connected cells. Does this by checking (every cell vs every other cell)
+        if they are in the same inter-circumference path or the same circumference.
+        In that case, writes the distance between both."""
+        lvls, circles = self.levels, self.level_size
+        #First level
+        interior_limit = Topology.INTERIOR_LIMIT
+        for x in range(0, interior_limit):
+            for y in range(x, interior_limit):
+                self.distances[x][y], self.distances[y][x] = abs(x-y), abs(x-y)
+        #Exterior levels
+        for x in range(circles, lvls*circles):
+            for y in range(x, lvls*circles):
+                if x//circles == y//circles: #If they are in teh same level
+                    self.distances[x][y], self.distances[y][x] = abs(x-y), abs(x-y)
+        #Distances first complete circle among interpaths
+        for x in range(circles, circles*2):
+            interpath_exists = self.get_inside_cell(x) #Check if interpath in this circle
+            if interpath_exists is not None:
+                for y in range(x, lvls*circles, circles):
+                    self.distances[interpath_exists][y], self.distances[y][interpath_exists] = abs(y-interpath_exists)//circles, abs(y-interpath_exists)//circles
+                for y in range(x, lvls*circles, circles):   #From interior -> exterior
+                    for z in range(y, lvls*circles, circles):
+                        self.distances[y][z], self.distances[z][y] = abs(y-z)//circles, abs(y-z)//circles
+        self.parse_two_way_distances()
+
+    def parse_two_way_distances(self):
+        """Since our circumferencial path has a circular shape, to go from one cell to another,
+        we can go by two ways. This means that the maximum distance is half the distance of a circumference.
+        This methos parses those distances that need it, since they were generated without taking into account
+        this detail."""
+        lvls, circles = self.levels, self.level_size
+        interior_limit = Topology.INTERIOR_LIMIT
+        limit = interior_limit//2
+        #Interior circle
+        for x in range(0, interior_limit):
+            for y in range(0, interior_limit):
+                if self.distances[x][y] > limit:
+                    dist = abs(self.distances[x][y]-limit)
+                    self.distances[x][y], self.distances[y][x] = dist, dist
+        #Complete circles
+        limit = circles//2
+        for x in range(circles, lvls*circles):
+            for y in range(circles, lvls*circles):
+                if self.distances[x][y] > limit:
+                    dist = abs(circles-self.distances[x][y])
+                    self.distances[x][y],self.distances[y][x] = dist, dist
+
+    def map_center_cell(self):
+        """Connects the center cell with the 4 cells of the first level."""
+        index = self.get_center_index()
+        for i in range(0, Topology.INTERIOR_LIMIT):
+            self.graph[i][index], self.graph[index][i] = True, True
+            self.distances[i][index], self.distances[index][i] = 1, 1
+
+    def get_inside_cell(self, index):
+        """Returns:
+            (int): The correspondant cell index of the inside circumference for an index of the outside levels.
+                    None if there is no inter_path in that index."""
+        ratio = self.level_size//Topology.INTERIOR_LIMIT
+        return (index%self.level_size)//ratio if (index+1)%self.inter_path_frequency == 0 else None
+
+    def get_quadrant(self, cell_index):
+        """Gets the respective quadrant of the cell index received.
+        Returns:
+            (tuple: int):   Numerical id of the appropiate quadrant.
+                            Can be one or two quadrants if the cell is a border."""
+        ratio = self.level_size//4
+        result, rest = (cell_index+ratio//2)//ratio,  (cell_index+ratio//2)%ratio
+        if result >= 4:                 #We gone beyond the last quadrant boi, circular shape ftw
+            if rest == 0:   return 3, 0 #Last and first quadrant, it's that shared cell
+            else:           return 0,   #Associated with first quadrant
+        if rest == 0 and result != 0: return result, result-1
+        return result,
+
+    def get_center_index(self):
+        """Returns:
+            (int):  Real index of the center cell. None if this topology doesn't have one."""
+        return self.level_size*self.levels if self.center_cell else None
+
+    def get_indexes(self):
+        """Returns:
+            (List->int):    Real indexes of all the cells that exist in this topology."""
+        indexes = list(range(0, Topology.INTERIOR_LIMIT))
+        indexes.extend(range(self.level_size, self.level_size*self.levels))
+        if self.center_cell:
+            indexes.append(self.get_center_index())
+        return indexes
+
+    def get_position(self, index):
+        """Args:
+            index (int):    Real index of a cell.
+        Returns:
+            (Tuple->int, int):  Position of the cell with the schema (level, index), the same as Cell.pos."""
+        if self.center_cell and index == self.get_center_index():
+            return (self.levels-1, self.level_size)
+        return (index//self.level_size, index%self.level_size)
+
+    def get_quadrants(self, overlap=True):
+        """Sorts the cells of the outside levels in the 4 quadrants.
+        Args:
+            overlap (boolean, default=True):    If False, the cells that belong to two quadrants are deleted from both.
+        Returns:
+            (Dict->int:List->int):  Real indexes of the cells of each quadrant."""
+        quadrants = {}
+        for index in range(self.level_size, self.level_size*self.levels):
+            for quadrant in self.get_quadrant(index%self.level_size):
+                try:                quadrants[quadrant].append(index)
+                except KeyError:    quadrants[quadrant] = [index]
+        if not overlap:
+            shared = set(index for index in quadrants[0] if any(index in quadrants[i] for i in range(1, 4)))
+            shared.update(index for i in range(1, 4) for index in quadrants[i]\
+                        if any(index in quadrants[j] for j in range(0, 4) if j != i))
+            quadrants = {key: [index for index in cells if index not in shared] for key, cells in quadrants.items()}
+        return quadrants
+
+    def classify_quadrant(self, *indexes):
+        """Separates the cells of a quadrant in levels of border and center, the same way that Quadrant does with the Cell sprites.
+        The cells in the last line of the quadrant are borders, the rest are center. Each inner line increases the levels.
+        Args:
+            *indexes (int): Real indexes of the cells of the quadrant. Separated by commas.
+        Returns:
+            (Dict->int:List->int):  For each real index, a list with its border level and its center level."""
+        levels = {index: [0, 0] for index in indexes}
+        offset = self.level_size//8
+        cells = list(indexes)
+        while cells:
+            for index in cells:
+                levels[index][0] += 1
+            shifted = tuple((index%self.level_size+offset)%self.level_size for index in cells)
+            if any(shift == self.level_size-1 for shift in shifted):    #Last quadrant, the one which connects to the start again
+                shifted = tuple(self.level_size if shift == 0 else shift for shift in shifted)
+            index_interval = (min(shifted), max(shifted))
+            min_lvl = min(index//self.level_size for index in cells)
+            cells = [index for index in cells if index//self.level_size > min_lvl\
+                    and index_interval[0] < (index%self.level_size+offset)%self.level_size < index_interval[1]]
+            for index in cells:
+                levels[index][1] += 1
+        return levels
+
+class Rules(object):
+    """Rules class. Only contains static methods and constants. Holds the rules of the game that
+    don't depend on how they are drawn: the movements of each type of character, the promotions and the dice.
+    Both the Character sprites and the headless Piece use them, so the rules are the same everywhere.
+    General class attributes:
+        RESTRICTIONS (Dict->str:Restriction):   Movement restriction of each type of character.
+        CHECK_ENEMIES (:obj: Restriction):  Restriction that pawns use to check for enemies in the same circumference or interpath.
+        GOLD_VALUE (int):   Value of the dice that activates the turncoat mode.
+        MAX_DICE_VALUE (int):   Maximum value of the dice.
+        CENTER_OWNER (int): Owner of the center cell. It doesn't belong to any player, so anyone can get promoted there.
+    """
+    RESTRICTIONS    = {'warrior'        : Restriction(),
+                        'wizard'        : Restriction(max_dist=3),
+                        'priestess'     : Restriction(max_dist=0, move_along_lvl=True, move_along_index=True),
+                        'pawn'          : Restriction(),
+                        'matron_mother' : Restriction()}
+    CHECK_ENEMIES   = Restriction(max_dist=0, move_along_lvl=True, move_along_index=True)
+    GOLD_VALUE      = 6
+    MAX_DICE_VALUE  = 6
+    CENTER_OWNER    = 11110000
+
+    @staticmethod
+    def restricted_paths(graph, distances, current_map, index, level_size, movement_restriction):
+        """Gets all the possible paths from a cell with a movement restriction. The paths are generated once and saved in a LUT table.
+        Args:
+            graph (:obj: numpy.Matrix:boolean): Graph with all the directly connected cells (distance=1).
+            distances (:obj: numpy:int):   Graph of distances between cells connected (without changing direction of the path between them).
+            current_map (:dict: int, Path): Current situation of the map, with all the enemies and allies.
+            index (int):    Current cell, we don't want to return the entire destinies for each cell.
+            level_size (int):   Number of cells per circumference. This is only used if its necessary to set the paths.
+            movement_restriction (:obj: Restriction):   The movement restriction to which to get the possible destinies.
+        Returns:
+            (:list: tuple): List with all the possible paths to take from the index cell.
+                            Each path is composed by all the steps to take (all the cell indexes from start until destiny)."""
+        result = Movements.get_movements(hash(movement_restriction))
+        if not result:
+            Movements.set_movements(graph, distances, level_size, movement_restriction)
+            result = Movements.get_movements(hash(movement_restriction))
+        paths = []
+        for path in result[index]:
+            if current_map[path[-1]].accessible() and not current_map[path[-1]].has_ally():
+                paths.append(path)
+        return paths
+
+    @staticmethod
+    def unobstructed(paths, current_map):
+        """Returns:
+            (:list: tuple): The input paths that don't have any character in the middle steps."""
+        return [path for path in paths if not any(current_map[path[i]].has_ally() or current_map[path[i]].has_enemy() for i in range(1, len(path)-1))]
+
+    @staticmethod
+    def get_paths(char_type, graph, distances, current_map, index, level_size):
+        """Gets all the possible paths from a cell for a type of character.
+        Args:
+            char_type (str):    Type of the character, the same string that get_type returns.
+            graph (:obj: numpy.Matrix:boolean): Graph with all the directly connected cells (distance=1).
+            distances (:obj: numpy:int):   Graph of distances between cells connected (without changing direction of the path between them).
+            current_map (:dict: int, Path): Current situation of the map, with all the enemies and allies.
+            index (int):    Current cell of the character.
+            level_size (int):   Number of cells per circumference.
+        Returns:
+            (:list: tuple): List with all the possible paths to take if the character is in the index cell."""
+        if 'priestess' in char_type:
+            return Rules.priestess_paths(graph, distances, current_map, index, level_size)
+        if 'pawn' in char_type:
+            return Rules.pawn_paths(graph, distances, current_map, index, level_size)
+        if 'champion' in char_type:
+            return Rules.holy_champion_paths(graph, distances, current_map, index, level_size)
+        return Rules.restricted_paths(graph, distances, current_map, index, level_size, Rules.RESTRICTIONS[char_type])
+
+    @staticmethod
+    def priestess_paths(graph, distances, current_map, index, level_size):
+        """Paths of a priestess. Along a circumference or inter-path, without characters in the middle."""
+        unfiltered_paths = Rules.restricted_paths(graph, distances, current_map, index, level_size, Rules.RESTRICTIONS['priestess'])
+        return Rules.unobstructed(unfiltered_paths, current_map)
+
+    @staticmethod
+    def pawn_paths(graph, distances, current_map, index, level_size):
+        """Paths of a pawn. Distance of 1, and if there are enemies in sight (same circumference or inter-path without characters in the middle),
+        the movement has to bring him closer to any of them."""
+        unfiltered_paths = Rules.restricted_paths(graph, distances, current_map, index, level_size, Rules.CHECK_ENEMIES)
+        results = []
+        enemies = {}
+        for path in unfiltered_paths:
+            enemies.update(Rules.get_enemies_distances(current_map, path))
+        #Now, we compare the enemies distance to those that we would have in the 2-4 possible positions
+        destinies = Rules.restricted_paths(graph, distances, current_map, index, level_size, Rules.RESTRICTIONS['pawn'])
+        if len(enemies) == 0:   #If no enemies detected, every path is possible
+            return destinies
+        #If enemies detected
+        for new_path in destinies:  #For each destiny possible for the pawn
+            if new_path[-1] in enemies.keys():  #If the enemy is in the immediate cell
+                results.append(new_path)
+                continue
+            unfiltered_new_paths = Rules.restricted_paths(graph, distances, current_map, new_path[-1], level_size, Rules.CHECK_ENEMIES)   #We get the unfiltered paths that may end in enemies
+            for path in unfiltered_new_paths:   #For each one of those
+                if path[-1] in enemies.keys():  #We check if ends in an enemy of the old position, then we compare distances
+                    if (len(path)-1) < enemies[path[-1]]:
+                        results.append(new_path)
+                        break
+        return results
+
+    @staticmethod
+    def get_enemies_distances(current_map, path):
+        """Returns the enemies distances in a current map. Useful to check if a movement decreases any of those distances to an enemy."""
+        #If the destiny has an enemy and there is no ally in the middle. Those don't need to be checked again
+        enemies = {}
+        if current_map[path[-1]].has_enemy(): #Checking if in the end of this path tehre is an enemy
+            if not any(current_map[path[i]].has_ally() or current_map[path[i]].has_enemy() for i in range(1, len(path)-1)): #Checking if in the middle steps there is an ally
+                enemies[path[-1]] = len(path)-1
+        return enemies
+
+    @staticmethod
+    def holy_champion_paths(graph, distances, current_map, index, level_size):
+        """Paths of a holy champion. The ones of a wizard plus the ones of a priestess."""
+        results = []
+        results.extend(Rules.restricted_paths(graph, distances, current_map, index, level_size, Rules.RESTRICTIONS['wizard']))
+        for path in Rules.priestess_paths(graph, distances, current_map, index, level_size):
+            if path not in results:
+                results.append(path)
+        return results
+
+    @staticmethod
+    def triggers_promotion(promotion, owner, char):
+        """Checks if a character that arrives to a cell triggers a promotion.
+        Args:
+            promotion (boolean):    True if the cell is a promotion cell.
+            owner (int):    uuid of the player that owns the cell. None if nobody.
+            char (:obj: Character|Piece):   Character that arrives to the cell.
+        Returns:
+            (boolean):  True if the character is in an enemy (or neutral) promotion cell."""
+        return bool(promotion) and (None != owner != char.owner_uuid)
+
+    @staticmethod
+    def upgrade_champion(char):
+        """Makes a holy champion evolve. It is capable of capturing and be killed after this, and his value increases too.
+        Args:
+            char (:obj: Character|Piece):   Character to make changes to."""
+        char.can_kill = True
+        char.can_die = True
+        char.value *= 3
+
+    @staticmethod
+    def promotion_choices(fallen):
+        """Returns:
+            (List->Character|Piece):    The fallen characters that an upgradable one can be exchanged for."""
+        return [char for char in fallen if not char.upgradable]
+
+    @staticmethod
+    def dice_value(turns, throws, rng=random):
+        """Returns a random dice value. The chances of the gold value vary with the statistics of the player.
+        Args:
+            turns (int):    Turns that have been played in total.
+            throws (int):   Throws of the current player.
+            rng (:obj: random.Random, default=random):  Source of the random numbers.
+        Returns:
+            (int):  Value between 1 and MAX_DICE_VALUE."""
+        weights = [1 for _ in range(1, Rules.MAX_DICE_VALUE+1)]
+        x = math.log10(max(turns, 1)/(throws*3))
+        weights[-1] += math.tanh(x)
+        weights[-1] = max(0.3, weights[-1])
+        return rng.choices(range(1, Rules.MAX_DICE_VALUE+1), weights)[0]
+
+class Piece(object):
+    """Piece class. Headless version of a Character. Holds the same attributes that the rules and the AI need,
+    and uses the same movements rules, but has no sprites.
+    General class attributes:
+        TYPES (Dict->str:Dict): Attributes of each type of piece that differ from the default ones.
+        DEFAULT_AMMOUNTS (Dict->str:int):   Default ammount of each type of piece of a player (Same as the CHARACTERS settings).
+    Attributes:
+        uuid (int): Unique identifier of the piece.
+        owner_uuid (int):   uuid of the player that owns the piece.
+        type (str): Type of the piece, as Character.get_type returns.
+    """
+    TYPES = {'warrior'      : {'turns': 2, 'rank': 1, 'order': 1, 'value': 3},
+            'wizard'        : {'rank': 1, 'order': 2, 'value': 8},
+            'priestess'     : {'rank': 1, 'order': 3, 'value': 5},
+            'pawn'          : {'upgradable': True},
+            'matron_mother' : {'essential': True, 'rank': 2, 'order': 5, 'value': 50},
+            'holy_champion' : {'essential': True, 'rank': 2, 'order': 4, 'can_kill': False, 'can_die': False, 'value': 4}}
+    DEFAULT_AMMOUNTS = {'pawn': 8, 'warrior': 2, 'wizard': 2, 'priestess': 2, 'matron_mother': 1, 'holy_champion': 0}
+
+    def __init__(self, owner_uuid, char_type, obj_uuid=None, **attributes):
+        """Piece constructor.
+        Args:
+            owner_uuid (int):   uuid of the player that owns the piece.
+            char_type (str):    Type of the piece. One of the keys of TYPES.
+            obj_uuid (int, default=None):   Unique identifier. If it's not supplied, it will be generated.
+            **attributes (:dict:):  Attributes to overwrite after setting the ones of the type."""
+        self.uuid       = obj_uuid if obj_uuid else uuid.uuid1().int
+        self.owner_uuid = owner_uuid
+        self.type       = char_type
+        self.essential  = False
+        self.can_kill   = True
+        self.can_die    = True
+        self.turns      = 1
+        self.rank       = 0
+        self.order      = 0
+        self.upgradable = False
+        self.value      = 1
+        self.current_pos= 0
+        self.kills      = 0
+        self.movements  = 0
+        for key, value in Piece.TYPES[char_type].items():
+            setattr(self, key, value)
+        for key, value in attributes.items():
+            setattr(self, key, value)
+
+    @staticmethod
+    def from_character(char):
+        """Creates a piece with the current attributes of a Character.
+        Args:
+            char (:obj: Character): Character to copy.
+        Returns:
+            (:obj: Piece):  The headless copy."""
+        return Piece(char.owner_uuid, char.get_type(), obj_uuid=char.uuid, essential=char.essential, can_kill=char.can_kill,\
+                    can_die=char.can_die, turns=char.turns, rank=char.rank, order=char.order, upgradable=char.upgradable,\
+                    value=char.value, current_pos=char.current_pos, kills=char.kills, movements=char.movements)
+
+    def get_type(self):
+        """Returns a string containing the type of the piece."""
+        return self.type
+
+    def get_master(self):
+        """Returns:
+            (int):  uuid of the owner player of this piece."""
+        return self.owner_uuid
+
+    def get_paths(self, graph, distances, current_map, index, level_size):
+        """Gets all the possible paths from the index cell, with the same rules than the Character of this type.
+        Args:
+            graph (:obj: numpy.Matrix:boolean): Graph with all the directly connected cells (distance=1).
+            distances (:obj: numpy:int):   Graph of distances between cells connected (without changing direction of the path between them).
+            current_map (:dict: int, Path): Current situation of the map, with all the enemies and allies.
+            index (int):    Current cell of the piece.
+            level_size (int):   Number of cells per circumference.
+        Returns:
+            (:list: tuple): List with all the possible paths to take."""
+        return Rules.get_paths(self.type, graph, distances, current_map, index, level_size)
+
+    def copy(self):
+        """Returns a copy of this instance, with the same uuid."""
+        return Piece(self.owner_uuid, self.type, obj_uuid=self.uuid, **{key: value for key, value in self.__dict__.items()\
+                                                                        if key not in ('uuid', 'owner_uuid', 'type')})
+
+    def __str__(self):
+        return self.type+' piece of the player '+str(self.owner_uuid)+' in the cell '+str(self.current_pos)
+
+class RandomStreams(object):
+    """RandomStreams class. Seeded source of all the random numbers of a game, so the same seed replays the same game.
+    Each use has its own independent stream (Board filling, dice, searchs of each player...), derived from the seed
+    and the name of the stream. This way, searching more or less (Or in parallel) doesn't change the sequence of the dice.
+    General class attributes:
+        SEED_BITS (int):    Bits of the seeds generated when none is supplied.
+    Attributes:
+        seed (int): Seed of the game. Logged when created, to be able to replay it.
+        streams (Dict->String:random.Random):   Streams already created, by name.
+    """
+    SEED_BITS = 32
+    def __init__(self, seed=None):
+        """RandomStreams constructor.
+        Args:
+            seed (int, default=None):   Seed of the game. If None, a random one is generated."""
+        self.seed = seed if seed is not None else random.SystemRandom().getrandbits(RandomStreams.SEED_BITS)
+        self.streams = {}
+        LOG.log('info', 'The random seed of this game is ', self.seed)
+
+    def get(self, name, *ids):
+        """Returns the stream with the input name, creating it if it doesn't exist.
+        Args:
+            name (String):  Name of the stream ('board', 'dice', 'search', 'promotion'...).
+            *ids (Any): Identifiers that make the stream unique among the ones with the same name (Order of the player...).
+        Returns:
+            (:obj: random.Random):  The stream. Always the same sequence for the same seed, name and ids."""
+        key = ':'.join(str(element) for element in (name,)+ids)
+        if key not in self.streams:
+            self.streams[key] = random.Random(str(self.seed)+':'+key)   #Seeding with a string is deterministic between executions
+        return self.streams[key]
+
+    def json(self):
+        """Returns:
+            (Dict->String:int): The seed, to send it through the network or save it along with the game."""
+        return {'seed': self.seed}
+
+class GameState(object):
+    """GameState class. The state of a game without any graphic: the pieces on each cell, the turn, the fallen pieces,
+    the promotions and the turncoat mode. Generates and applies the movements with the same rules that the Board uses.
+    Attributes:
+        topology (:obj: Topology):  Shape of the board.
+        players (List->int):    uuids of the players, in order of turn.
+        pieces (Dict->int:Piece):   Pieces on the board. Key is the real index of the cell.
+        promotion_cells (Dict->int:int):    Promotion cells, and the uuid of the player that owns each one (None if nobody).
+        fallen (Dict->int:List->Piece): Captured pieces of each player.
+        dead (List->int):   uuids of the players that have lost.
+        player_index (int): Index of the current player in players.
+        turn (int): Board turn. Increases each time that all the players have played.
+        char_turns (int):   Movements done with the same character in this player turn (Warriors move twice).
+        last_movement (Tuple->int, int):    Last movement done (source, destiny).
+        turncoat (boolean): True if the current player can move any character that is not a matron mother.
+        locked_cells (List->int):   Cells whose characters can't be moved this turn.
+        pending_promotion (int):    Cell of an upgradable piece that is waiting to be exchanged for a fallen one. None otherwise.
+        winner (int):   uuid of the winner. None while the game goes on.
+    """
+    def __init__(self, topology, players, pieces=None, promotion_cells=None, rng=None):
+        """GameState constructor.
+        Args:
+            topology (:obj: Topology):  Shape of the board, already generated.
+            players (List->int):    uuids of the players, in order of turn.
+            pieces (Dict->int:Piece, default=None): Pieces on the board. Key is the real index of the cell.
+            promotion_cells (Dict->int:int, default=None):  Promotion cells and their owners.
+            rng (:obj: random.Random, default=None):    Source of the random numbers. The random module if None."""
+        self.topology       = topology
+        self.players        = list(players)
+        self.pieces         = dict(pieces) if pieces else {}
+        self.promotion_cells= dict(promotion_cells) if promotion_cells else {}
+        self.fallen         = {player: [] for player in self.players}
+        self.dead           = []
+        self.player_index   = 0
+        self.turn           = 0
+        self.player_turns   = 1
+        self.throws         = {player: 1 for player in self.players}
+        self.char_turns     = 0
+        self.last_movement  = None
+        self.turncoat       = False
+        self.locked_cells   = []
+        self.pending_promotion = None
+        self.winner         = None
+        self.rng            = rng if rng else random
+        for index, piece in self.pieces.items():
+            piece.current_pos = index
+
+    @staticmethod
+    def new_game(topology, players, random_filling=False, quadrants_overlap=None, rng=None, seats=None, streams=None, **piece_ammounts):
+        """Creates a game in its starting position. Each player drops his pieces in his quadrant, the ones with the highest rank
+        in the inner cells, the same way that the Board does it (Character.factory and Quadrant.get_cell).
+        Args:
+            topology (:obj: Topology):  Shape of the board, already generated.
+            players (List->int):    uuids of the players, in order of turn.
+            random_filling (boolean, default=False):    True to choose random cells among the suitable ones.
+            quadrants_overlap (boolean, default=None):  False to not use the cells shared between quadrants.
+                                                        If None, the same as the BoardGenerator: only with 2 players or less.
+            rng (:obj: random.Random, default=None):    Source of the random numbers. The random module if None.
+            seats (List->int, default=None):    Quadrant of each player. If None, the index of each one.
+            streams (:obj: RandomStreams, default=None):    If supplied, the filling uses the 'board' stream of each seat, like the Board,
+                                                            and the dice its 'dice' one, instead of rng.
+            **piece_ammounts (:dict:):  Ammount of each type of piece. The missing ones use Piece.DEFAULT_AMMOUNTS.
+        Returns:
+            (:obj: GameState):  The starting state.
+        Raises:
+            TooManyCharactersException: If the pieces of a player don't fit in his quadrant."""
+        rng = rng if rng else random
+        ammounts = Piece.DEFAULT_AMMOUNTS.copy()
+        ammounts.update(piece_ammounts)
+        quadrants_overlap = len(players) <= 2 if quadrants_overlap is None else quadrants_overlap
+        state = GameState(topology, players, rng=streams.get('dice') if streams else rng)
+        all_quadrants = topology.get_quadrants()
+        quadrants = topology.get_quadrants(overlap=quadrants_overlap)
+        seats = seats if seats else range(0, len(players))
+        for order, player in zip(seats, players):
+            levels = topology.classify_quadrant(*all_quadrants[order%4])    #The Quadrant classifies its cells before deleting the shared ones
+            cells = [index for index in quadrants[order%4] if index not in state.pieces]
+            pieces = [Piece(player, char_type) for char_type, ammount in ammounts.items() for _ in range(0, ammount)]
+            if len(pieces) > len(cells):
+                raise TooManyCharactersException('There are too many characters in player for a quadrant.')
+            pieces.sort(key=lambda piece: (piece.rank, piece.order), reverse=True)
+            current_level = max(level[0] for level in levels.values())
+            rank = pieces[0].rank if pieces else 0
+            player_rng = streams.get('board', order) if streams else rng
+            for piece in pieces:
+                if piece.rank < rank:
+                    current_level -= 1
+                    rank = piece.rank
+                index = GameState.choose_cell(topology, cells, levels, current_level, player_rng if random_filling else None)
+                cells.remove(index)
+                state.add_piece(index, piece)
+                if levels[index][1] > 0:    #Center of the quadrant, promotion cell
+                    state.promotion_cells[index] = player
+        if topology.center_cell:
+            state.promotion_cells[topology.get_center_index()] = Rules.CENTER_OWNER
+        return state
+
+    @staticmethod
+    def choose_cell(topology, cells, levels, border_level, rng=None):
+        """Chooses a cell of a quadrant to drop a piece in, the same way that Quadrant.get_cell does.
+        Prefers the cells over an inter_path in the requested border level, then the rest of that level, going outwards
+        if there are none left. Without a border level (0), any free cell of the quadrant.
+        Args:
+            topology (:obj: Topology):  Shape of the board.
+            cells (List->int):  Cells still free in the quadrant, in order of real index.
+            levels (Dict->int:List->int):   Border and center levels of each cell of the quadrant, as classify_quadrant returns.
+            border_level (int): Requested border level.
+            rng (:obj: random.Random, default=None):    If supplied, a random cell of the suitable ones is chosen.
+        Returns:
+            (int):  Real index of the chosen cell."""
+        pool = []
+        if border_level:
+            border_levels = set(level[0] for level in levels.values())
+            border_level = max(min(border_level, max(border_levels)), min(border_levels))
+        bifurcations = True
+        while not pool and border_level:
+            pool = [index for index in cells if levels[index][0] == border_level\
+                    and ((index%topology.level_size+1)%topology.inter_path_frequency == 0) == bifurcations]
+            if not bifurcations:
+                border_level -= 1
+            bifurcations = not bifurcations
+        if not pool:
+            pool = list(cells)
+        if rng:
+            return rng.choice(pool)
+        return max(pool, key=lambda index: index//topology.level_size)  #The first one of the outermost level, like a stable sort
+
+    @staticmethod
+    def from_board(board):
+        """Creates a state with the current situation of a Board. Only reads the board.
+        Args:
+            board (:obj: Board):    Board to copy.
+        Returns:
+            (:obj: GameState):  The headless copy."""
+        state = GameState(board.topology, [player.uuid for player in board.players])
+        for cell in board.cells:
+            if cell.has_char():
+                state.pieces[cell.get_real_index()] = Piece.from_character(cell.get_char())
+            if cell.promotion:
+                state.promotion_cells[cell.get_real_index()] = cell.owner
+        for player in board.players:
+            state.fallen[player.uuid] = [Piece.from_character(char) for char in player.fallen]
+            if player.dead:
+                state.dead.append(player.uuid)
+        state.player_index = board.player_index if 0 <= board.player_index < len(board.players) else 0
+        state.turn = max(board.turn, 0)
+        state.char_turns = board.char_turns
+        state.last_movement = board.last_real_movm
+        state.locked_cells = list(board.locked_cells)
+        return state
+
+    def add_piece(self, index, piece):
+        """Drops a piece in a cell."""
+        piece.current_pos = index
+        self.pieces[index] = piece
+
+    def get_current_player(self):
+        """Returns:
+            (int):  uuid of the player that holds the turn."""
+        return self.players[self.player_index]
+
+    def get_map(self, player=None):
+        """Generates the current map for a player, the same one that the Board generates with its cells.
+        Args:
+            player (int, default=None): uuid of the player asking. The current player if None.
+        Returns:
+            (Dict->int:Path):   Path objects that describe each cell for that player."""
+        player = player if player is not None else self.get_current_player()
+        current_map = {}
+        for index in self.topology.get_indexes():
+            piece = self.pieces.get(index)
+            if not piece:
+                current_map[index] = Path(self.topology.get_position(index), False, False, True, index)
+            elif self.turncoat:     #Everyone is an enemy
+                current_map[index] = Path(self.topology.get_position(index), False, True, piece.can_die, index)   #The invincible ones still deny the access
+            else:
+                ally = piece.owner_uuid == player
+                enemy = not ally
+                current_map[index] = Path(self.topology.get_position(index), ally, enemy, not (ally or (enemy and not piece.can_die)), index)
+        return current_map
+
+    def get_movable_pieces(self):
+        """Returns:
+            (Dict->int:Piece):  The pieces that the current player can move right now, by cell."""
+        if self.char_turns > 0 and self.last_movement:  #Moving the same character again
+            index = self.last_movement[-1]
+            return {index: self.pieces[index]} if index in self.pieces else {}
+        if self.turncoat:
+            return {index: piece for index, piece in self.pieces.items() if 'mother' not in piece.get_type() and index not in self.locked_cells}
+        player = self.get_current_player()
+        return {index: piece for index, piece in self.pieces.items() if piece.owner_uuid == player and index not in self.locked_cells}
+
+    def get_movements(self):
+        """Returns:
+            (List->Tuple->int, int):    All the legal movements (source, destiny) of the current player."""
+        if self.winner is not None or self.pending_promotion is not None:
+            return []
+        current_map = self.get_map()
+        movements = []
+        for index, piece in self.get_movable_pieces().items():
+            for path in piece.get_paths(self.topology.graph, self.topology.distances, current_map, index, self.topology.level_size):
+                if path[-1] not in self.locked_cells:
+                    movements.append((index, path[-1]))
+        return movements
+
+    def apply_movement(self, movement):
+        """Moves a piece, capturing if there is another one in the destiny, and triggering the promotions.
+        Advances the turns afterwards, unless an upgradable piece is waiting for its promotion.
+        Args:
+            movement (Tuple->int, int): Movement to do (source, destiny).
+        Returns:
+            (:obj: Piece):  The captured piece. None if there was none."""
+        source, destiny = movement[0], movement[-1]
+        piece = self.pieces.pop(source)
+        corpse = self.pieces.get(destiny)
+        if corpse:
+            self.capture(destiny, piece)
+        self.add_piece(destiny, piece)
+        piece.movements += 1
+        self.last_movement = (source, destiny)
+        if self.winner is not None:
+            return corpse
+        if Rules.triggers_promotion(destiny in self.promotion_cells, self.promotion_cells.get(destiny), piece):
+            if 'champion' in piece.get_type():
+                Rules.upgrade_champion(piece)
+            elif piece.upgradable and Rules.promotion_choices(self.fallen[self.get_current_player()]):
+                self.pending_promotion = destiny
+                return corpse
+        self.next_char_turn(piece)
+        return corpse
+
+    def capture(self, index, killer):
+        """Captures the piece in a cell. If its owner runs out of essential pieces, he loses and all his pieces are removed.
+        Args:
+            index (int):    Cell of the captured piece.
+            killer (:obj: Piece):   Piece that captures."""
+        corpse = self.pieces.pop(index)
+        self.fallen[corpse.owner_uuid].append(corpse)
+        killer.kills += 1
+        if corpse.essential and not any(piece.essential for piece in self.pieces.values() if piece.owner_uuid == corpse.owner_uuid):
+            self.dead.append(corpse.owner_uuid)
+            for cell in [cell for cell, piece in self.pieces.items() if piece.owner_uuid == corpse.owner_uuid]:
+                del self.pieces[cell]
+            alive = [player for player in self.players if player not in self.dead]
+            if len(alive) <= 1:
+                self.winner = alive[0] if alive else None
+                LOG.log('debug', 'The game has ended, the winner is the player ', self.winner)
+
+    def promote(self, char_type=None):
+        """Exchanges the upgradable piece waiting for promotion for one of the fallen pieces of its player, and advances the turn.
+        Args:
+            char_type (str, default=None):  Type of fallen piece to bring back. The most valuable one if None."""
+        choices = Rules.promotion_choices(self.fallen[self.get_current_player()])
+        revived = next((piece for piece in choices if piece.get_type() == char_type), None)
+        if not revived:
+            revived = max(choices, key=lambda piece: piece.value)
+        sacrifice = self.pieces[self.pending_promotion]
+        self.fallen[self.get_current_player()].remove(revived)
+        self.fallen[self.get_current_player()].append(sacrifice)
+        self.add_piece(self.pending_promotion, revived)
+        self.pending_promotion = None
+        self.next_player_turn()
+
+    def throw_dice(self, value=None):
+        """Throws the dice instead of moving. The gold value activates the turncoat mode, any other value loses the turn.
+        Args:
+            value (int, default=None):  Value of the throw. A random one if None.
+        Returns:
+            (int):  Value of the throw."""
+        if value is None:
+            player = self.get_current_player()
+            self.throws[player] += 1    #Counted before the throw, like the Dice does
+            value = Rules.dice_value(self.player_turns, self.throws[player], self.rng)
+        if value == Rules.GOLD_VALUE:
+            self.activate_turncoat()
+        else:
+            self.next_player_turn()
+        return value
+
+    def activate_turncoat(self):
+        """Allows the current player to choose any of the characters on the board, as long as it is not a matron mother."""
+        self.turncoat = True
+        self.locked_cells = [index for index, piece in self.pieces.items() if 'mother' in piece.get_type()]
+
+    def next_char_turn(self, piece):
+        """Advances a character turn. Changes the player if the piece has done all its movements.
+        Args:
+            piece (:obj: Piece):    Last piece moved."""
+        self.char_turns += 1
+        if self.char_turns >= piece.turns:
+            self.char_turns = 0
+            self.next_player_turn()
+
+    def next_player_turn(self):
+        """Gives the turn to the next player that is still alive."""
+        self.turncoat = False
+        self.char_turns = 0
+        del self.locked_cells[:]
+        for _ in range(0, len(self.players)):
+            self.player_index += 1
+            if self.player_index >= len(self.players):
+                self.player_index = 0
+                self.turn += 1
+            if self.players[self.player_index] not in self.dead:
+                break
+        self.player_turns += 1
+
+    def is_over(self):
+        """Returns:
+            (boolean):  True if the game has a winner."""
+        return self.winner is not None
+
+    def copy(self):
+        """Returns a copy of this state. The pieces are copied too, so the copy can be played without changing this one."""
+        state = GameState(self.topology, self.players, {index: piece.copy() for index, piece in self.pieces.items()}, self.promotion_cells, rng=self.rng)
+        state.fallen = {player: [piece.copy() for piece in pieces] for player, pieces in self.fallen.items()}
+        state.dead = list(self.dead)
+        state.player_index, state.turn, state.player_turns = self.player_index, self.turn, self.player_turns
+        state.throws = self.throws.copy()
+        state.char_turns, state.last_movement, state.turncoat = self.char_turns, self.last_movement, self.turncoat
+        state.locked_cells = list(self.locked_cells)
+        state.pending_promotion, state.winner = self.pending_promotion, self.winner
+        return state
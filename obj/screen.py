@@ -45,6 +45,14 @@ class Screen(object):
         resolution (:tuple: int, int):  Resolution of the current display.
         music (:obj: Music):    Music theme object.
         sound (:obj: Sound):    Sound effect object.
+        dirty_rendering (boolean):  True if the sprites of this screen report all their changes, so only the changed areas
+                                    are drawn each frame. False to draw the whole screen always.
+        full_redraw (boolean):  True to draw the whole screen in the next frame, even with dirty_rendering.
+        drawn_state (Tuple):    Result of get_drawn_state in the last frame.
+        layer (:obj: SpriteLayer):  Cached drawing of the background and the sprites that rarely change. Those sprites
+                                    are drawn with it instead of one by one. None to draw all of them each frame.
+    General class attributes:
+        MAX_DIRTY_RECTS (int):  Changed areas in a frame from which the whole screen is drawn instead.
     """
     __default_config = {'background_path'   : None,
                         'animated_background': None,
@@ -54,6 +62,7 @@ class Screen(object):
     }
     SOUND_CHANNELS = []
     SOUNDS = Dictionary()
+    MAX_DIRTY_RECTS = 128
     
     def __init__(self, id_, event_id, resolution, **params):
         """Screen constructor.
@@ -91,6 +100,11 @@ class Screen(object):
         self.scroll_offset = (0, 0)
         self.scroll_sprite = None
         self.scroll_length = 0
+        #Dirty rects
+        self.dirty_rendering = False
+        self.full_redraw = True
+        self.drawn_state = None
+        self.layer = None
         Screen.generate(self)
 
     @staticmethod
@@ -380,6 +394,21 @@ class Screen(object):
             self.dialog.set_visible(False)
             self.dialog = None
 
+    def is_idle(self):
+        """Returns:
+            (boolean):  True if nothing in the screen changes by itself, so the game can stop drawing it until there is input.
+                        The changes of the sprites are checked apart, with the areas that they report."""
+        return not self.animated_background and not self.animation
+
+    def update(self):
+        """Fixed-timestep update pass of the screen. Advances the animations of the sprites up to the current
+        step of the clock, outside of the drawing. The sprites that are drawn but not updated here advance when drawn."""
+        if self.dialog:
+            self.dialog.advance()
+        else:
+            for sprite in self.sprites:
+                sprite.advance()
+
     def draw(self, surface):
         """Draws the screen in the input surface. This method in the Screen
         superclass only draws the background, since the sprites group is empty.
@@ -388,7 +417,10 @@ class Screen(object):
         if self.dialog:
             self.dialog.draw(surface)
         else:
-            if self.animated_background:
+            layer = self.layer if not self.animated_background else None
+            if layer:
+                layer.draw(surface)     #Already has the background
+            elif self.animated_background:
                 self.background.play(surface)
             else:
                 self.background.draw(surface)
@@ -400,6 +432,8 @@ class Screen(object):
                         help_dialog = sprite.hover_dialog
                 except AttributeError:  #If the elements doesnt have those attributes
                     pass
+                if layer and sprite.layer is layer:
+                    continue
                 sprite.draw(surface, offset=self.scroll_offset)
             if help_dialog:
                 help_dialog.draw(surface, offset=self.scroll_offset)
@@ -409,6 +443,36 @@ class Screen(object):
             if self.animation:
                 self.animation.play(surface)
 
+    def invalidate(self):
+        """Makes the next frame draw the whole screen. To use when something changed without its sprites reporting it,
+        like a change of screen or resolution."""
+        self.full_redraw = True
+
+    def get_drawn_state(self):
+        """Returns:
+            (Tuple):    State of the elements that are drawn without reporting their changes. If it changes
+                        between frames, the whole screen is drawn again."""
+        return (self.dialog, self.animation, self.scroll_offset)
+
+    def needs_full_frame(self):
+        """Returns:
+            (boolean):  True if the whole screen must be drawn in this frame. Always with animated backgrounds,
+                        animations and dialogs, since they change each frame."""
+        return not self.dirty_rendering or self.animated_background or bool(self.dialog) or bool(self.animation)
+
+    def get_dirty_rects(self):
+        """Collects the areas that the sprites reported as changed since the last frame.
+        Returns:
+            (List->pygame.Rect||None):  The changed areas, clipped to the screen. None if the whole screen must be drawn."""
+        rects = Sprite.pop_dirty_rects()
+        state = self.get_drawn_state()
+        if self.full_redraw or state != self.drawn_state or self.needs_full_frame() or len(rects) > Screen.MAX_DIRTY_RECTS:
+            self.full_redraw = False
+            self.drawn_state = state
+            return None
+        screen_rect = pygame.Rect((0, 0), self.resolution)
+        return [rect.clip(screen_rect) for rect in rects if screen_rect.colliderect(rect)]
+
     def set_resolution(self, resolution):
         """Changes the resolution of the screen to input argument.
         Reloads the graphical elements (Only the background in this case).
@@ -416,6 +480,7 @@ class Screen(object):
             resolution (:tuple: int, int):  Resolution to set on the Screen."""
         LOG.log('error', 'Starting the resizing of the screen ', self.id)
         start = time.time()
+        self.invalidate()
         if resolution != self.resolution:
             self.resolution = resolution
             if self.animated_background:
@@ -0,0 +1,1679 @@
+"""--------------------------------------------
+search module. Contains the search algorithms used by the computer players, 
+separated from the graphics so they can be run without a screen (Benchmarks, self-play...).
+Have the following classes:
+    PersistantNumber
+    SearchToken
+    SearchStats
+    ZobristHash
+    EvaluationCache
+    OpeningBook
+    TimeManager
+    Evaluation
+    SearchAgent
+    Node
+    RolloutPolicy
+    MonteCarloSearch
+--------------------------------------------"""
+
+__all__ = ['PersistantNumber', 'SearchToken', 'SearchStats', 'ZobristHash', 'EvaluationCache', 'OpeningBook', 'TimeManager', 'Evaluation', 'SearchAgent', 'Node', 'RolloutPolicy', 'MonteCarloSearch']
+__version__ = '1.0'
+__author__ = 'David Flaity Pardo'
+
+#Python libraries
+import os
+import gzip
+import json
+import math
+import hashlib
+import time
+import random
+import threading
+import collections
+
+#Selfmade libraries
+from obj.paths import Movements, PathAppraiser
+from obj.rules import Rules
+from obj.utilities.logger import Logger as LOG
+
+class PersistantNumber(object): #To avoid the copying of classes
+    """PersistantNumber class. Contains an int that its persistant, that is, that holds the reference
+    to the instance of it when it goes through methods. A glorified int that you can use as a 
+    modificable input parameter in methods.
+    Attributes:
+        number (int):   The number itself."""
+    def __init__(self, initial_number=0):
+        """PersistantNumber constructor.
+        Args:
+            initial_number (int, default=0):    The number itself."""
+        self.number = initial_number
+
+    def __str__(self):
+        return str(self.number)
+
+class SearchToken(object):
+    """SearchToken class. Cooperative stop token of a search. The search algorithms check it between nodes,
+    and return the best result found so far as soon as it is stopped or its time runs out. 
+    It also holds the progress of the search, so it can be queried from other threads while searching.
+    Attributes:
+        timeout (float):    Limit of time, in seconds, of the search.
+        start_time (float): Timestamp of the moment at which the search started (or was restarted).
+        stop_event (:obj: threading.Event): Event that is set when the search has to stop.
+        nodes (int):    Nodes visited by the search until now.
+        rollouts (int): Simulations until the end of the game done by the search until now. Only used by montecarlo.
+        depth (int):    Maximum depth reached by the search until now.
+        cutoffs (Dict->int:int):    Branches pruned at each depth. Only used by alpha-beta.
+        expansions (int):   Nodes whose movements were generated.
+        children (int): Movements generated in those expansions. Divided by the expansions, the branching factor.
+        rollout_plies (int):    Movements simulated in all the rollouts. Only used by montecarlo.
+        best_move (Tuple->int, int):    Best movement found by the search until now. None at the start.
+        linked_tokens (List->SearchToken):  Tokens that will be stopped along with this one."""
+    def __init__(self, timeout=10):
+        """SearchToken constructor.
+        Args:
+            timeout (float, default=10):    Limit of time, in seconds, of the search."""
+        self.timeout = timeout
+        self.start_time = time.time()
+        self.stop_event = threading.Event()
+        self.nodes = 0
+        self.rollouts = 0
+        self.depth = 0
+        self.cutoffs = {}
+        self.expansions = 0
+        self.children = 0
+        self.rollout_plies = 0
+        self.best_move = None
+        self.linked_tokens = []
+
+    def restart(self, timeout=None):
+        """Restarts the clock of the search, without resetting its progress.
+        Args:
+            timeout (float, default=None):  New limit of time. If None, the current one is kept."""
+        self.timeout = timeout if timeout is not None else self.timeout
+        self.start_time = time.time()
+
+    def stop(self):
+        """Signals the search to stop as soon as possible. The linked tokens are stopped too."""
+        self.stop_event.set()
+        for token in self.linked_tokens:
+            token.stop()
+
+    def link(self, token):
+        """Links the input token to this one, so stopping this one stops the input one too.
+        If this token is already stopped, the input one is stopped right away."""
+        self.linked_tokens.append(token)
+        if self.is_stopped():
+            token.stop()
+
+    def is_stopped(self):
+        """Returns:
+            (boolean):  True if the search was signaled to stop."""
+        return self.stop_event.is_set()
+
+    def elapsed(self):
+        """Returns:
+            (float):    Seconds since the search started."""
+        return time.time()-self.start_time
+
+    def expired(self):
+        """Returns:
+            (boolean):  True if the search was stopped or its time ran out."""
+        return self.stop_event.is_set() or time.time()-self.start_time > self.timeout
+
+    def visit(self, depth=0):
+        """Registers a visited node at the input depth."""
+        self.nodes += 1
+        if depth > self.depth:
+            self.depth = depth
+
+    def expand(self, children):
+        """Registers the generation of the movements of a node.
+        Args:
+            children (int): Number of movements generated."""
+        self.expansions += 1
+        self.children += children
+
+    def cutoff(self, depth):
+        """Registers a branch pruned at the input depth."""
+        self.cutoffs[depth] = self.cutoffs.get(depth, 0)+1
+
+    def progress(self):
+        """Returns:
+            (Dict->String:Any): Progress of the search. Nodes visited, rollouts done, maximum depth reached, best movement found,
+                                seconds elapsed, and if it has been stopped."""
+        return {'nodes': self.nodes, 'rollouts': self.rollouts, 'depth': self.depth, 'best_move': self.best_move,\
+                'elapsed': self.elapsed(), 'stopped': self.is_stopped()}
+
+class SearchStats(object):
+    """SearchStats class. Statistics of the search of a single movement, taken from its SearchToken once it ends.
+    Every ai mode fills them, the ones that don't search only with the movements rated.
+    The hits of the EvaluationCache are the difference of its counters during the movement. The cache is
+    shared by all the searchs of the process, so the ones in the background (pondering) count too.
+    Attributes:
+        name (String):  Name of the agent.
+        mode (String):  Ai mode of the agent.
+        player (int):   Unique identifier of the player that moved.
+        source (String):    Where the movement came from: 'search', 'pondered', 'book', 'winning', 'forced', 'random', 'fitness' or 'fallback'
+                            (The search ended without any movement).
+        elapsed (float):    Seconds taken by the movement.
+        timeout (float):    Limit of time of the search.
+        nodes (int):    Nodes visited.
+        nodes_per_second (float):   Nodes visited per second of search.
+        depth (int):    Maximum depth reached.
+        cutoffs (Dict->int:int):    Branches pruned at each depth.
+        branching_factor (float):   Average of movements of the nodes expanded.
+        cache_hits (int):   Evaluations found in the EvaluationCache.
+        cache_misses (int): Evaluations calculated and saved in the EvaluationCache.
+        cache_hit_rate (float): Hits over all the lookups.
+        rollouts (int): Simulations done.
+        rollout_length (float): Average of movements per simulation.
+        timestamp (float):  Moment at which the movement was chosen.
+    """
+    def __init__(self, token, name='CPU', mode='random', player=None, source='search', elapsed=0, cache_hits=0, cache_misses=0):
+        """SearchStats constructor.
+        Args:
+            token (:obj: SearchToken):  Token of the search, already ended.
+            name (String, default='CPU'):   Name of the agent.
+            mode (String, default='random'):    Ai mode of the agent.
+            player (int, default=None): Unique identifier of the player that moved.
+            source (String, default='search'):  Where the movement came from.
+            elapsed (float, default=0): Seconds taken by the movement.
+            cache_hits (int, default=0):    Hits of the EvaluationCache during the movement.
+            cache_misses (int, default=0):  Misses of the EvaluationCache during the movement."""
+        self.name = name
+        self.mode = mode
+        self.player = player
+        self.source = source
+        self.elapsed = elapsed
+        self.timeout = token.timeout
+        self.nodes = token.nodes
+        search_time = token.elapsed() if source == 'pondered' else elapsed  #The pondered search started in the previous turn
+        self.nodes_per_second = token.nodes/search_time if search_time > 0 else 0.0
+        self.depth = token.depth
+        self.cutoffs = dict(token.cutoffs)
+        self.branching_factor = token.children/token.expansions if token.expansions else 0.0
+        self.cache_hits = cache_hits
+        self.cache_misses = cache_misses
+        self.cache_hit_rate = cache_hits/(cache_hits+cache_misses) if cache_hits+cache_misses else 0.0
+        self.rollouts = token.rollouts
+        self.rollout_length = token.rollout_plies/token.rollouts if token.rollouts else 0.0
+        self.timestamp = time.time()
+
+    def json(self):
+        """Returns:
+            (Dict->String:Any): All the statistics, ready to be dumped to JSON."""
+        return {'name': self.name, 'mode': self.mode, 'player': self.player, 'source': self.source, 'elapsed': self.elapsed,\
+                'timeout': self.timeout, 'nodes': self.nodes, 'nodes_per_second': self.nodes_per_second, 'depth': self.depth,\
+                'cutoffs': {str(depth): cutoffs for depth, cutoffs in sorted(self.cutoffs.items())}, 'branching_factor': self.branching_factor,\
+                'cache_hits': self.cache_hits, 'cache_misses': self.cache_misses, 'cache_hit_rate': self.cache_hit_rate,\
+                'rollouts': self.rollouts, 'rollout_length': self.rollout_length, 'timestamp': self.timestamp}
+
+    def save(self, filename, **extra):
+        """Appends the statistics to a file, one JSON per line.
+        Args:
+            filename (String):  Path of the file.
+            **extra (Dict->String:Any): More fields to save with the statistics (Like the board preset)."""
+        with open(filename, 'a') as stats_file:
+            stats_file.write(json.dumps(dict(self.json(), **extra))+'\n')
+
+    def __str__(self):
+        return self.name+' ('+self.source+'): '+str(self.nodes)+' nodes in '+'{:.2f}'.format(self.elapsed)+'s, '\
+                +'{:.0f}'.format(self.nodes_per_second)+' nodes/s, depth '+str(self.depth)+', branching '+'{:.1f}'.format(self.branching_factor)\
+                +', cutoffs '+str(sum(self.cutoffs.values()))+', cache '+'{:.0%}'.format(self.cache_hit_rate)\
+                +(', '+str(self.rollouts)+' rollouts of '+'{:.1f}'.format(self.rollout_length)+' plies' if self.rollouts else '')
+
+class ZobristHash(object):
+    """ZobristHash class. Only contains static methods. Hashes the positions of the simulations, so they can be saved in caches.
+    Each character in a cell has a random key, and the hash of a position is the xor of the keys of all its characters.
+    A movement only changes the keys of the source and destiny cells, so the hash of the next position is updated 
+    with 3 xors at most, instead of going through all the board.
+    General class Atributes:
+        SEED (int): Seed of the random keys. The same one in every process, so the hashes are reproducible.
+        KEYS (Dict->Tuple:int): Key of each (cell index, owner uuid, type of char, value of char). Generated the first time they are needed.
+                                The players of each game have new uuids, so they are cleared with clear when a game ends."""
+    SEED = 0x5A7A
+    KEYS = {}
+    RNG = random.Random(SEED)
+
+    @staticmethod
+    def get_key(index, char):
+        """Returns:
+            (int):  The random key of the input char in the input cell."""
+        key_id = (index, char.owner_uuid, char.get_type(), char.value)
+        key = ZobristHash.KEYS.get(key_id)
+        if key is None:    #Setdefault, so two threads asking for the same key get the same one
+            key = ZobristHash.KEYS.setdefault(key_id, ZobristHash.RNG.getrandbits(64))
+        return key
+
+    @staticmethod
+    def clear():
+        """Deletes all the keys, and the evaluations saved with them. The keys generated after this are the same sequence again."""
+        ZobristHash.KEYS.clear()
+        ZobristHash.RNG.seed(ZobristHash.SEED)
+        EvaluationCache.clear()
+
+    @staticmethod
+    def hash_position(all_cells):
+        """Hashes a position from scratch.
+        Args:
+            all_cells (Dict->int:Character):    Cells that currently have a char in them, and the char.
+        Returns:
+            (int):  The hash of the position."""
+        position_hash = 0
+        for index, char in all_cells.items():
+            position_hash ^= ZobristHash.get_key(index, char)
+        return position_hash
+
+    @staticmethod
+    def update(position_hash, source, destiny, moving_char, captured_char=None):
+        """Updates the hash of a position with a movement.
+        Args:
+            position_hash (int):    Hash of the position before the movement.
+            source (int):   Source cell of the movement.
+            destiny (int):  Destiny cell of the movement.
+            moving_char (:obj: Character):  Char that moves.
+            captured_char (:obj: Character, default=None): Char that was in the destiny, if any.
+        Returns:
+            (int):  The hash of the position after the movement."""
+        position_hash ^= ZobristHash.get_key(source, moving_char)^ZobristHash.get_key(destiny, moving_char)
+        if captured_char:
+            position_hash ^= ZobristHash.get_key(destiny, captured_char)
+        return position_hash
+
+class EvaluationCache(object):
+    """EvaluationCache class. Only contains static methods. Bounded LRU cache of the board evaluations, shared by all the 
+    searchs of the process (Alpha-beta, ponder, montecarlo). Keyed by the kind of evaluation, the zobrist hash of the position, 
+    and the player for whom it is evaluated.
+    General class Atributes:
+        MAX_SIZE (int): Maximum number of saved evaluations. The least recently used ones are deleted first.
+        ENTRIES (:obj: collections.OrderedDict):    Saved evaluations, from the least to the most recently used.
+        LOCK (:obj: threading.Lock):    Lock of the entries, since the ponder searchs run in their own threads.
+        HITS (int): Evaluations found in the cache.
+        MISSES (int):   Evaluations that had to be calculated."""
+    MAX_SIZE = 200000
+    ENTRIES = collections.OrderedDict()
+    LOCK = threading.Lock()
+    HITS = 0
+    MISSES = 0
+
+    @staticmethod
+    def get_value(key, evaluation, *args):
+        """Returns the saved evaluation of the key. If there isn't one, it's calculated and saved.
+        Args:
+            key (Tuple):    Key of the evaluation. (kind, position hash, player).
+            evaluation (Callable):  Method that calculates the evaluation.
+            *args (Any):    Arguments of the evaluation method. Separated by commas.
+        Returns:
+            (float):    The evaluation."""
+        with EvaluationCache.LOCK:
+            value = EvaluationCache.ENTRIES.get(key)
+            if value is not None:
+                EvaluationCache.ENTRIES.move_to_end(key)
+                EvaluationCache.HITS += 1
+                return value
+            EvaluationCache.MISSES += 1
+        value = evaluation(*args)
+        with EvaluationCache.LOCK:
+            EvaluationCache.ENTRIES[key] = value
+            if len(EvaluationCache.ENTRIES) > EvaluationCache.MAX_SIZE:
+                EvaluationCache.ENTRIES.popitem(last=False)
+        return value
+
+    @staticmethod
+    def resize(max_size):
+        """Changes the maximum number of saved evaluations, deleting the least recently used ones if needed."""
+        with EvaluationCache.LOCK:
+            EvaluationCache.MAX_SIZE = max_size
+            while len(EvaluationCache.ENTRIES) > max_size:
+                EvaluationCache.ENTRIES.popitem(last=False)
+
+    @staticmethod
+    def clear():
+        """Deletes all the saved evaluations and resets the statistics."""
+        with EvaluationCache.LOCK:
+            EvaluationCache.ENTRIES.clear()
+            EvaluationCache.HITS = 0
+            EvaluationCache.MISSES = 0
+
+    @staticmethod
+    def stats():
+        """Returns:
+            (Dict->String:Any): Hits, misses, hit rate, current size and maximum size of the cache."""
+        lookups = EvaluationCache.HITS+EvaluationCache.MISSES
+        return {'hits': EvaluationCache.HITS, 'misses': EvaluationCache.MISSES, 'hit_rate': EvaluationCache.HITS/lookups if lookups else 0.0,\
+                'size': len(EvaluationCache.ENTRIES), 'max_size': EvaluationCache.MAX_SIZE}
+
+class OpeningBook(object):
+    """OpeningBook class. Movements of the first turns of a board preset, searched offline (opening_book.py) and saved 
+    in a compressed file. The starting positions repeat game after game, so those turns don't need to be searched again.
+    The positions are keyed by the cells and types of the characters, and the seat of their owners counting from the player 
+    that holds the turn. This way the key doesn't depend on the uuids of the players, that change in each game.
+    General class attributes:
+        FOLDER (String):    Default folder of the books.
+        EXTENSION (String): Extension of the book files. They are gzipped JSON.
+        KEY_SIZE (int): Bytes of the digest of each position.
+    Attributes:
+        entries (Dict->String:List):    Movement (source, destiny) of each position key.
+        filename (String):  File from which the book was loaded, and to which it's saved by default.
+    """
+    FOLDER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'local', 'books')
+    EXTENSION = '.book'
+    KEY_SIZE = 8
+
+    def __init__(self, entries=None, filename=None):
+        """OpeningBook constructor.
+        Args:
+            entries (Dict->String:List, default=None):  Movement of each position key.
+            filename (String, default=None):    File of the book."""
+        self.entries = dict(entries) if entries else {}
+        self.filename = filename
+
+    def __len__(self):
+        return len(self.entries)
+
+    @staticmethod
+    def get_filename(topology, folder=None):
+        """Returns:
+            (String):   Path of the book of the input board topology. Each shape of board has its own book."""
+        name = 'opening_'+str(topology.level_size)+'x'+str(topology.levels)+'_'+str(topology.inter_path_frequency)+('_center' if topology.center_cell else '')
+        return os.path.join(folder if folder else OpeningBook.FOLDER, name+OpeningBook.EXTENSION)
+
+    @staticmethod
+    def position_key(all_cells, my_player, all_players):
+        """Generates the key of a position, the same in every game and process.
+        Args:
+            all_cells (Dict->int:Character):    Cells that currently have a char in them, and the char.
+            my_player (int):    uuid of the player that holds the turn.
+            all_players (List->int):    uuids of the players still playing, in order of turn.
+        Returns:
+            (String):   Hexadecimal digest of the position."""
+        my_seat = all_players.index(my_player)
+        seats = {player: (seat-my_seat)%len(all_players) for seat, player in enumerate(all_players)}
+        position = sorted((index, seats.get(char.owner_uuid, -1), char.get_type()) for index, char in all_cells.items())
+        return hashlib.blake2b(repr((len(all_players), position)).encode(), digest_size=OpeningBook.KEY_SIZE).hexdigest()
+
+    def get_movement(self, all_cells, my_player, all_players):
+        """Returns:
+            (Tuple->int, int):  The movement of the book for the input position. None if the position is not in it."""
+        movement = self.entries.get(OpeningBook.position_key(all_cells, my_player, all_players))
+        return tuple(movement) if movement else None
+
+    def add(self, all_cells, my_player, all_players, movement):
+        """Adds (or replaces) the movement of the input position."""
+        self.entries[OpeningBook.position_key(all_cells, my_player, all_players)] = [movement[0], movement[-1]]
+
+    def update(self, entries):
+        """Adds the input entries (Dict->String:List), from another book or a worker process."""
+        self.entries.update(entries)
+
+    def save(self, filename=None):
+        """Saves the book, creating its folder if it doesn't exist.
+        Args:
+            filename (String, default=None):    File to save the book to. The one it was loaded from if None."""
+        filename = filename if filename else self.filename
+        os.makedirs(os.path.dirname(os.path.abspath(filename)), exist_ok=True)
+        with gzip.open(filename, 'wt') as book_file:
+            json.dump(self.entries, book_file, separators=(',', ':'))
+        LOG.log('info', 'Saved the opening book ', filename, ' with ', len(self.entries), ' positions')
+
+    @staticmethod
+    def load(topology, folder=None, filename=None):
+        """Loads the book of the input board topology. If the file doesn't exist or is corrupt, the book is empty.
+        Args:
+            topology (:obj: Topology):  Shape of the board.
+            folder (String, default=None):  Folder of the books. FOLDER if None.
+            filename (String, default=None):    If supplied, the book is loaded from this file instead.
+        Returns:
+            (:obj: OpeningBook):    The book."""
+        filename = filename if filename else OpeningBook.get_filename(topology, folder)
+        try:
+            with gzip.open(filename, 'rt') as book_file:
+                book = OpeningBook(json.load(book_file), filename)
+            LOG.log('info', 'Loaded the opening book ', filename, ' with ', len(book), ' positions')
+            return book
+        except FileNotFoundError:
+            LOG.log('debug', 'There is no opening book in ', filename)
+        except (OSError, ValueError):
+            LOG.log('warning', 'The opening book ', filename, ' could not be read, ignoring it')
+        return OpeningBook(filename=filename)
+
+class TimeManager(object):
+    """TimeManager class. Splits a time bank of a whole game between the movements of a computer player, instead of
+    giving the same time to all of them. The time of each movement is the bank divided by the movements expected to be left,
+    scaled by the complexity of the position: more legal movements, captures available, or an enemy essential piece in reach, 
+    get more time. The forced movements don't use any (SearchAgent doesn't search them).
+    General class attributes:
+        EXPECTED_MOVES (int):   Searched movements that a game is expected to last. The default bank is the round timeout times this.
+        MIN_MOVES_TO_GO (int):  Minimum of movements left assumed, so the end of the bank is not spent in a single movement.
+        AVERAGE_MOVEMENTS (int):    Legal movements of an average position. Positions with more of them get more time.
+        MIN_BRANCHING_FACTOR (float):   Minimum factor given by the number of legal movements.
+        MAX_BRANCHING_FACTOR (float):   Maximum factor given by the number of legal movements.
+        CAPTURE_FACTOR (float): Factor of the positions with a capture available.
+        ESSENTIAL_FACTOR (float):   Factor of the positions with an enemy essential piece (Matron mother) in reach.
+        MAX_FACTOR (float): Maximum times the base time that a movement can use.
+        MAX_BANK_FRACTION (float):  Maximum fraction of the remaining bank that a movement can use.
+        MIN_TIME (float):   Minimum seconds of a search, even with the bank empty.
+    Attributes:
+        bank (float):   Seconds left for the rest of the game.
+        increment (float):  Seconds added to the bank after each movement.
+        expected_moves (int):   Searched movements that the game is expected to last.
+        moves_played (int): Searched movements done until now.
+    """
+    EXPECTED_MOVES = 40
+    MIN_MOVES_TO_GO = 10
+    AVERAGE_MOVEMENTS = 30
+    MIN_BRANCHING_FACTOR = 0.5
+    MAX_BRANCHING_FACTOR = 2
+    CAPTURE_FACTOR = 1.5
+    ESSENTIAL_FACTOR = 2
+    MAX_FACTOR = 3
+    MAX_BANK_FRACTION = 0.25
+    MIN_TIME = 0.1
+
+    def __init__(self, round_timeout, bank=None, increment=0, expected_moves=EXPECTED_MOVES):
+        """TimeManager constructor.
+        Args:
+            round_timeout (float):  Average seconds per movement.
+            bank (float, default=None): Seconds of the whole game. round_timeout*expected_moves if None.
+            increment (float, default=0):   Seconds added to the bank after each movement.
+            expected_moves (int, default=EXPECTED_MOVES):   Searched movements that the game is expected to last."""
+        self.bank = bank if bank is not None else round_timeout*expected_moves
+        self.increment = increment
+        self.expected_moves = expected_moves
+        self.moves_played = 0
+
+    @staticmethod
+    def complexity(all_cells, my_player, fitnesses):
+        """Rates how critical a position is.
+        Args:
+            all_cells (Dict->int:Character):    Cells that currently have a char in them, and the char.
+            my_player (int):    uuid of the player that holds the turn.
+            fitnesses (List->Tuple):    Legal movements of this turn, with their scores.
+        Returns:
+            (float):    Factor of the base time of a movement."""
+        factor = min(max(len(fitnesses)/TimeManager.AVERAGE_MOVEMENTS, TimeManager.MIN_BRANCHING_FACTOR), TimeManager.MAX_BRANCHING_FACTOR)
+        captures = [all_cells[fitness[0][-1]] for fitness in fitnesses if fitness[0][-1] in all_cells and all_cells[fitness[0][-1]].owner_uuid != my_player]
+        if captures:
+            factor *= TimeManager.CAPTURE_FACTOR
+            if any(char.essential for char in captures):
+                factor *= TimeManager.ESSENTIAL_FACTOR
+        return factor
+
+    def allocate(self, all_cells, my_player, fitnesses):
+        """Returns:
+            (float):    Seconds of the search of the input position."""
+        base = self.bank/max(self.expected_moves-self.moves_played, TimeManager.MIN_MOVES_TO_GO)
+        budget = min(base*TimeManager.complexity(all_cells, my_player, fitnesses), base*TimeManager.MAX_FACTOR, self.bank*TimeManager.MAX_BANK_FRACTION)
+        return max(budget, TimeManager.MIN_TIME)
+
+    def spend(self, seconds):
+        """Takes the seconds used by a movement from the bank, and adds the increment."""
+        self.bank = max(self.bank-seconds, 0)+self.increment
+        self.moves_played += 1
+
+class Evaluation(object):
+    """Evaluation class. Only contains static methods. Linear evaluation of a position over some features, with the weights
+    fitted offline by texel_tuning.py from the results of self-play games. Once the weights file exists, alpha-beta evaluates
+    its leafs with it instead of the ratio of values of SearchAgent.evaluate_board.
+    All the features are the value for the player minus the average of his enemies:
+        Material of each type of character (Count of them).
+        mobility:   Different movements (source, destiny) that can be done.
+        danger: Value of the characters attacked (The destiny of an enemy movement).
+        promotion:  Characters standing in a promotion cell.
+    The mobility and danger need the movements of every player, so they are only calculated if their weight is not zero.
+    They cost hundreds of times the rest of the features in each leaf, so they are not fitted by default.
+    General class attributes:
+        MATERIAL (List->String):    Types of character whose material is a feature.
+        FEATURES (List->String):    Names of all the features, in the order of the vectors.
+        DEFAULT_FEATURES (List->String):    Features fitted if no others are asked for. All of them but mobility and danger.
+        FILENAME (String):  Default weights file. Loaded when this module is imported, if it exists.
+        WEIGHTS (Dict->String:float):   Weight of each feature. None if there are no tuned weights.
+    """
+    MATERIAL = ['pawn', 'warrior', 'wizard', 'priestess', 'matron_mother', 'holy_champion']
+    FEATURES = MATERIAL+['mobility', 'danger', 'promotion']
+    DEFAULT_FEATURES = MATERIAL+['promotion']
+    FILENAME = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'local', 'evaluation.json')
+    WEIGHTS = None
+
+    @staticmethod
+    def features(paths_graph, distances, circum_size, all_cells, current_map, player, all_players, promotion_cells=(), needed=FEATURES):
+        """Calculates the features of a position.
+        Args:
+            paths_graph (:obj: numpy.Matrix):   Matrix of enabled/directly connected paths of the board.
+            distances (:obj: numpy.Matrix): Distances matrix of the board.
+            circum_size (int):  Length of each circumference of the board.
+            all_cells (Dict->int:Character):    Cells that currently have a char in them, and the char.
+            current_map (Dict->int:Path):   Map of the board, of any player. Not modified.
+            player (int):   uuid of the player for whom the features are calculated.
+            all_players (List->int):    uuids of all the players.
+            promotion_cells (Iterable->int, default=()):    Indexes of the promotion cells.
+            needed (Iterable->String, default=FEATURES):    Features to calculate. The rest are 0.
+        Returns:
+            (Dict->String:float):   Value of each feature."""
+        enemies = max(len(all_players)-1, 1)
+        values = {feature: 0.0 for feature in Evaluation.FEATURES}
+        for index, char in all_cells.items():
+            sign = 1 if char.owner_uuid == player else -1/enemies
+            char_type = char.get_type()
+            if char_type in values:
+                values[char_type] += sign
+            if index in promotion_cells:
+                values['promotion'] += sign
+        if 'mobility' in needed or 'danger' in needed:
+            map_state = {cell_index: path_obj.copy() for cell_index, path_obj in current_map.items()}
+            for uuid in all_players:
+                SearchAgent.change_map(map_state, all_cells, uuid)
+                sign = 1 if uuid == player else -1/enemies
+                for index, char in [(index, char) for index, char in all_cells.items() if char.owner_uuid == uuid]:
+                    destinies = RolloutPolicy.get_destinies(paths_graph, distances, circum_size, map_state, index, char)
+                    values['mobility'] += sign*len(destinies)
+                    values['danger'] -= sign*sum(all_cells[destiny].value for destiny in destinies if destiny in all_cells)
+        return values
+
+    @staticmethod
+    def evaluate(paths_graph, distances, circum_size, all_cells, current_map, player, all_players, promotion_cells=()):
+        """Returns:
+            (float):    Score of the position for the input player, with the tuned weights."""
+        weights = Evaluation.WEIGHTS
+        values = Evaluation.features(paths_graph, distances, circum_size, all_cells, current_map, player, all_players, promotion_cells,\
+                                    needed=[feature for feature, weight in weights.items() if weight])
+        return sum(weights.get(feature, 0)*value for feature, value in values.items())
+
+    @staticmethod
+    def save(weights, filename=None, **metadata):
+        """Saves the weights to the input file (FILENAME if None), along with the metadata (Error, positions...)."""
+        filename = filename if filename else Evaluation.FILENAME
+        os.makedirs(os.path.dirname(os.path.abspath(filename)), exist_ok=True)
+        with open(filename, 'w') as weights_file:
+            json.dump(dict(metadata, weights=weights), weights_file, indent=2)
+        LOG.log('info', 'Saved the evaluation weights in ', filename)
+
+    @staticmethod
+    def load(filename=None):
+        """Loads the weights of the input file (FILENAME if None), and clears the evaluation cache. 
+        If the file doesn't exist, the tuned evaluation stays disabled.
+        Returns:
+            (boolean):  True if the weights were loaded."""
+        filename = filename if filename else Evaluation.FILENAME
+        try:
+            with open(filename) as weights_file:
+                weights = json.load(weights_file)['weights']
+            Evaluation.WEIGHTS = {feature: float(weights.get(feature, 0)) for feature in Evaluation.FEATURES}
+            EvaluationCache.clear()
+            LOG.log('info', 'Loaded the evaluation weights of ', filename)
+            return True
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError, KeyError, AttributeError):
+            LOG.log('warning', 'The evaluation weights ', filename, ' could not be read, using the default evaluation')
+            return False
+
+class SearchAgent(object):
+    """SearchAgent class. Chooses the next movement of a player, using the algorithm of its ai mode.
+    It only works with the logical structures of the board (Pieces and Path objects), so it doesn't need any sprite.
+    The possibilities vary between simple algorithms, like random or half-random movements, to full heuristics to get a more
+    'intelligent' like behaviour.
+    Attributes:
+        name (String):  Name of the agent. Used in the logs.
+        order (int):    Order of turn of the player that this agent moves for.
+        ai_mode (String):   Algorithm or method used to return the next movement of this player.
+        distances (:obj: numpy.Matrix): Distances matrix of the current board.
+        graph (:obj: numpy.Matrix): Matrix of enabled/directly connected paths of the current board.
+        circum_size (int):  Length of each circumference of the current board.
+        round_timeout (float):  Limit of time, in seconds, of each search.
+        adaptative_max_depth (boolean): Flag to activate the adaptative reduction of the max depth search (According to the time limitation)
+                                        or deactivate it. If True, the max depth of the search algorithms will be reducted by 1 until it can be completed
+                                        below the timeout assigned.
+        max_depth (int):    Current maximum depth to search in the tree algorithms.
+        timeout_count (int):    Counter of the times that the timeout has been exceeded.
+        search_token (:obj: SearchToken):   Stop token of the last search. Can be used to query its progress.
+        search_stats (:obj: SearchStats):   Statistics of the last movement chosen. None until the first one.
+        rollout_policy (String):    Name of the RolloutPolicy of the montecarlo simulations. None to use the default one.
+        rng (:obj: random.Random):  Source of the random numbers of the searchs. Its own stream, so searching doesn't change the dice sequence.
+        opening_book (:obj: OpeningBook):   Book of movements of the first turns. The search modes use its movement if the position is in it.
+        time_manager (:obj: TimeManager):   Time bank of the game, that gives the time of each search. None to use round_timeout in all of them.
+        promotion_cells (frozenset->int):   Indexes of the promotion cells of the board.
+        board_key (int):    Identity of the board (Paths and promotion cells). Part of the key of the cached tuned evaluations,
+                            since the same position can have a different mobility in another board.
+    """
+    def __init__(self, graph, distances, level_size, ai_mode='random', order=0, name='CPU', max_depth=5, adaptative_max_depth=True, timeout=10,\
+                rollout_policy=None, rng=None, opening_book=None, time_manager=None, promotion_cells=()):
+        """SearchAgent constructor.
+        Args:
+            graph (:obj: numpy.Matrix): Matrix of enabled/directly connected paths of the current board.
+            distances (:obj: numpy.Matrix): Distances matrix of the current board.
+            level_size (int):   Length of each circumference of the board.
+            ai_mode (String, default='random'): Algorithm or method that will be used in each movement.
+            order (int, default=0): Order of turn of the player that this agent moves for.
+            name (String, default='CPU'):   Name of the agent.
+            max_depth(int, default=5):  Maximum depth to search in the tree algorithms.
+            adaptative_max_depth (boolean, default=True):   Flag to indicate if the max_depth attribute is adaptative to the current situation and timeout.
+            timeout (float, default=10):    Limit of time, in seconds, of each search.
+            rollout_policy (String, default=None):  Name of the RolloutPolicy of the montecarlo simulations. None to use the default one.
+            rng (:obj: random.Random, default=None):    Source of the random numbers of the searchs. The random module if None.
+            opening_book (:obj: OpeningBook, default=None): Book of movements checked before searching.
+            time_manager (:obj: TimeManager, default=None): Time bank of the game. If None, every search lasts the timeout.
+            promotion_cells (Iterable->int, default=()):    Indexes of the promotion cells of the board. Used by the tuned evaluation."""
+        self.name = name
+        self.order = order
+        self.ai_mode = ai_mode.lower()
+        self.round_timeout = timeout
+        self.distances = distances
+        self.graph = graph
+        self.circum_size = level_size
+        self.adaptative_max_depth = adaptative_max_depth
+        self.max_depth = max_depth
+        self.timeout_count = 0
+        self.search_token = None
+        self.search_stats = None
+        self.rollout_policy = rollout_policy
+        self.rng = rng if rng else random
+        self.opening_book = opening_book
+        self.time_manager = time_manager
+        self.promotion_cells = frozenset(promotion_cells)
+        self.board_key = hash((level_size, graph.tobytes(), self.promotion_cells))
+
+    def increase_timeout_count(self):
+        """Increases the counter of timeouts breached. Restarts it (and does whatever action) if the limit has been hit."""
+        self.timeout_count += 1
+        if self.adaptative_max_depth and self.timeout_count is 5:
+            self.timeout_count = 5
+            self.max_depth -= 1 if self.max_depth > 1 else 0   #Else we substract 0
+
+    def generate_fitnesses(self, all_cells, current_player, paths_graph, distances, current_map, level_size):
+        """Generates all the fitnesses (scores) for each movement possible for the input player, in the current board, in the input situation.
+        Args:
+            all_cells (Dict->int:Character):    Structure that have all the cells that currently have a char in them. The key of each element 
+                                                if the index of the cell, and the value is the Character that resides in that cell.
+            current_player (int):   Unique identifier of the current player.
+            paths_graph (:obj: numpy.Matrix):   Matrix of enabled/directly connected paths of the current board.
+            distances (:obj: numpy.Matrix): Distances matrix of the current board.
+            current_map (Dict->int:Path):   Path objects that describe each current cell for a specific player.
+                                            (Says if there is a char, if it's an enemy or an ally...)
+            level_size (int):   Length of each circumference of the board that this player will be in.
+        Returns:
+            (List->Tuple->(int, int), int): A list of tuples, each tuple containing the movement itself in the first position(another tuple),
+                                            and the score for this movement in the second position
+        """
+        all_fitnesses = []
+        for start_index, char in all_cells.items():
+            if char.owner_uuid == current_player:
+                destinations = [path[-1] for path in char.get_paths(paths_graph, distances, current_map, start_index, level_size)]
+                fitnesses = PathAppraiser.rate_movements(start_index, destinations, paths_graph, distances, current_map, all_cells, level_size)
+                for destiny, score in fitnesses.items():
+                    all_fitnesses.append(((start_index, destiny), score))   #Append a tuple ((start, destiny), fitness_eval_of_movm)
+        return all_fitnesses
+
+    def choose_movement(self, board_hash, all_cells, current_map, my_player, all_players, allowed_movements=(), restricted_movements=(),\
+                        chars_allowed=(), max_nodes=100, stop_token=None):
+        """Gets as an input the current state of the board, and based on the current ai mode, returns what it undestands to be
+        the best course of action (The best next movement). The input structures will be modified by the simulations.
+        The statistics of the search of the movement are saved in the search_stats attribute.
+        Args:
+            board_hash (int):   Hash of the board parameters.
+            all_cells (Dict->int:Piece):    Structure that have all the cells that currently have a char in them.
+            current_map (Dict->int:Path):   Path objects that describe each current cell for my_player.
+            my_player (int):    Unique identifier of the current player.
+            all_players (List->int):    List with all the players unique identifiers(uuid).
+            allowed_movements (Iterable, default=()):   If not empty, only these movements can be chosen.
+            restricted_movements (Iterable, default=()):    Movements that can't be chosen.
+            chars_allowed (Iterable, default=()):   Characters that must move this turn, if any.
+            max_nodes (int):    Limit to the expansion of the tree searchs. Unused right now.
+            stop_token (:obj: SearchToken, default=None):   Token to stop the search from outside and to query its progress.
+                                                            If None, one with the round_timeout is created.
+        Returns:
+            (Tuple->int, int):  The best movement calculated by the underlying algorithm. (source, destiny).
+        """
+        start = time.time()
+        self.search_token = stop_token if stop_token else SearchToken(self.round_timeout)
+        cache_hits, cache_misses = EvaluationCache.HITS, EvaluationCache.MISSES
+        movement, source = self.select_movement(board_hash, all_cells, current_map, my_player, all_players, allowed_movements, restricted_movements,\
+                                                chars_allowed, max_nodes, start)
+        self.search_stats = SearchStats(self.search_token, self.name, self.ai_mode, my_player, source, time.time()-start,\
+                                        EvaluationCache.HITS-cache_hits, EvaluationCache.MISSES-cache_misses)
+        LOG.log('info', self.search_stats)
+        return movement
+
+    def select_movement(self, board_hash, all_cells, current_map, my_player, all_players, allowed_movements=(), restricted_movements=(),\
+                        chars_allowed=(), max_nodes=100, start=None):
+        """Runs the ai mode over the board state, using the current search_token. The arguments are the ones of choose_movement.
+        Args:
+            start (float, default=None):    Timestamp at which the movement started. Now if None. Spent from the time bank when searching.
+        Returns:
+            (Tuple->Tuple->int, int, String):   The movement, and where it came from (The source of the SearchStats)."""
+        start = start if start else time.time()
+        #FORMAT: [(movements, score), ...] -- [((23, 22), 0.4332432), ((0, 17), 0.123412)] 
+        fitnesses = self.generate_fitnesses(all_cells, my_player, self.graph, self.distances, current_map, self.circum_size)
+        #Filtering the fitnesses for the first three modes
+        fitnesses = [fitness for fitness in fitnesses if fitness[0] not in restricted_movements and (not allowed_movements or fitness[0] in allowed_movements)]
+        #Checking if the winning move is withing immediate grasp
+        winning_move = SearchAgent.is_winning_move(all_cells, fitnesses, my_player)
+        if winning_move:    
+            LOG.log('Info', 'Detected immediate winning move! Choosing ', winning_move)
+            return winning_move, 'winning'
+        if len(fitnesses) == 1: #Forced movement, nothing to think about
+            return fitnesses[0][0], 'forced'
+        #If not, normal ia then.
+        if not self.uses_search():  #Every movement is rated, those are the nodes of these modes
+            self.search_token.nodes += len(fitnesses)
+            self.search_token.expand(len(fitnesses))
+        if 'random' in self.ai_mode:
+            if 'half' in self.ai_mode:
+                return self.generate_random_movement(fitnesses, somewhat_random=True), 'random'
+            return self.generate_random_movement(fitnesses, totally_random=True), 'random'
+        if 'fitness' in self.ai_mode:
+            return self.generate_random_movement(fitnesses), 'fitness'
+        #The other methods need the all_cells structure  
+        book_movement = self.get_book_movement(all_cells, my_player, all_players, fitnesses, allowed_movements, restricted_movements)
+        if book_movement:
+            LOG.log('Info', 'The position is in the opening book, choosing ', book_movement)
+            return book_movement, 'book'
+        try:
+            timeout = self.time_manager.allocate(all_cells, my_player, fitnesses) if self.time_manager else self.search_token.timeout
+            pondered_movement = self.get_pondered_movement(all_cells, my_player, chars_allowed, restricted_movements, stop_token=self.search_token, timeout=timeout)
+            if pondered_movement:
+                LOG.log('Info', 'The pondered position was reached, reusing the background search result ', pondered_movement)
+                return pondered_movement, 'pondered'
+            self.search_token.restart(timeout)  #The time generating the fitnesses is not taken from the search
+            if self.time_manager:
+                LOG.log('Info', 'The time manager gives ', self.search_token.timeout, ' seconds to this movement, out of a bank of ', self.time_manager.bank)
+            movement = self.generate_search_movement(board_hash, all_cells, current_map, my_player, all_players, allowed_movements, restricted_movements,\
+                                                max_nodes, stop_token=self.search_token)
+            if movement:
+                return movement, 'search'
+            return self.generate_random_movement(fitnesses), 'fallback' #Stopped before evaluating any movement
+        except Exception:
+            LOG.error_traceback()
+            return self.generate_random_movement(fitnesses, somewhat_random=True), 'fallback'
+        finally:
+            if self.time_manager:
+                self.time_manager.spend(time.time()-start)
+
+    def get_pondered_movement(self, all_cells, my_player, chars_allowed=(), restricted_movements=(), stop_token=None, timeout=None):
+        """Returns the result of a background search done over the current board state, if any.
+        The base agent doesn't search in the background, so it always returns None.
+        Returns:
+            (Tuple->int, int):  The pondered movement. None if there isn't one."""
+        return None
+
+    def get_book_movement(self, all_cells, my_player, all_players, fitnesses, allowed_movements=(), restricted_movements=()):
+        """Checks the opening book. Only the first movement of a turn is looked up, since the book doesn't know about 
+        the characters that have to move again.
+        Args:
+            fitnesses (List->Tuple):    Legal movements of this turn, with their scores. The movement of the book must be one of them.
+        Returns:
+            (Tuple->int, int):  The movement of the book. None if there is no book, or the position or the movement are not valid."""
+        if not self.opening_book or allowed_movements or restricted_movements:
+            return None
+        movement = self.opening_book.get_movement(all_cells, my_player, all_players)
+        if movement and any(fitness[0][0] == movement[0] and fitness[0][-1] == movement[-1] for fitness in fitnesses):
+            return movement
+        return None
+
+    def uses_search(self):
+        """Returns:
+            (boolean):  True if the current ai mode is one of the tree searchs (alpha-beta and montecarlo)."""
+        return 'alpha' in self.ai_mode or 'monte' in self.ai_mode
+
+    def generate_search_movement(self, board_hash, all_cells, current_map, my_player, all_players, allowed_movements=(), restricted_movements=(),\
+                                max_nodes=100, stop_token=None, adaptative=True):
+        """Runs the tree search algorithm of the current ai mode over the input board state.
+        Args:
+            board_hash (int):   Hash of the board parameters.
+            all_cells (Dict->int:Character):    Structure that have all the cells that currently have a char in them.
+            current_map (Dict->int:Path):   Path objects that describe each current cell for my_player.
+            my_player (int):    Unique identifier of the current player.
+            all_players (List->int):    List with all the players unique identifiers(uuid).
+            stop_token (:obj: SearchToken, default=None):   Token to stop the search from outside. If None, one with the round_timeout is used.
+            adaptative (boolean, default=True): False to not change the adaptative max depth with this search. The background searchs use it,
+                                                so only the searchs of the turns change the max_depth.
+        Returns:
+            (Tuple->int, int):  The best movement found by the search (source, destiny). None if the ai mode doesn't search."""
+        if 'alpha' in self.ai_mode and 'monte' in self.ai_mode: #This is the one to compare algorithms
+            if self.order//2 == 0:  #Order can only go from 0 to 3. players 0 and 1 get alpha beta
+                return self.generate_alpha_beta(max_nodes, all_cells, current_map, my_player, all_players, allowed_movs=allowed_movements,\
+                                    restricted_movs=restricted_movements, stop_token=stop_token, adaptative=adaptative)
+            else:                   #And players 2 and 3 montecarlo
+                return MonteCarloSearch.monte_carlo_tree_search(self.graph, self.distances, self.circum_size, board_hash, all_cells, current_map, my_player, all_players,\
+                                                                self.round_timeout, allowed_movs=allowed_movements, restricted_movs=restricted_movements, stop_token=stop_token,\
+                                                                policy=self.rollout_policy, rng=self.rng)
+        if 'alpha' in self.ai_mode:
+            if 'order' in self.ai_mode:
+                return self.generate_alpha_beta(max_nodes, all_cells, current_map, my_player, all_players, allowed_movs=allowed_movements,\
+                                                restricted_movs=restricted_movements, ordering=True, stop_token=stop_token, adaptative=adaptative)    
+            return self.generate_alpha_beta(max_nodes, all_cells, current_map, my_player, all_players, allowed_movs=allowed_movements,\
+                                                restricted_movs=restricted_movements, stop_token=stop_token, adaptative=adaptative)
+        if 'monte' in self.ai_mode:
+            return MonteCarloSearch.monte_carlo_tree_search(self.graph, self.distances, self.circum_size, board_hash, all_cells, current_map, my_player, all_players,\
+                                                            self.round_timeout, allowed_movs=allowed_movements, restricted_movs=restricted_movements, stop_token=stop_token,\
+                                                            rave=MonteCarloSearch.RAVE_EQUIVALENCE if 'rave' in self.ai_mode else 0, policy=self.rollout_policy,\
+                                                            rng=self.rng)
+
+    def generate_random_movement(self, fitnesses, totally_random=False, somewhat_random=False, allowed_movements=(), restricted_movements=()):
+        """Algorithm to return a next movement based in randomness and the score at which are rated the different possible moves.
+        Have 3 modes:
+            Totally random: A movement will be chosen from the possible ones at random.
+            Partially random: Will use a random, but the weights of each decission will be based on the score.
+            Pure fitnesses: Will take only the move with the highest score. If more than one share the highest, a random one will be chosen.
+        Args:
+            fitnesses: A list of tuples, each tuple containing the movement itself in the first position(another tuple),
+                    and the score for this movement in the second position
+            totally_random (boolean):   Flag that is True if the mode of the algorithm is totally random.
+            somewhat_random (boolean):  Flag that is True if the mode of the algorithm is partially random.
+        Returns:
+            (Tuple->int, int):  A movement calculated by the underlying algorithm. (source, destiny).
+        """
+        if totally_random:
+            return self.rng.choice(fitnesses)[0]
+        fitnesses.sort(key=lambda tup: tup[1], reverse=True)
+        if somewhat_random:
+            return self.rng.choices(fitnesses, weights=list(score[1] for score in fitnesses))[0][0]
+        else:
+            only_best_movements = list(score[0] for score in fitnesses if score[1] == fitnesses[0][1])  #IF the score is the same as the best elements inn the ordered list
+            return self.rng.choice(only_best_movements)
+
+    def generate_alpha_beta(self, max_nodes, all_cells, current_map, my_player_uuid, all_players, allowed_movs=(), restricted_movs=(), ordering=False, stop_token=None,\
+                            adaptative=True):
+        """Heuristic that uses the alpha-beta pruning to explore the game tree, reaching until the self.max_depth attribute, and
+        returning the evaluation of the board at that point. Then uses that value to cut off game tree branches that, obviously, would have
+        never ocurred in a normal gameplay.
+        Args:
+            max_nodes (int):    Limit to the expansion of the tree searchs. Unused right now.
+            all_cells (Dict->int:Character):    Structure that have all the cells that currently have a char in them. The key of each element 
+                                                if the index of the cell, and the value is the Character that resides in that cell.
+            current_map (Dict->int:Path):   Path objects that describe each current cell for a specific player.
+                                            (Says if there is a char, if it's an enemy or an ally...)
+            my_player_uuid (int):   Unique identifier of the current player.
+            all_players (List->int):    List with all the players unique identifiers(uuid).
+            ordering (boolean): True if we want to order the possible destinies in each iteration. More pruning, but less iterations.
+            stop_token (:obj: SearchToken, default=None):   Token with the limit of time, in seconds, that this method has to explore the game tree
+                                                            before forcibly returning. Can be stopped from outside. If None, one with the round_timeout is used.
+            adaptative (boolean, default=True): False to not count the timeout of this search for the adaptative max depth.
+        Returns:
+            (Tuple->int, int):  The best movement calculated in the execution until the end (source, destiny).
+        """
+        my_player_index = next((i for i in range(0, len(all_players)) if all_players[i] == my_player_uuid))
+        stop_token = stop_token if stop_token else SearchToken(self.round_timeout)
+        all_paths = {}
+        start = time.time()
+        pruned = {x: PersistantNumber() for x in range (0, self.max_depth)}
+        self.minimax(my_player_index, my_player_index, all_players, all_cells, current_map, all_paths, [], 0, True, -math.inf, math.inf, stop_token, pruned, ordering,\
+                    ZobristHash.hash_position(all_cells))
+        if adaptative and not stop_token.is_stopped() and stop_token.expired(): #If we reached the timeout...
+            self.increase_timeout_count()
+        LOG.log('info', "The number of paths tested by alpha beta is ", len(all_paths.keys()), " with a max depth setting of ", self.max_depth, ", in a time of ", time.time()-start, " seconds.",\
+                " Stopped from outside: ", stop_token.is_stopped())
+        LOG.log('info', "The number of pruned branches at different depths was ", {str(key): str(value) for key, value in pruned.items()})
+        LOG.log('info', "The evaluation cache status is ", EvaluationCache.stats())
+        rated_movements = [((dest[0], dest[1]), score) for dest, score in all_paths.items() if len(dest) > 1\
+                            and (dest[0], dest[1]) not in restricted_movs and (not allowed_movs or (dest[0], dest[1]) in allowed_movs)]
+        rated_movements.sort(key=lambda dest:dest[1], reverse=True)
+        return rated_movements[0][0] if rated_movements else None   #Returning only the movement, we have no use for the score
+
+    @staticmethod
+    def generate_movements(paths_graph, all_distances, circum_size, all_cells, current_map, current_player, my_turn=True, ordering=False):
+        """Generates and returns all the possible movements in a board state for a specific player and his characters.
+        Args:
+            paths_graph (:obj: numpy.Matrix):   Matrix of enabled/directly connected paths of the current board.
+            all_distances (:obj: numpy.Matrix): Distances matrix of the current board.
+            circum_size (int):  Length of each circumference of the board that this player will be in
+            all_cells (Dict->int:Character):    Structure that have all the cells that currently have a char in them. The key of each element 
+                                                if the index of the cell, and the value is the Character that resides in that cell.
+            current_map (Dict->int:Path):   Path objects that describe each current cell for a specific player.
+                                            (Says if there is a char, if it's an enemy or an ally...)
+            current_player (int):   Unique identifier of the current player.
+            my_turn (boolean, default=True):  Flag that says if its the turn of the current player or not. Useless right now, most likely a vestige.
+            ordering (boolean, default=False): True if we want to order the possible destinies in each iteration, using the fitnesses.
+        Returns:
+            (Dict->int, Tuple->ints):   Each key of the dict, is the index of the source cell, and each value, is a tuple containing all
+                                        the possible destiny cells from that source cell.
+        """
+        destinies = []
+        for cell_index, char_inside_cell in all_cells.items():
+            this_index_destinations = []
+            if char_inside_cell.owner_uuid == current_player and my_turn\
+            or char_inside_cell.owner_uuid != current_player and not my_turn:
+                paths = char_inside_cell.get_paths(paths_graph, all_distances, current_map, cell_index, circum_size)
+                if paths:
+                    destinies.extend([(cell_index, path[-1]) for path in paths])                          #(source_cell, dest_cell)
+        if ordering:
+            return SearchAgent.sort_movements(paths_graph, circum_size, all_cells, current_map, destinies)
+        return tuple(destinies) 
+
+    @staticmethod
+    def sort_movements(paths_graph, circum_size, all_cells, current_map, movements):
+        """Rates some movements with their fitness (rate_movements_lite), and sorts them.
+        Args:
+            paths_graph (:obj: numpy.Matrix):   Matrix of enabled/directly connected paths of the current board.
+            circum_size (int):  Length of each circumference of the board.
+            all_cells (Dict->int:Character):    Cells that currently have a char in them, and the char.
+            current_map (Dict->int:Path):   Path objects that describe each current cell for the player that moves.
+            movements (Iterable->Tuple->int, int):  Movements to sort (source, destiny). The repeated ones are rated once.
+        Returns:
+            (Tuple->Tuple->int, int, float):    The movements with their fitness (source, destiny, score), by decrecient fitness."""
+        destinies = collections.OrderedDict()   #{source_cell: [dest_cells]}
+        for source_index, destiny in movements:
+            destinies.setdefault(source_index, []).append(destiny)
+        scored = []
+        for source_index, this_index_destinations in destinies.items():
+            fitnesses = PathAppraiser.rate_movements_lite(source_index, this_index_destinations, paths_graph, current_map, all_cells, circum_size)
+            scored.extend([(source_index, dest, score) for dest, score in fitnesses.items()])   #(source_cell, dest_cell, score_movement)
+        scored.sort(key=lambda movement: movement[-1], reverse=True)  #Order by decrecient fitnesses
+        return tuple(scored)
+
+    def minimax(self, my_player_index, current_player_index, all_players, all_cells, current_map, all_paths, path, depth, isMaximizingPlayer, alpha, beta, stop_token, pruned, ordering,\
+                position_hash=None):
+        """Recursive algorithm. It's the core of the alpha-beta pruning AI, Exploring, expanding and cutting off branchs of the game tree. It is based in the MiniMax algorithm.
+        In a 2 player game, the algorithm goes switching right between maximizinf and minimizing mode. In a 4 player game, stays in minimazing for a bit more before returning to 
+        maximizing.
+        Args:
+            my_player_index (int):  Index of my player uuid in the list that hold all the uuids.
+            current_player_index (int): Index of the player uuid that currently holds the turn, in the all_player list.
+            all_players (List->int):    List with all the players unique identifiers(uuid).
+            all_cells (Dict->int:Character):    Structure that have all the cells that currently have a char in them. The key of each element 
+                                                if the index of the cell, and the value is the Character that resides in that cell.
+                                                Will be simulated and changed for other players as the algorithm explores the tree, and changed back when finished.
+            current_map (Dict->int:Path):   Path objects that describe each current cell for a specific player. 
+                                            Will be simulated and changed for other players as the algorithm explores the tree, and changed back when finished.
+            all_paths (Dict->Tuple:float):  Have all the paths that the algorithm has found until now (All the expansions until the max_depth/timeout), with the value that
+                                            moving until that board game state returned. Each key is the path in a tuple, and each float is the score.
+            path (List->ints):  Current expanding path. Will be converted to a tuple and analyzed when it reaches the max depth/timeout.
+            isMaximizingPlayer (boolean):   Flag that says if the algorithm is in a maximizing step (True) or it isn't (False).
+            alpha (float):  Current alpha value. Used for pruning.
+            beta (float):   Current beta value. Used for pruning.
+            stop_token (:obj: SearchToken): Token that says if we are out of time already or have been stopped. Holds the progress of the search too.
+            pruned (:obj: PersistantNumber): Number of branches that have been cut off in the execution.
+            ordering (boolean): True if we want to order the possible destinies in each iteration. More pruning, but less iterations.
+            position_hash (int, default=None):  Zobrist hash of all_cells, updated with each simulated movement. Calculated if None.
+        """
+        position_hash = position_hash if position_hash is not None else ZobristHash.hash_position(all_cells)
+        stop_token.visit(depth)
+        if depth is self.max_depth or stop_token.expired() or SearchAgent.at_end_game(all_cells):
+            if Evaluation.WEIGHTS:
+                value = EvaluationCache.get_value(('tuned', self.board_key, position_hash, all_players[my_player_index]), Evaluation.evaluate, self.graph, self.distances,\
+                                                self.circum_size, all_cells, current_map, all_players[my_player_index], all_players, self.promotion_cells)
+            else:
+                value = EvaluationCache.get_value(('minimax', position_hash, all_players[my_player_index]), SearchAgent.evaluate_board, all_cells, all_players[my_player_index])
+            all_paths[tuple(path)] = value  #This could also do it using only the first movm as key,since its the only one we are interested in. THe rest are garbage, who did those movements? no info about it
+            #del path[0] #Lets get that index out of here
+            return value
+        if isMaximizingPlayer:
+            bestVal = -math.inf 
+            #generate_movements returns a dict with the scheme: {cell_index_source: (all destinies)}
+            #for source_index, destinies in SearchAgent.generate_movements(self.graph, self.distances, self.circum_size, all_cells, current_map, all_players[current_player_index], ordering=ordering).items():
+            movements = SearchAgent.generate_movements(self.graph, self.distances, self.circum_size, all_cells, current_map, all_players[current_player_index], ordering=ordering)
+            stop_token.expand(len(movements))
+            for movement in movements:
+                source_index = movement[0]
+                if not path:    #First movement, this, we are interested in
+                    path.append(source_index)
+                dest_index = movement[1]
+                #for dest_index in movements[1]:
+                #SIMULATE MOVEMENT
+                char_moving = all_cells[source_index]   #Starting to save variables to restore later
+                char_ded = all_cells[dest_index] if dest_index in all_cells else None
+                had_enemy = current_map[source_index].enemy
+                #Start simulating
+                current_map[source_index].ally = False
+                current_map[source_index].access = True
+                current_map[dest_index].ally = True
+                current_map[dest_index].enemy = False   #Simulation in current_map correct
+                current_map[source_index].access = False
+                del all_cells[source_index]
+                all_cells[dest_index] = char_moving     #Simulation in all_cells correct
+                path.append(dest_index)
+                #Going deeper
+                #NEW CURRENT PLAYER
+                current_player_index = current_player_index+1 if current_player_index < (len(all_players)-1) else 0
+                SearchAgent.change_map(current_map, all_cells, all_players[current_player_index])
+                #RECURSIVE EXECUTION
+                        #minimax(self, my_player_index, current_player_index, all_players, all_cells, current_map, all_paths, path, depth, isMaximizingPlayer, alpha, beta, stop_token, pruned, ordering):
+                value = self.minimax(my_player_index, current_player_index, all_players, all_cells, current_map, all_paths, path, depth+1, False, alpha, beta, stop_token, pruned, ordering,\
+                                    ZobristHash.update(position_hash, source_index, dest_index, char_moving, char_ded))
+                #UNDO SIMULATION
+                current_map[source_index].ally = True
+                current_map[source_index].access = False
+                current_map[dest_index].ally = False
+                current_map[dest_index].enemy = had_enemy               #Restoration in current_map correct
+                current_map[dest_index].update_accessibility(char_moving)
+                all_cells[source_index] = char_moving                   #Restoration in all_cells correct
+                if not char_ded:    del all_cells[dest_index]           #If the cell we moved to didn't had an enemy
+                else:               all_cells[dest_index] = char_ded
+                del path[-1]
+                if len(path) is 1:  #If we have another source here
+                    del path[0]
+                #end of restoration
+                if depth == 0 and value > bestVal:  #Best movement until now, for the ones querying the progress
+                    stop_token.best_move = (source_index, dest_index)
+                bestVal = max(bestVal, value) 
+                alpha = max(alpha, value)
+                if beta <= value:   #Pruning
+                    pruned[depth].number += 1
+                    stop_token.cutoff(depth)
+                    return bestVal
+            return bestVal
+        else:   #Minimizing player
+            bestVal = math.inf  
+            #for source_index, destinies in SearchAgent.generate_movements(self.graph, self.distances, self.circum_size, all_cells, current_map, all_players[current_player_index], False, ordering=ordering).items():
+            movements = SearchAgent.generate_movements(self.graph, self.distances, self.circum_size, all_cells, current_map, all_players[current_player_index], ordering=ordering)
+            stop_token.expand(len(movements))
+            for movement in movements:
+                source_index = movement[0]
+                dest_index = movement[1]
+                #SIMULATE MOVEMENT
+                char_moving = all_cells[source_index]   #Starting to save variables to restore later
+                char_ded = all_cells[dest_index] if dest_index in all_cells else None
+                had_enemy = current_map[source_index].enemy
+                #Start simulating
+                current_map[source_index].ally = False
+                current_map[source_index].access = True
+                current_map[dest_index].ally = True
+                current_map[dest_index].enemy = False   #Simulation in current_map correct
+                current_map[source_index].access = False
+                del all_cells[source_index]
+                all_cells[dest_index] = char_moving     #Simulation in all_cells correct
+                path.append(dest_index)
+                #Going deeper     
+                #NEW CURRENT PLAYER
+                current_player_index = current_player_index+1 if current_player_index < (len(all_players)-1) else 0
+                SearchAgent.change_map(current_map, all_cells, all_players[current_player_index])
+                if current_player_index == my_player_index: #Checking this cuz it could have more than 2 players
+                    isMaximizingPlayer = not isMaximizingPlayer
+                value = self.minimax(my_player_index, current_player_index, all_players, all_cells, current_map, all_paths, path, depth+1, isMaximizingPlayer, alpha, beta, stop_token, pruned, ordering,\
+                                    ZobristHash.update(position_hash, source_index, dest_index, char_moving, char_ded))
+                #UNDO SIMULATION
+                current_map[source_index].ally = True
+                current_map[source_index].access = False
+                current_map[dest_index].ally = False
+                current_map[dest_index].enemy = had_enemy               #Restoration in current_map correct
+                current_map[dest_index].update_accessibility(char_moving)
+                all_cells[source_index] = char_moving                   #Restoration in all_cells correct
+                if not char_ded:    del all_cells[dest_index]           #If the cell we moved to didn't had an enemy
+                else:               all_cells[dest_index] = char_ded
+                del path[-1]
+                #end of restoration
+                bestVal = min(bestVal, value) 
+                beta = min(beta, value)
+                if beta <= alpha:   #Pruning
+                    pruned[depth].number += 1
+                    stop_token.cutoff(depth)
+                    return bestVal
+            return bestVal
+
+    @staticmethod
+    def evaluate_board(all_cells, player):
+        """Evaluation of the leafs of alpha-beta. The value of the chars of the player, divided by the value of the enemy ones.
+        Args:
+            all_cells (Dict->int:Character):    Cells that currently have a char in them, and the char.
+            player (int):   uuid of the player for whom the board is evaluated.
+        Returns:
+            (float):    Score of the board."""
+        my_value = sum(char.value for char in all_cells.values() if char.owner_uuid == player)
+        try:
+            return my_value/sum(char.value for char in all_cells.values() if char.owner_uuid != player)   #My chars left minus his chars left
+        except ZeroDivisionError:
+            return my_value
+
+    @staticmethod
+    def change_to_next_player(current_player_index, my_player_index, all_players, current_map):
+        """Static method that changes the current_map structure to be able to simulate the turn of the next player.
+        Auxiliar method of alpha-beta. Unused right now.
+        Args:
+            current_player_index (int): Index of the player uuid that currently holds the turn, in the all_player list.
+            my_player_index (int):  Index of my player uuid in the list that hold all the uuids.
+            all_players (List->int):    List with all the players unique identifiers(uuid).
+            current_map (Dict->int:Path):   Path objects that describe each current cell for a specific player. 
+        Returns:
+            (int): The index of the new current player (In the all_players list)."""
+        current_player_index = current_player_index+1 if current_player_index < (len(all_players)-1) else 0
+        if isMaximizingPlayer and current_player_index == my_player_index or not isMaximizingPlayer and current_player_index != my_player_index:
+            isMaximizingPlayer = not isMaximizingPlayer
+            SearchAgent.reverse_map(current_map)
+        return current_player_index
+
+    @staticmethod
+    def reverse_map(current_map):
+        """Reverses enemies and allies in the current_map structure. Useful in simulations.
+        If both were False they keep being False.
+        Args:
+            current_map (Dict->int:Path):   Path objects that describe each current cell for a specific player."""
+        for path_obj in current_map.values():
+            if path_obj.ally or path_obj.enemy: #If there is a char in it
+                path_obj.ally = not path_obj.ally
+                path_obj.enemy = not path_obj.enemy #Reversing indeed. Its just that.
+
+    @staticmethod
+    def change_map(current_map, all_cells, new_player_uuid):
+        """Changes the current_map structure to match another player (the enemies and allies and such).
+        Args:
+            current_map (Dict->int:Path):   Path objects that describe each current cell for a specific player.
+            new_player_uuid (int):  The uuid of the player that the current_map must match."""
+        for cell_index, char in all_cells.items():  #The only cells in tthe keys of this structure are the ones with characters
+            if char.owner_uuid == new_player_uuid:
+                current_map[cell_index].ally = True
+                current_map[cell_index].enemy = False
+            else:
+                current_map[cell_index].ally = False
+                current_map[cell_index].enemy = True
+            current_map[cell_index].update_accessibility(char)
+
+    @staticmethod
+    def is_winning_move(all_cells, fitnesses, my_player):
+        """Checks if there is only another essential piece left, and if that piece is within the reach
+        of the players possible movements in this turn. Returns the movement if it's possible, and None otherwise."""
+        essential_pieces_left = sum(1 for char in all_cells.values() if char.essential and char.owner_uuid != my_player)
+        if essential_pieces_left == 1:
+            enemy_essential_piece_index = next(key for key, char in all_cells.items() if char.essential and char.owner_uuid != my_player)
+            #FORMAT of fitnesses: [(movements, score), ...] -- [((23, 22), 0.4332432), ((0, 17), 0.123412)] 
+            for fitness_score in fitnesses:
+                if enemy_essential_piece_index == fitness_score[0][-1]: #FORMAT of each fitness_score: ((23, 22), 0.4332432)
+                    return fitness_score[0] #The movement
+
+    @staticmethod
+    def at_end_game(all_cells):
+        """Checks if the board game has reached and end. Does this by checking all the essential pieces left, and checking if they belong to more
+        than one player. (If there are only essential pieces from a player left)
+        Args:
+            all_cells (Dict -- cell_index:char in there):   All the cells with chars in the board
+        Returns:
+            (boolean):  True if the board state is final, this means, the game is over. False otherwise."""
+        all_essential_pieces = []
+        for char in all_cells.values():
+            if char.essential:
+                all_essential_pieces.append(char)
+        return False if any(char.owner_uuid != all_essential_pieces[0].owner_uuid for char in all_essential_pieces) else True
+
+#Monte carlo tree search from here on
+class Node(object):
+    """Class Node. Core class that is pretty much essential for the MonteCarlo heuristic to work properly.
+    Each instance of this class represents a Node/leaf in the game tree. Each node has information about the board state
+    that it holds.
+    Attributes:
+        parent (:obj:Node): Direct parent of this node. The one that 'created' you when expanding itself.
+        previous_movement (Tuple->int, int):    Movement that led to this node. Useful when returning it in the root method of the montecarlo.
+        player (int):   uuid of the player that did the previous_movement. None in the root.
+        paths_graph (:obj: numpy.Matrix):   Matrix of enabled/directly connected paths of the current board.
+        distances (:obj: numpy.Matrix): Distances matrix of the current board.
+        circum_size (int):   Length of each circumference of the board that this player will be in.
+        board_hash (int):   Hash produced by the current board_state. Useful when indexing/saving.
+        state_hash (int):   Zobrist hash of the board_state. Key of the evaluations in the EvaluationCache.
+        board_state (Dict->int:Character):  Structure that have all the cells that currently have a char in them. The key of each element 
+                                    if the index of the cell, and the value is the Character that resides in that cell.
+        map_state (Dict->int:Path):   Path objects that describe each current cell for a specific player.
+                                        (Says if there is a char, if it's an enemy or an ally...)
+        children (List->Nodes): All the nodes that have direct descendency of this one when expanded. Like the 'sons' of this node.
+        visited (boolean):  Flag that says if this node have been visited.
+        total_n (int):  Times that this Node have been selected for rollout/been visited.
+        total_value (float):    Total value that the simulations that have this node in their 'game path' returned.
+        amaf_n (int):   Simulations from the parent of this node in which the previous_movement of this node was played, at any point (All moves as first).
+        amaf_value (float): Total value that those simulations returned. Used by RAVE.
+        untried_movements (List->Tuple->int, int):  Movements without a child yet. None until the first expansion.
+        widening (boolean): True if the children of this node are added progressively, in order of prior fitness, as it gets visited.
+    """
+    def __init__(self, parent, paths_graph, distances, circum_size, board_hash, board_state, map_state, previous_movement, state_hash=None):
+        """Node constructor.
+        Args:
+            parent (:obj:Node): Direct parent of this node. The one that 'created' you when expanding itself.
+            paths_graph (:obj: numpy.Matrix):   Matrix of enabled/directly connected paths of the current board.
+            distances (:obj: numpy.Matrix): Distances matrix of the current board.
+            circum_size (int):   Length of each circumference of the board that this player will be in.
+            board_hash (int):   Hash produced by the current board_state. Useful when indexing/saving.
+            board_state (Dict->int:Character):  Structure that have all the cells that currently have a char in them. The key of each element 
+                                        if the index of the cell, and the value is the Character that resides in that cell.
+            map_state (Dict->int:Path):   Path objects that describe each current cell for a specific player.
+                                            (Says if there is a char, if it's an enemy or an ally...) 
+            previous_movement (Tuple->int, int):    Movement that led to this node. Useful when returning it in the root method of the montecarlo.       
+            state_hash (int, default=None): Zobrist hash of the board_state. Calculated from scratch if None.
+        """
+        self.parent = parent
+        self.previous_movement = previous_movement 
+        self.player = board_state[previous_movement[1]].owner_uuid if parent else None
+        #Board params - Some of those wont be modified, so its okay to save them as references
+        self.paths_graph = paths_graph
+        self.distances = distances
+        self.circum_size = circum_size
+        self.board_hash = board_hash
+        #Those 4 settings up there are inherited by the lower nodes
+        self.state_hash = state_hash if state_hash is not None else ZobristHash.hash_position(board_state)
+        self.board_state = board_state#{cell_index: character}
+        self.map_state = map_state    #{cell_index: path object}
+        self.children = []
+        self.visited = False
+        self.total_n = 0
+        self.total_value = 0
+        self.amaf_n = 0
+        self.amaf_value = 0
+        self.untried_movements = None
+        self.widening = False
+
+    def expand(self, current_player, progressive=False, stop_token=None, allowed_movs=(), restricted_movs=()):
+        """Expands this node, effectively creating as many nodes or states as movements are possible from the board state of this node.
+        If its already expanded, does nothing. 
+        With progressive widening, if there are more movements than MonteCarloSearch.WIDENING_THRESHOLD, they are sorted by their
+        fitness (rate_movements_lite), and only the children that the visits of this node allow are created. The next ones are created 
+        in later calls, as the visits grow.
+        Creates and adds the children of this node to the self.children attribute.
+        Args:
+            current_player (int):   UUID of the player that holds the turn in this node.
+            progressive (boolean, default=False):   True to use progressive widening in the nodes with lots of movements.
+            stop_token (:obj: SearchToken, default=None):   Token of the search. The first expansion is registered in it.
+            allowed_movs (Iterable->Tuple->int, int, default=()):   If not empty, the only movements (source, destiny) that get a child.
+                                                                    Only checked in the first expansion, before the widening.
+            restricted_movs (Iterable->Tuple->int, int, default=()):    Movements that don't get a child. Only checked in the first expansion."""
+        if self.untried_movements is None:  #First expansion
+            movements = SearchAgent.generate_movements(self.paths_graph, self.distances, self.circum_size, self.board_state, self.map_state, current_player)
+            if allowed_movs or restricted_movs:
+                movements = [movement for movement in movements if movement not in restricted_movs and (not allowed_movs or movement in allowed_movs)]
+            if stop_token:
+                stop_token.expand(len(movements))
+            if progressive and len(movements) > MonteCarloSearch.WIDENING_THRESHOLD:
+                self.widening = True
+                movements = SearchAgent.sort_movements(self.paths_graph, self.circum_size, self.board_state, self.map_state, movements)  #Sorted by fitness
+            self.untried_movements = list(reversed(movements))  #The best ones at the end, to pop them
+        max_children = MonteCarloSearch.get_max_children(self.total_n) if self.widening else math.inf
+        while self.untried_movements and len(self.children) < max_children:
+            self.add_child(self.untried_movements.pop())
+
+    def add_child(self, movement):
+        """Creates the child that results from doing a movement in the board state of this node, and adds it to the self.children attribute.
+        Args:
+            movement (Tuple->int, int): Movement of the child (source, destiny). Can have more elements (Like the fitness), they are ignored."""
+        source_index = movement[0]
+        dest_index = movement[1]
+        all_cells_node = self.board_state.copy()
+        current_map = {cell_index: path_obj.copy() for cell_index, path_obj in self.map_state.items()}
+        state_hash = ZobristHash.update(self.state_hash, source_index, dest_index, all_cells_node[source_index], all_cells_node.get(dest_index))
+        #Start simulating, all_cells
+        all_cells_node[dest_index] = all_cells_node[source_index]
+        del all_cells_node[source_index]
+        #simulating in current_map
+        current_map[source_index].ally = False
+        current_map[source_index].access = True
+        current_map[dest_index].ally = True
+        current_map[dest_index].enemy = False
+        current_map[dest_index].access = False  
+        #CREATES THE CHILDREN
+        self.children.append(Node(self, self.paths_graph, self.distances, self.circum_size, self.board_hash, all_cells_node, current_map, (source_index, dest_index),\
+                                state_hash))    #God knows how much this will occupy in memory...
+    
+    def get_depth(self):
+        """Returns:
+            (int):  Number of movements between the root of the tree and this node."""
+        depth = 0
+        node = self
+        while node.parent:
+            depth += 1
+            node = node.parent
+        return depth
+
+    def get_uct_value(self, exploration_const=1, rave_equivalence=0):
+        """Calculates the (upper confidence bound applied to trees) value of this node.
+        With RAVE, the mean value is blended with the all moves as first one. The weight of the latter decreases
+        as the node gets visited, following beta = sqrt(k/(3n+k)).
+        Args:
+            exploration_const (float, default=1):   Constant that makes the exploration part of the algorithm higher or lower.
+            rave_equivalence (float, default=0):    Visits (k) at which both values weight the same. 0 to not use RAVE.
+        Returns:
+            (float):    Current UBCT of this node."""
+        if rave_equivalence and self.amaf_n > 0:
+            amaf_mean = self.amaf_value/self.amaf_n
+            if self.total_n == 0:   #Only the moves as first statistics are known
+                return amaf_mean+(exploration_const*(math.sqrt(math.log(self.parent.total_n+1))))
+            beta = math.sqrt(rave_equivalence/(3*self.total_n+rave_equivalence))
+            mean = (1-beta)*(self.total_value/self.total_n)+beta*amaf_mean
+            return mean+(exploration_const*(math.sqrt(math.log(self.parent.total_n)/self.total_n)))
+        if self.total_n == 0: 
+            return math.inf
+        return (self.total_value/self.total_n)+(exploration_const*(math.sqrt(math.log(self.parent.total_n)/self.total_n))) #Upper Confidence bound applied to trees
+
+    def board_evaluation(self, player):
+        """Calculates a score for the current board, taking into account the input player.
+        The higher the total value char of the input player is, the higher the score.
+        Args:
+            player (int):   UUID of the player for whom the scoring of the board will be processed.
+        The score is saved in the EvaluationCache, keyed by the state_hash of this node.
+        Returns:
+            (float):    Score of the board state of this node."""
+        return EvaluationCache.get_value(('montecarlo', self.state_hash, player), Node.evaluate, self.board_state, player)
+
+    @staticmethod
+    def evaluate(board_state, player):
+        """Calculates the score of a board state for the input player. Same as board_evaluation, without needing a Node.
+        Args:
+            board_state (Dict->int:Character):  Cells that currently have a char in them, and the char.
+            player (int):   UUID of the player for whom the scoring of the board will be processed.
+        Returns:
+            (float):    Score of the board state."""
+        my_total_char_value = sum(char.value for char in board_state.values() if char.owner_uuid == player)
+        try:
+            return (my_total_char_value/sum(char.value for char in board_state.values() if char.owner_uuid != player))*my_total_char_value
+        except ZeroDivisionError:   #No enemies left, so the sum would be zero
+             return my_total_char_value*my_total_char_value
+
+class RolloutPolicy(object):
+    """RolloutPolicy class. Holds the policies that choose the movements of the montecarlo simulations.
+    None of them has to retry: each character of the player is checked once at most, and if none can move, the policy returns None.
+    The destinies come from a table of the different destinies of each cell, precomputed from the paths LUT (Movements). The characters 
+    that only have a restriction (Warriors, wizards, matron mothers) don't need to check their paths step by step, just their destinies.
+    More policies can be added with register.
+    General class attributes:
+        EPSILON (float, default=0.2):   Chance of the epsilon greedy policy to choose a random movement instead of the best scored one.
+        POLICIES (Dict->String:Callable):   Policies by name. Each one is called with (paths_graph, distances, circum_size, board_state, map_state, player_uuid, rng)
+                                            and returns a movement (source, destiny), or None if the player can't move. rng is the source of the random numbers.
+        DESTINIES (Dict->int:Tuple):    For each hash of Restriction, the LUT that generated the table and the table itself,
+                                        with the different destinies of each cell.
+    """
+    EPSILON = 0.2
+    POLICIES = {}
+    DESTINIES = {}
+
+    @staticmethod
+    def register(name, policy):
+        """Adds a policy, or replaces the one with the same name.
+        Args:
+            name (String):  Name of the policy.
+            policy (Callable):  Method that receives (paths_graph, distances, circum_size, board_state, map_state, player_uuid, rng=random) 
+                                and returns a movement, or None if there isn't any."""
+        RolloutPolicy.POLICIES[name] = policy
+
+    @staticmethod
+    def get(name):
+        """Returns:
+            (Callable): The policy with the input name. If there isn't one, the random one."""
+        return RolloutPolicy.POLICIES.get(name, RolloutPolicy.random_character)
+
+    @staticmethod
+    def get_destinies_table(paths_graph, distances, circum_size, restriction):
+        """Returns the different destinies of each cell with a restriction. Generated from the paths LUT the first time,
+        and again if the LUT changes (A new board).
+        Returns:
+            (Dict->int:Tuple->int): Destinies of each cell."""
+        paths = Movements.get_movements(hash(restriction))
+        if not paths:
+            Movements.set_movements(paths_graph, distances, circum_size, restriction)
+            paths = Movements.get_movements(hash(restriction))
+        cached = RolloutPolicy.DESTINIES.get(hash(restriction))
+        if not cached or cached[0] is not paths:
+            cached = (paths, {index: tuple(set(path[-1] for path in cell_paths)) for index, cell_paths in paths.items()})
+            RolloutPolicy.DESTINIES[hash(restriction)] = cached
+        return cached[1]
+
+    @staticmethod
+    def get_destinies(paths_graph, distances, circum_size, map_state, index, char):
+        """Returns:
+            (List->int):    The different destinies of the char in the index cell. The map_state must be of the owner of the char."""
+        char_type = char.get_type()
+        if char_type in ('warrior', 'wizard', 'matron_mother'):    #Only a restriction, the same check than Rules.restricted_paths
+            destinies = RolloutPolicy.get_destinies_table(paths_graph, distances, circum_size, Rules.RESTRICTIONS[char_type]).get(index, ())
+            return [destiny for destiny in destinies if map_state[destiny].accessible() and not map_state[destiny].has_ally()]
+        return list(set(path[-1] for path in char.get_paths(paths_graph, distances, map_state, index, circum_size)))
+
+    @staticmethod
+    def legal_movements(paths_graph, distances, circum_size, board_state, map_state, player_uuid):
+        """Returns:
+            (List->Tuple->int, int):    All the different movements (source, destiny) of the input player. The map_state must be of this player."""
+        return [(index, destiny) for index, char in board_state.items() if char.owner_uuid == player_uuid\
+                for destiny in RolloutPolicy.get_destinies(paths_graph, distances, circum_size, map_state, index, char)]
+
+    @staticmethod
+    def static_score(movement, board_state, player_uuid):
+        """Cheap score of a movement. The value of the enemy captured in the destiny, if any.
+        Returns:
+            (float):    Score of the movement."""
+        target = board_state.get(movement[1])
+        return target.value if target and target.owner_uuid != player_uuid else 0
+
+    @staticmethod
+    def random_character(paths_graph, distances, circum_size, board_state, map_state, player_uuid, rng=random):
+        """Chooses a random character that can move, and a random destiny of it. The characters are checked in random order,
+        each one once, so only the destinies of the characters checked until one can move are generated. The cheapest policy."""
+        allies = [index for index, char in board_state.items() if char.owner_uuid == player_uuid]
+        rng.shuffle(allies)
+        for index in allies:
+            destinies = RolloutPolicy.get_destinies(paths_graph, distances, circum_size, map_state, index, board_state[index])
+            if destinies:
+                return (index, rng.choice(destinies))
+        return None
+
+    @staticmethod
+    def uniform(paths_graph, distances, circum_size, board_state, map_state, player_uuid, rng=random):
+        """Chooses one of the legal movements at random, all of them with the same chance."""
+        movements = RolloutPolicy.legal_movements(paths_graph, distances, circum_size, board_state, map_state, player_uuid)
+        return rng.choice(movements) if movements else None
+
+    @staticmethod
+    def capture_first(paths_graph, distances, circum_size, board_state, map_state, player_uuid, rng=random):
+        """Chooses a random capture if there is any. Otherwise, a random movement."""
+        movements = RolloutPolicy.legal_movements(paths_graph, distances, circum_size, board_state, map_state, player_uuid)
+        captures = [movement for movement in movements if RolloutPolicy.static_score(movement, board_state, player_uuid) > 0]
+        return rng.choice(captures if captures else movements) if movements else None
+
+    @staticmethod
+    def epsilon_greedy(paths_graph, distances, circum_size, board_state, map_state, player_uuid, rng=random):
+        """Chooses a random movement with EPSILON chance. Otherwise, one of the movements with the best static score."""
+        if rng.random() < RolloutPolicy.EPSILON:
+            return RolloutPolicy.random_character(paths_graph, distances, circum_size, board_state, map_state, player_uuid, rng=rng)
+        movements = RolloutPolicy.legal_movements(paths_graph, distances, circum_size, board_state, map_state, player_uuid)
+        if not movements:
+            return None
+        scores = [RolloutPolicy.static_score(movement, board_state, player_uuid) for movement in movements]
+        best_score = max(scores)
+        return rng.choice([movement for movement, score in zip(movements, scores) if score == best_score])
+
+RolloutPolicy.register('random', RolloutPolicy.random_character)
+RolloutPolicy.register('uniform', RolloutPolicy.uniform)
+RolloutPolicy.register('capture', RolloutPolicy.capture_first)
+RolloutPolicy.register('greedy', RolloutPolicy.epsilon_greedy)
+Evaluation.load()
+
+class MonteCarloSearch(object):
+    """MonteCarloSearch class. Holds all the static methods and steps needed to perform a MonteCarlo heuristic.
+    This heuristic have, in short, 4 steps:
+        EXPANSION:  A node is selected (and expanded if needed) to check the immediate possible movements.
+        TRAVERSION: From the possible nodes, one is chosen.
+        SIMULATION/ROLLOUT: From that chosen node, the board simulates all the players movements until it reaches an end state.
+        BACKPROPAGATION:    The game takes the score of that final state board, and propagates it back all the way to the root node.
+    Optionally, it can use RAVE (Rapid action value estimation): Each movement played in a simulation updates the all moves as first statistics
+    of the siblings that play it, so the good movements are spotted with way fewer iterations.
+    General class attributes:
+        EXPLORATION_CONSTANT (float, default=1.5):  Constant used in the uct algorithm of the nodes. The higher the value, the higher the exploration in the tree.
+        RAVE_EQUIVALENCE (float, default=300):  Visits of a node at which its own value and its RAVE value weight the same. The modes with rave use it.
+        WIDENING_THRESHOLD (int, default=30):   Movements of a node above which its children are added progressively.
+        WIDENING_CONSTANT (float, default=2):   Children allowed in a widening node, multiplied by its (visits+1)^WIDENING_EXPONENT.
+        WIDENING_EXPONENT (float, default=0.5): Growth of the children allowed in a widening node with its visits.
+        ROLLOUT_POLICY (String, default='random'):  Name of the RolloutPolicy used by the simulations when none is requested.
+    """
+    EXPLORATION_CONSTANT = 1.5
+    RAVE_EQUIVALENCE = 300
+    WIDENING_THRESHOLD = 30
+    WIDENING_CONSTANT = 2
+    WIDENING_EXPONENT = 0.5
+    ROLLOUT_POLICY = 'random'
+    @staticmethod
+    def monte_carlo_tree_search(paths_graph, distances, circum_size, board_hash, all_cells, current_map, my_player, all_players, round_timeout,\
+                                allowed_movs=(), restricted_movs=(), stop_token=None, rave=0, progressive=True, policy=None, rng=random): #10 seconds of computational power
+        """Runs the montecarlo tree search from the input board state until the stop_token expires.
+        Args:
+            rave (float, default=0):    Equivalence constant of RAVE. 0 to use plain UCT.
+            progressive (boolean, default=True):    True to use progressive widening in the nodes with more than WIDENING_THRESHOLD movements.
+            policy (String, default=None):  Name of the RolloutPolicy of the simulations. ROLLOUT_POLICY if None.
+            rng (:obj: random.Random, default=random):  Source of the random numbers of the simulations.
+        Returns:
+            (Tuple->int, int):  The most visited movement from the root."""
+        stop_token = stop_token if stop_token else SearchToken(round_timeout)
+        my_player_index = next((i for i in range(0, len(all_players)) if all_players[i] == my_player))
+        current_player_index = my_player_index
+        root_node = Node(None, paths_graph, distances, circum_size, board_hash, all_cells, current_map, (-1, -1))
+        root_node.expand(all_players[current_player_index], progressive=progressive, stop_token=stop_token, allowed_movs=allowed_movs, restricted_movs=restricted_movs)
+        start = time.time()
+        iters = 0
+        while not stop_token.expired():
+            leaf = MonteCarloSearch.traverse(root_node, all_players[current_player_index], rave=rave, progressive=progressive, stop_token=stop_token) #leaf = unvisited node, EXPANSION
+            simulated_movements = [] if rave else None
+            simulation_result = MonteCarloSearch.rollout(leaf, all_players, my_player_index, current_player_index, stop_token=stop_token,\
+                                                        movements=simulated_movements, policy=policy, rng=rng)     #ROLLOUT
+            MonteCarloSearch.backpropagate(leaf, simulation_result, simulated_movements)                            #BACKPROPAGATION
+            stop_token.visit(leaf.get_depth())
+            stop_token.rollouts += 1
+            stop_token.best_move = max(root_node.children, key=lambda node:node.total_n).previous_movement if root_node.children else None
+            #CHECKS NEW TURN FOR THE NEW SIMULATION AND ROLLOUT
+            current_player_index = current_player_index+1 if current_player_index < (len(all_players)-1) else 0
+            SearchAgent.change_map(current_map, all_cells, all_players[current_player_index])    #Change current map to be of the next player
+            iters += 1
+        LOG.log('info', "MonteCarlo method completed ", iters, " iterations of the complete algorithm in ", time.time()-start, " seconds.",\
+                " Stopped from outside: ", stop_token.is_stopped())
+        LOG.log('info', "The evaluation cache status is ", EvaluationCache.stats())
+        nodes = [node for node in root_node.children if node.previous_movement not in restricted_movs and (not allowed_movs or node.previous_movement in allowed_movs)]
+        return max(nodes, key=lambda node:node.total_n).previous_movement if nodes else None  #With widening, the allowed ones may have no child yet
+
+    @staticmethod
+    def traverse(node, current_player, rave=0, progressive=True, stop_token=None):
+        """This method does the traverse part of the MonteCarlo heuristic.
+        First, gets a node. If this node has an unexplored son, chose this one. Otherwise, gets the son with the highest UCT value, 
+        and expands this one. Then it gets one of the last expanded node children.
+        With RAVE, the unexplored sons are ranked with their all moves as first value too, instead of taking the first one.
+        Each node in the way is expanded again, so the ones with progressive widening get new children as their visits grow.
+        Args:
+            current_player (int):   uuid of the player that has the turn in this step.
+            rave (float, default=0):    Equivalence constant of RAVE. 0 to use plain UCT.
+            progressive (boolean, default=True):    True to use progressive widening.
+            stop_token (:obj: SearchToken, default=None):   Token of the search, that counts the nodes expanded.
+        Returns
+            (:obj:Node):    The final chosen node to do rollout/simulate from."""
+        if rave:    #The unexplored sons can have all moves as first statistics, so all of them compete through their value
+            while True:
+                node.expand(current_player, progressive=progressive, stop_token=stop_token)  #If its already expanded, it will only add the children that widening allows
+                if not node.children:
+                    return node
+                node = max(node.children, key=lambda child:child.get_uct_value(exploration_const=MonteCarloSearch.EXPLORATION_CONSTANT, rave_equivalence=rave))
+                if node.total_n == 0:
+                    return node
+        leaf = None
+        while not leaf:
+            node.expand(current_player, progressive=progressive, stop_token=stop_token)  #If its already expanded, it will only add the children that widening allows
+            leaf = next((child for child in node.children if child.total_n == 0), None)   #Get the first child unexplored, or the best one
+            if not leaf: #If unexplored, gets the one with the best UCT value to expand it and get leafs in the next loop
+                if node.children:
+                    node = max((child for child in node.children), key=lambda child:child.get_uct_value(exploration_const=MonteCarloSearch.EXPLORATION_CONSTANT))
+                else:
+                    leaf=node
+        return leaf
+
+    @staticmethod
+    def get_max_children(visits):
+        """Returns:
+            (int):  Children allowed by progressive widening in a node with the input visits."""
+        return max(1, int(MonteCarloSearch.WIDENING_CONSTANT*((visits+1)**MonteCarloSearch.WIDENING_EXPONENT)))
+
+    @staticmethod
+    def rollout(node, all_players, my_player_index, current_player_index, stop_token=None, movements=None, policy=None, rng=random):
+        """Simulates movements across the players in the board until it reaches an end state. Then it returns the value of this end state.
+        The movements are chosen according to the policy of the method. Normally random.
+        The simulation is done over a single copy of the board state of the node, without creating any node.
+        The zobrist hash of the simulated board is updated with each movement, so the end state is evaluated through the EvaluationCache.
+        Args:
+            all_players (List->int):    List with all the players unique identifiers(uuid).
+            current_player_index (int): Index of the player uuid that currently holds the turn, in the all_player list.
+            my_player_index (int):  Index of my player uuid in the list that hold all the uuids.
+            stop_token (:obj: SearchToken, default=None):   If it expires, the simulation ends and the current board is evaluated.
+                                                            The movements simulated are added to its rollout_plies.
+            movements (List, default=None): If supplied, the simulated movements are appended to it, with the uuid of the player
+                                            that did each one ((source, destiny), player).
+            policy (String, default=None):  Name of the RolloutPolicy to use. ROLLOUT_POLICY if None.
+            rng (:obj: random.Random, default=random):  Source of the random numbers of the policy.
+        Returns:
+            (float):    The value of the end board that we have reached through simulation (value for my player)."""
+        board_state = node.board_state.copy()
+        map_state = {cell_index: path_obj.copy() for cell_index, path_obj in node.map_state.items()}
+        current_player = current_player_index   #We copy this (basic type) so we don't modify it for the calling method
+        state_hash = node.state_hash
+        passes = 0
+        while not SearchAgent.at_end_game(board_state):
+            if stop_token and stop_token.expired():
+                break
+            movement = MonteCarloSearch.rollout_policy(node, board_state, map_state, all_players[current_player], policy=policy, rng=rng)
+            if movement:
+                moving_char = board_state[movement[0]]
+                captured_char = MonteCarloSearch.simulate_movement(board_state, map_state, movement)
+                state_hash = ZobristHash.update(state_hash, movement[0], movement[1], moving_char, captured_char)
+                passes = 0
+                if movements is not None:
+                    movements.append((movement, all_players[current_player]))
+                if stop_token:
+                    stop_token.rollout_plies += 1
+            else:
+                passes += 1
+                if passes >= len(all_players):  #Nobody can move
+                    break
+            current_player = current_player+1 if current_player < (len(all_players)-1) else 0
+        return EvaluationCache.get_value(('montecarlo', state_hash, all_players[my_player_index]), Node.evaluate, board_state, all_players[my_player_index])
+    
+    @staticmethod
+    def rollout_policy(node, board_state, map_state, player_uuid, policy=None, rng=random):
+        """This method choose the next step in the simulation, according to the configured policy. It's done with simulate_movement.
+        Args:
+            node (:obj:Node):   Node from which the simulation started. Holds the board matrices.
+            board_state (Dict->int:Character):  Simulated cells with a char in them.
+            map_state (Dict->int:Path): Simulated map. Changed to be of the input player.
+            player_uuid (int):  uuid of the player that holds the turn. The resulting possible movements will be generated
+                                according to this player. Then one will be chosen.
+            policy (String, default=None):  Name of the RolloutPolicy to follow to choose the steps in the simulation. ROLLOUT_POLICY if None.
+            rng (:obj: random.Random, default=random):  Source of the random numbers of the policy.
+        Returns:
+            (Tuple->int, int):  The chosen movement (next step). None if the player can't move."""
+        SearchAgent.change_map(map_state, board_state, player_uuid)    #Change current map to be of the current player
+        movement = RolloutPolicy.get(policy if policy else MonteCarloSearch.ROLLOUT_POLICY)(node.paths_graph, node.distances, node.circum_size,\
+                                                                                            board_state, map_state, player_uuid, rng=rng)
+        return tuple(movement) if movement else None
+
+    @staticmethod
+    def simulate_movement(board_state, map_state, movement):
+        """Does a movement of the simulation in the input structures.
+        Args:
+            board_state (Dict->int:Character):  Simulated cells with a char in them. Modified with the movement.
+            map_state (Dict->int:Path): Simulated map of the player that moves. Modified with the movement.
+            movement (Tuple->int, int): Movement to do (source, destiny).
+        Returns:
+            (:obj: Character):  The char that was in the destiny cell. None if it was empty."""
+        source_index, destiny = movement
+        captured_char = board_state.get(destiny)
+        board_state[destiny] = board_state.pop(source_index)
+        #simulating in current_map
+        map_state[source_index].ally = False
+        map_state[source_index].enemy = False
+        map_state[source_index].access = True   #No one left in here, so you can do it
+        map_state[destiny].ally = True
+        map_state[destiny].enemy = False
+        map_state[destiny].access = False       #An ally here
+        return captured_char
+
+    @staticmethod
+    def backpropagate(node, result, movements=None):
+        """Backpropagates the result input through all the parents, all the way to the top of the tree.
+        Also increases the n value of those nodes in 1. UCT things.
+        If the simulated movements are supplied, the all moves as first statistics of the siblings of each node
+        are updated too, when their movement was played below their parent (In the tree or in the simulation)
+        by the same player that would do it in their parent. They get the same result than the nodes, the one of the player 
+        of the search, so the blend of both statistics in get_uct_value compares values of the same player.
+        Args:
+            result (float): Result to propagate, for the player of the search.
+            movements (List->Tuple, default=None):  Movements of the simulation, with the uuid of the player that did each one 
+                                                    ((source, destiny), player). None to not update the RAVE statistics.
+        """
+        played = None
+        if movements is not None:
+            played = collections.defaultdict(set)
+            for movement, player in movements:
+                played[player].add(movement)
+        while node.parent:  #Loops until we have no parent, the top of the tree 
+            node.total_n += 1
+            node.total_value += result
+            if played is not None:
+                played[node.player].add(node.previous_movement)
+                for sibling in node.parent.children:
+                    if sibling.previous_movement in played[sibling.player]:
+                        sibling.amaf_n += 1
+                        sibling.amaf_value += result
+            node = node.parent
+        node.total_n += 1   #Otherwise the top of the tree node doesn't get stats
+        node.total_value += result
@@ -5,9 +5,10 @@ Have the following classes, inheriting represented by tabs:
         ↑TextSprite
         ↑AnimatedSprite
         ↑MultiSprite
+    SpriteLayer
 --------------------------------------------"""
 
-__all__ = ['Sprite', 'TextSprite', 'AnimatedSprite', 'MultiSprite']
+__all__ = ['Sprite', 'TextSprite', 'AnimatedSprite', 'MultiSprite', 'SpriteLayer']
 __version__ = '1.0'
 __author__ = 'David Flaity Pardo'
 
@@ -30,6 +31,7 @@ from obj.utilities.logger import Logger as LOG
 from obj.utilities.synch_dict import Dictionary
 from obj.utilities.surface_loader import SurfaceLoader, ResizedSurface
 from obj.utilities.decorators import run_async
+from obj.utilities.profiler import FrameProfiler
 from strings import FONT
 #from memory_profiler import profile
 
@@ -69,7 +71,16 @@ class Sprite(pygame.sprite.Sprite):
                             This attribute is to be used in inhereting classes or outside the object scope alltogether.
         hover (boolean):    True if the element is i the state `hover`, this means that the mouse is hovering this sprite.
         enabled (boolean):  True if the element can be interacted with. When False, the element will be half-gray and without animation.
+        layer (:obj: SpriteLayer):  Cached layer in which this sprite is drawn, if any. It's notified of the changes of the sprite.
+    General class attributes:
+        DIRTY_RECTS (List->pygame.Rect):    Areas of the screen changed by any sprite since the last frame. Collected by the Screens.
+        STEP (int): Step of the clock of the animations, advanced by the fixed-timestep update pass of the game.
+                    None if there is no clock, and then the animations advance in each draw.
+        MAX_STEPS (int):    Steps caught up at once by a sprite that fell behind the clock.
         """
+    DIRTY_RECTS = []
+    STEP = None
+    MAX_STEPS = 4
 
     def __init__(self, id_, position, size, canvas_size, **image_params):
         """Constructor of Sprite class.
@@ -116,6 +127,8 @@ class Sprite(pygame.sprite.Sprite):
         self.use_overlay    = True
         self.visible        = True
         self.dialog_active  = False #This has the function of adding information to an otherwise element with a not-so-clear purpose
+        self.layer          = None
+        self.last_step      = None  #Step of the clock in which the animations advanced for the last time
         #Generation
         Sprite.generate(self)   #TO AVOID CALLING THE SUBCLASSES GENERATE WHEN THEIR ATTRIBUTES ARENT INITIALIZED YET.
 
@@ -132,6 +145,32 @@ class Sprite(pygame.sprite.Sprite):
     def get_id(self):
         """Returns the id of this sprite."""
         return self.id
+
+    def get_drawn_rect(self):
+        """Returns:
+            (:obj: pygame.Rect):    Area of the screen that this sprite covers when drawn. The image can be bigger than the rect."""
+        return pygame.Rect(self.abs_position if self.abs_position else self.rect.topleft, self.image.get_size())
+
+    def set_dirty(self, previous_rect=None):
+        """Reports the area that this sprite covers as changed, so it is drawn again in the next frame.
+        Call it before and after any change of position or image.
+        Args:
+            previous_rect (:obj: pygame.Rect, default=None):    Area covered before the change, to report it too."""
+        try:
+            rects = (self.get_drawn_rect(), previous_rect) if previous_rect else (self.get_drawn_rect(),)
+        except AttributeError:  #Still in the constructor, without image
+            return
+        Sprite.DIRTY_RECTS.extend(rects)
+        if self.layer:
+            for rect in rects:
+                self.layer.invalidate(rect)
+
+    @staticmethod
+    def pop_dirty_rects():
+        """Returns:
+            (List->pygame.Rect):    The areas changed since the last call. The list is emptied."""
+        rects, Sprite.DIRTY_RECTS = Sprite.DIRTY_RECTS, []
+        return rects
         
     def draw(self, surface, offset=None):
         """Draws the sprite over a surface. Draws the overlay too if use_overlay is True.
@@ -147,13 +186,85 @@ class Sprite(pygame.sprite.Sprite):
                     surface.blit(self.image, tuple(off+pos for off, pos in zip(offset, position)))
                 else:
                     surface.blit(self.image, position)
+                FrameProfiler.count('blits')
                 if (self.overlay and self.use_overlay and self.active) or not self.enabled:    
                     self.draw_overlay(surface, offset=offset)               
-                if self.enabled:
-                    self.update()
+                self.advance()
             except pygame.error:
                 LOG.log(*MESSAGES.LOCKED_SURFACE_EXCEPTION)
 
+    def get_blits(self, offset=None):
+        """Returns the surfaces that draw this sprite, with their positions, in the same order as draw blits them.
+        Used to draw a lot of sprites with only one Surface.blits call. Advances the animations like draw does.
+        Args:
+            offset (Container: int, int, default=None): Offset in pixels to be taken into account when drawing.
+        Returns:
+            (List->Tuple->pygame.Surface, Tuple->int, int): The (surface, position) pairs. Empty if the sprite is not visible."""
+        if not self.visible:
+            return []
+        position = self.abs_position if self.abs_position else self.rect.topleft
+        if offset:
+            position = (position[0]+offset[0], position[1]+offset[1])
+        blits = [(self.image, position)]
+        if self.overlay and ((self.use_overlay and self.active) or not self.enabled):
+            blits.extend(self.get_overlay_blits(position))
+        self.advance()
+        return blits
+
+    def get_overlay_blits(self, position):
+        """Returns the overlay with its position, like draw_overlay draws it.
+        Args:
+            position (Tuple->int, int): Position of the sprite, with the offset already added.
+        Returns:
+            (List->Tuple->pygame.Surface, Tuple->int, int): The (surface, position) pairs."""
+        return [(self.overlay, position)]
+
+    @staticmethod
+    def tick():
+        """Advances the clock of the animations one step. Called in each fixed-timestep update of the game."""
+        Sprite.STEP = Sprite.STEP+1 if Sprite.STEP is not None else 0
+
+    def advance(self):
+        """Advances the animations of the sprite up to the current step of the clock (Sprite.STEP), whatever the fps are.
+        Called in the update pass of the screens and in each draw, so the sprites that aren't updated by any screen are still animated.
+        Without clock, advances one step in each call. Invisible sprites don't advance."""
+        if Sprite.STEP is None:
+            steps = 1
+        elif not self.visible or self.last_step is None:
+            self.last_step, steps = Sprite.STEP, 0
+        else:
+            self.last_step, steps = Sprite.STEP, min(Sprite.STEP-self.last_step, Sprite.MAX_STEPS)
+        for _ in range(0, steps):
+            self.step_animation()
+
+    def step_animation(self):
+        """Advances one step the animation of the overlay (only if the sprite is active) and whatever update does."""
+        if self.enabled:
+            if self.overlay and self.use_overlay and self.active:
+                self.animate_overlay()
+            self.update()
+
+    def animate_overlay(self):
+        """Advances one step the animation of the overlay. Overloaded in the sprites that don't show their overlay."""
+        self.animation_frame()
+
+    @staticmethod
+    def draw_sprites(surface, sprites, offset=None):
+        """Draws all the input sprites with only one Surface.blits call. Same result as calling draw on each one, in order.
+        Args:
+            surface (:obj: pygame.Surface): Surface to draw the Sprites. It's usually the display.
+            sprites (Iterable->Sprite): Sprites to draw, in order.
+            offset (Container: int, int, default=None): Offset in pixels to be taken into account when drawing."""
+        if offset and offset == (0, 0): offset=None
+        blits = []
+        for sprite in sprites:
+            blits.extend(sprite.get_blits(offset))
+        try:
+            surface.blits(blits, doreturn=False)
+            FrameProfiler.count('blits', len(blits))
+        except pygame.error:
+            LOG.log(*MESSAGES.LOCKED_SURFACE_EXCEPTION)
+
     def update_mask(self):
         """Updates the mask attribute afther the image attribute. To use after a change in self.image."""
         self.mask = pygame.mask.from_surface(self.image)
@@ -168,8 +279,7 @@ class Sprite(pygame.sprite.Sprite):
             surface.blit(self.overlay, tuple(off+pos for off, pos in zip(offset, position)))
         else:
             surface.blit(self.overlay, position)
-        if self.enabled:
-            self.animation_frame()
+        FrameProfiler.count('blits')
 
     def get_canvas_size(self):
         """Returns the current resolution size that this Sprite has. THIS IS NOT THE SIZE OF THE SPRITE.
@@ -201,12 +311,14 @@ class Sprite(pygame.sprite.Sprite):
             size (:obj: pygame.Rect||:tuple: int,int):  New size of the Sprite. In pixels.
             regenerate_image (boolean, default:True):   Flag. True makes the sprite regenerate its image when this method is called.
         """
+        self.set_dirty()
         self.rect.size = size
         if update_rects:
             self.real_rect  = (self.real_rect[0], tuple(x/y for x,y in zip(size, self.resolution)))
             self.rects[self.resolution] = self.rect.copy()
         if regenerate_image:
             self.regenerate_image()
+        self.set_dirty()
 
     def set_position(self, position, update_rects=True):
         """Changes the position of the Sprite. Updates rect and real_rect.
@@ -214,6 +326,7 @@ class Sprite(pygame.sprite.Sprite):
             position (:obj: pygame.Rect||:tuple: int,int): New position of the Sprite. In pixels.
             update_rects (boolean, default:True):   Flag. If its true, the real rect attributes will be updated after the input position.
         """
+        self.set_dirty()
         if self.abs_position:
             difference = tuple(x-y for x, y in zip(position, self.rect.topleft))
             self.abs_position = tuple(x+y for x, y in zip(self.abs_position, difference))
@@ -221,6 +334,7 @@ class Sprite(pygame.sprite.Sprite):
         if update_rects:
             self.real_rect  = (tuple(x/y for x,y in zip(position, self.resolution)), self.real_rect[1])
             self.rects[self.resolution] = self.rect.copy()
+        self.set_dirty()
 
     def set_rect(self, rect, update_rects=True):
         """Sets a new Rect as the Sprite rect. Uses the rect.size and rect.topleft to change size and position
@@ -244,6 +358,8 @@ class Sprite(pygame.sprite.Sprite):
         Args:
             active (boolean): The value to set.
         """
+        if self.active != active:
+            self.set_dirty()
         self.active = active
 
     def set_hover(self, hover):
@@ -251,6 +367,8 @@ class Sprite(pygame.sprite.Sprite):
         Args:
             hover (boolean): The value to set.
         """
+        if self.hover != hover:
+            self.set_dirty()
         self.hover = hover
           
     def set_enabled(self, enabled):
@@ -263,14 +381,18 @@ class Sprite(pygame.sprite.Sprite):
         if not enabled and self.enabled:      #Deactivating button
             self.overlay.set_alpha(200)
             self.enabled        = False
+            self.set_dirty()
         elif enabled and not self.enabled:    #Activating button
             self.enabled        = True
+            self.set_dirty()
 
     def set_visible(self, visible):
         """Sets the visible attribute. This attribute is used to draw or not the Sprite.
         Args:
             visible (boolean): The value to set.
         """
+        if self.visible != visible:
+            self.set_dirty()
         self.visible = visible
         
     def enable_overlay(self, enabled):
@@ -294,6 +416,7 @@ class Sprite(pygame.sprite.Sprite):
             self.animation_step     = -self.animation_step
             self.animation_value    = ANIMATION_INTERVAL[0] if self.animation_value < ANIMATION_INTERVAL[0] else ANIMATION_INTERVAL[1]
         self.overlay.set_alpha(int(MAX_TRANSPARENCY*self.animation_value))
+        self.set_dirty()
 
     def update(self):
         '''Update method, to be executed after each execution of the method draw.
@@ -306,10 +429,12 @@ class Sprite(pygame.sprite.Sprite):
         """Generates the image and overlay again, following the params when the constructor executed.
         Also updates the mask. Intended to be used after changing an important attribute in rect or image.
         Called after an important change in resolution or the sprite params."""
+        self.set_dirty()
         self.image, self.overlay = Sprite.generate_surface(self.rect, **self.params)
         self.update_mask()
         if not self.enabled and self.use_overlay:
             self.overlay.set_alpha(200)
+        self.set_dirty()
 
     @staticmethod
     def generate_surface(size, surface=None, texture=None, overlap_texture=None, active_texture=None, keep_aspect_ratio=True, resize_mode='fit', resize_smooth=True,\
@@ -411,8 +536,11 @@ class Sprite(pygame.sprite.Sprite):
                 overlay = ResizedSurface.get_surface(texture, size, resize_mode, resize_smooth, keep_aspect_ratio)
             else:
                 overlay = Sprite.generate_overlay(surf, overlay_color)
+                FrameProfiler.count('surfaces')
+            FrameProfiler.count('surfaces')
             return surf, overlay
         else:
+            FrameProfiler.count('surfaces')
             return surf, None
 
     def rects_to_str(self, return_luts_too=False):
@@ -483,10 +611,12 @@ class TextSprite(Sprite):
         """Generates the image and overlay again, following the params when the constructor executed.
         Also updates the mask. Intended to be used after changing an important attribute in rect or image.
         Called after an important change in resolution or the sprite params."""
+        self.set_dirty()
         self.image, self.overlay = Sprite.generate_surface(self.rect, **self.params)
         self.update_mask()
         if not self.enabled and self.use_overlay:
             self.overlay.set_alpha(200)
+        self.set_dirty()
 
 class MultiSprite(Sprite):
     """MultiSprite class. It inherits from Sprite. It is a Sprite formed by a lot of Sprites.
@@ -634,6 +764,26 @@ class MultiSprite(Sprite):
             super().draw(surface, offset=offset)
             for sprite in self.sprites:
                 sprite.draw(surface, offset=offset)
+
+    def advance(self):
+        """Advances the animations of this sprite and all of its inner sprites up to the current step of the clock.
+        Without clock, the inner sprites advance when they are drawn."""
+        super().advance()
+        if Sprite.STEP is not None:
+            for sprite in self.sprites:
+                sprite.advance()
+
+    def get_blits(self, offset=None):
+        """Returns the surfaces that draw this sprite and all of its inner sprites, with their positions.
+        Args:
+            offset (Container: int, int, default=None): Offset in pixels to be taken into account when drawing.
+        Returns:
+            (List->Tuple->pygame.Surface, Tuple->int, int): The (surface, position) pairs."""
+        blits = super().get_blits(offset)
+        if blits:
+            for sprite in self.sprites:
+                blits.extend(sprite.get_blits(offset))
+        return blits
                 
     def update(self):
         """Updates the information about the sprite. Called after each drawing onto the screen."""
@@ -644,6 +794,7 @@ class MultiSprite(Sprite):
                     dialog_alpha = dialog_alpha+3 if self.dialog_animated else 255
                     if dialog_alpha > 255: dialog_alpha = 255
                     self.hover_dialog.image.set_alpha(dialog_alpha)
+                    self.hover_dialog.set_dirty()
             elif self.hover_dialog.visible:
                 if dialog_alpha > 0:
                     dialog_alpha = dialog_alpha-3 if self.dialog_animated else 0
@@ -651,6 +802,7 @@ class MultiSprite(Sprite):
                         dialog_alpha = 0
                         self.hover_dialog.visible = False
                     self.hover_dialog.image.set_alpha(dialog_alpha)
+                    self.hover_dialog.set_dirty()
 
     def show_help_dialog(self):
         """Shows the hover dialog, if it has been added previously."""
@@ -819,6 +971,7 @@ class AnimatedSprite(MultiSprite):
         self.update_size()
         self.image  = self.current_sprite()
         self.mask   = self.current_mask() 
+        self.set_dirty()
 
     def clear_lists(self):
         """Empty all the internal lists of surfaces and masks, except the original ones (The non-resized).
@@ -852,6 +1005,7 @@ class AnimatedSprite(MultiSprite):
             self.image = self.current_hover_sprite()
         else:
             self.image = self.current_sprite()
+        self.set_dirty()
 
     def current_sprite(self):
         """Returns the current surface that will be shown if there are no special states in effect.
@@ -893,8 +1047,11 @@ class AnimatedSprite(MultiSprite):
         self.counter += 1
         if self.counter >= self.next_frame_time:
             self.counter = 0 
+            image = self.image
             self.animation_frame()
             self.image = self.current_sprite() if not self.hover else self.current_hover_sprite()
+            if self.image is not image:     #Only the sprites that really changed frame need to be drawn again
+                self.set_dirty(previous_rect=pygame.Rect(self.get_drawn_rect().topleft, image.get_size()))
 
 class OnceAnimatedSprite(AnimatedSprite):
     """Class OnceAnimatedSprite. Inherits from AnimatedSprite. The difference between it and the super class is
@@ -922,3 +1079,82 @@ class OnceAnimatedSprite(AnimatedSprite):
         super().set_enabled(state)
         self.set_visible(state)
         self.animation_index = 0
+
+class SpriteLayer(object):
+    """SpriteLayer class. Surface in which some sprites that rarely change are drawn once, over a background,
+    so all of them can be drawn each frame with only one blit.
+    The sprites of the layer notify their changes (Sprite.set_dirty), and only those areas are drawn again in the surface.
+    Attributes:
+        resolution (:tuple: int, int):  Size of the layer. In pixels.
+        sprites (List->Sprite): Sprites of the layer, in drawing order. The first one is usually the background.
+        surface (:obj: pygame.Surface): The cached drawing of all the sprites. Created in the first draw.
+        invalid_rects (List->pygame.Rect):  Areas changed since the last draw, to draw again in the surface.
+        full_redraw (boolean):  True to draw the whole layer again in the next draw.
+    General class attributes:
+        MAX_INVALID_RECTS (int):    Changed areas from which the whole layer is drawn again instead.
+    """
+    MAX_INVALID_RECTS = 64
+
+    def __init__(self, resolution, *sprites):
+        """SpriteLayer constructor.
+        Args:
+            resolution (:tuple: int, int):  Size of the layer. Usually the resolution of the screen.
+            *sprites (:obj: Sprite):    Sprites of the layer, in drawing order."""
+        self.resolution     = resolution
+        self.sprites        = []
+        self.surface        = None
+        self.invalid_rects  = []
+        self.full_redraw    = True
+        self.add(*sprites)
+
+    def add(self, *sprites):
+        """Adds the sprites on top of the current ones. The whole layer will be drawn again."""
+        for sprite in sprites:
+            sprite.layer = self
+            self.sprites.append(sprite)
+        self.invalidate()
+
+    def clear(self):
+        """Removes all the sprites of the layer."""
+        for sprite in self.sprites:
+            if sprite.layer is self:
+                sprite.layer = None
+        self.sprites.clear()
+        self.invalidate()
+
+    def invalidate(self, rect=None):
+        """Marks an area of the layer to be drawn again in the next draw.
+        Args:
+            rect (:obj: pygame.Rect, default=None): Area changed. None to draw the whole layer again."""
+        if rect is None or len(self.invalid_rects) >= SpriteLayer.MAX_INVALID_RECTS:
+            self.full_redraw = True
+            self.invalid_rects = []
+        elif not self.full_redraw:
+            self.invalid_rects.append(rect)
+
+    def render(self):
+        """Draws again in the cached surface the areas that changed. Those are drawn in one pass, clipped to their union,
+        so each sprite is drawn once, and its animations advance only once."""
+        if not self.surface or self.surface.get_size() != self.resolution:
+            self.surface = pygame.Surface(self.resolution).convert()
+            self.full_redraw = True
+        if self.full_redraw:
+            self.full_redraw = False
+            self.invalid_rects = []
+            clip = None
+        elif self.invalid_rects:
+            rects, self.invalid_rects = self.invalid_rects, []  #The sprites that animate while drawn invalidate themselves again
+            clip = rects[0].unionall(rects[1:])
+        else:
+            return
+        self.surface.set_clip(clip)
+        Sprite.draw_sprites(self.surface, (sprite for sprite in self.sprites if not clip or clip.colliderect(sprite.get_drawn_rect())))
+        self.surface.set_clip(None)
+
+    def draw(self, surface):
+        """Updates the changed areas of the layer, and draws it over the surface.
+        Args:
+            surface (:obj: pygame.Surface): Surface to draw the layer. It's usually the display."""
+        self.render()
+        surface.blit(self.surface, (0, 0))
+        FrameProfiler.count('blits')
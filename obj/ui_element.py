@@ -32,6 +32,7 @@ from obj.utilities.exceptions import    InvalidUIElementException, BadUIElementI
 from obj.utilities.utility_box import UtilityBox
 from obj.utilities.decorators import run_async
 from obj.utilities.logger import Logger as LOG
+from obj.utilities.profiler import FrameProfiler
 
 class UIElement(MultiSprite):
     """Superclass UI_Element. Inherits from MultiSprite.
@@ -539,10 +540,9 @@ class Slider (UIElement):
         else:  
             raise InvalidSliderException('Slider of type '+str(shape)+' is not available')
         if self.rect.width < self.rect.height:
-            dial.rect.center = (self.rect.width//2, int(self.get_value()*self.rect.height))
+            dial.set_center((self.rect.width//2, int(self.get_value()*self.rect.height)))
         else:
-            dial.rect.center = (int(self.get_value()*self.rect.width), self.rect.height//2)
-        dial.set_position(dial.rect.topleft)
+            dial.set_center((int(self.get_value()*self.rect.width), self.rect.height//2))
         return dial
     
     def draw(self, surface, offset=None):
@@ -568,8 +568,7 @@ class Slider (UIElement):
             surface.blit(self.overlay, tuple(off+pos for off, pos in zip(offset, position)))
         else:
             surface.blit(self.overlay, position)
-        if self.enabled:
-            self.animation_frame()
+        FrameProfiler.count('blits')
 
     @run_async
     def set_dial_position(self, position):
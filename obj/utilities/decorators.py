@@ -13,6 +13,7 @@ import threading
 from wrapt import synchronized
 #Selfmade libraries
 from settings import PARAMS
+from obj.utilities.instrumentation import Instrumentation
 
 #GLOBAL VARIABLES THAT CONTROL THE POOL OF THREADS.
 THREAD_POOL = []    #Pool of threads
@@ -101,18 +102,10 @@ def run_async_not_pooled(function):
 
 #Decorator to check time of execution in each function
 def time_it(function):
-    import time
-    """Times the input function and prints the result on screen. 
-    The time library is needed.
+    """Times the input function in the instrumentation registry, in a timer named after the module and the function.
+    Nothing is measured while the registry is disabled (Instrumentation.ENABLED).
     Args:
         function (function):    Function whose execution will be timed.
-        *args (:list: arg):     Input arguments of the function.
-        **kwargs (:dict: kwarg):Input keyword arguments of the function.
     Returns:
-        (any):  Returns whatever the function itself returns."""
-    def wrapper(*args, **kwargs):
-        start = time.time()
-        result = function(*args, **kwargs)
-        print(function.__name__+" execution time was "+str((time.time()-start)*1000)+" ms")
-        return result
-    return wrapper
+        (function): The decorated function, that returns whatever the function itself returns."""
+    return Instrumentation.timed(function.__module__+'.'+function.__qualname__)(function)
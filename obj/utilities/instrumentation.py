@@ -0,0 +1,173 @@
+"""--------------------------------------------
+instrumentation module. Registry of named timers, counters and histograms, to measure the hot paths of the game.
+While it is disabled, nothing is recorded and the instrumented code only pays a flag check.
+While it is enabled, the measures of all the threads are aggregated under a lock, and can be exported to JSON.
+Enabled with the -instrument argument of main, or at runtime with INIT_PARAMS.INSTRUMENTATION_KEY.
+Have the following classes:
+    Histogram
+    Instrumentation
+--------------------------------------------"""
+
+__all__ = ['Histogram', 'Instrumentation']
+__version__ = '1.0'
+__author__ = 'David Flaity Pardo'
+
+#Python libraries
+import json
+import math
+import time
+import threading
+import functools
+
+class Histogram(object):
+    """Histogram class. Aggregates the values observed, with power of two buckets.
+    Attributes:
+        count (int):    Values observed.
+        total (float):  Sum of the values.
+        min (float):    Lowest value.
+        max (float):    Highest value.
+        buckets (Dict->float:int):  Values observed of each bucket. The key is the upper bound of the bucket, a power of two.
+    """
+    def __init__(self):
+        self.count  = 0
+        self.total  = 0.0
+        self.min    = math.inf
+        self.max    = -math.inf
+        self.buckets= {}
+
+    def add(self, value):
+        """Adds a value to the histogram. Not thread safe by itself, the registry locks it."""
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        bound = 2.0**math.frexp(value)[1] if value > 0 else 0.0
+        self.buckets[bound] = self.buckets.get(bound, 0)+1
+
+    def percentile(self, percent):
+        """Estimates a percentile from the buckets.
+        Returns:
+            (float):    Upper bound of the bucket that contains the percentile, limited by the max value."""
+        if not self.count:
+            return 0.0
+        rank = self.count*percent/100
+        accumulated = 0
+        for bound in sorted(self.buckets):
+            accumulated += self.buckets[bound]
+            if accumulated >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self):
+        """Returns:
+            (Dict->String:Any): Count, sum, min, max, mean, estimated percentiles and buckets of the histogram."""
+        if not self.count:
+            return {'count': 0}
+        return {'count': self.count, 'sum': self.total, 'min': self.min, 'max': self.max, 'mean': self.total/self.count,\
+                'p50': self.percentile(50), 'p90': self.percentile(90), 'p99': self.percentile(99),\
+                'buckets': {str(bound): count for bound, count in sorted(self.buckets.items())}}
+
+class Instrumentation(object):
+    """Instrumentation class. Static registry of the measures of the whole game, shared by all the threads.
+    Timers are histograms of durations, in milliseconds. Counters are sums. Histograms are any other value.
+    General class attributes:
+        ENABLED (boolean):  True while the measures are being recorded.
+        LOCK (:obj: threading.Lock):    Lock of the aggregation of the measures.
+        TIMERS (Dict->String:Histogram):    Durations of each named timer.
+        COUNTERS (Dict->String:int):    Value of each named counter.
+        HISTOGRAMS (Dict->String:Histogram):    Values observed of each named histogram.
+        STARTED (float):    Time at which the current measures started. Wall clock, in seconds.
+    """
+    ENABLED     = False
+    LOCK        = threading.Lock()
+    TIMERS      = {}
+    COUNTERS    = {}
+    HISTOGRAMS  = {}
+    STARTED     = time.time()
+
+    @staticmethod
+    def enable(enabled=True):
+        """Starts or stops the recording. The measures are kept when it stops, so they can be exported."""
+        Instrumentation.ENABLED = enabled
+
+    @staticmethod
+    def toggle():
+        """Starts or stops the recording.
+        Returns:
+            (boolean):  True if it is enabled now."""
+        Instrumentation.enable(not Instrumentation.ENABLED)
+        return Instrumentation.ENABLED
+
+    @staticmethod
+    def reset():
+        """Discards all the measures."""
+        with Instrumentation.LOCK:
+            Instrumentation.TIMERS.clear()
+            Instrumentation.COUNTERS.clear()
+            Instrumentation.HISTOGRAMS.clear()
+            Instrumentation.STARTED = time.time()
+
+    @staticmethod
+    def count(name, amount=1):
+        """Adds to a named counter. Does nothing if the registry is disabled."""
+        if Instrumentation.ENABLED:
+            with Instrumentation.LOCK:
+                Instrumentation.COUNTERS[name] = Instrumentation.COUNTERS.get(name, 0)+amount
+
+    @staticmethod
+    def observe(name, value):
+        """Adds a value to a named histogram. Does nothing if the registry is disabled."""
+        if Instrumentation.ENABLED:
+            Instrumentation.__add(Instrumentation.HISTOGRAMS, name, value)
+
+    @staticmethod
+    def record_time(name, milliseconds):
+        """Adds a duration to a named timer. Does nothing if the registry is disabled."""
+        if Instrumentation.ENABLED:
+            Instrumentation.__add(Instrumentation.TIMERS, name, milliseconds)
+
+    @staticmethod
+    def __add(histograms, name, value):
+        with Instrumentation.LOCK:
+            if name not in histograms:
+                histograms[name] = Histogram()
+            histograms[name].add(value)
+
+    @staticmethod
+    def timed(name):
+        """Decorator that times each execution of the decorated function in a named timer.
+        While the registry is disabled, the function is called directly.
+        Args:
+            name (String):  Name of the timer.
+        Returns:
+            (function): The decorator."""
+        def decorator(function):
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                if not Instrumentation.ENABLED:
+                    return function(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    Instrumentation.record_time(name, (time.perf_counter()-start)*1000)
+            return wrapper
+        return decorator
+
+    @staticmethod
+    def snapshot():
+        """Returns:
+            (Dict->String:Any): Copy of all the measures, with the timers and histograms summarized."""
+        with Instrumentation.LOCK:
+            return {'started': Instrumentation.STARTED, 'seconds': time.time()-Instrumentation.STARTED,\
+                    'timers': {name: timer.to_dict() for name, timer in sorted(Instrumentation.TIMERS.items())},\
+                    'counters': dict(sorted(Instrumentation.COUNTERS.items())),\
+                    'histograms': {name: histogram.to_dict() for name, histogram in sorted(Instrumentation.HISTOGRAMS.items())}}
+
+    @staticmethod
+    def save(filename):
+        """Saves a snapshot of the measures in a JSON file.
+        Args:
+            filename (String):  Path of the file."""
+        with open(filename, 'w') as measures_file:
+            json.dump(Instrumentation.snapshot(), measures_file, indent=2)
@@ -0,0 +1,197 @@
+"""--------------------------------------------
+profiler module. Measures where the time of each frame of the game loop goes, without an external profiler.
+Each frame is split in phases (events, timed executions, update, screen drawing, popups, display update),
+and the blits and surfaces created in it are counted. The last frames can be shown as an overlay,
+or dumped to a JSON file or to a Chrome trace file (chrome://tracing, or https://ui.perfetto.dev).
+Have the following classes:
+    FrameProfiler
+--------------------------------------------"""
+
+__all__ = ['FrameProfiler']
+__version__ = '1.0'
+__author__ = 'David Flaity Pardo'
+
+#Python libraries
+import json
+import time
+import pygame
+from collections import deque
+#Selfmade libraries
+from obj.utilities.colors import WHITE, BLACK
+
+class FrameProfiler(object):
+    """FrameProfiler class. Records the duration of the phases of the last frames of the game loop.
+    The counters are class attributes, so the sprites and the surface loaders can count without a reference to the profiler.
+    While it is not active, all the methods return without doing anything.
+    General class attributes:
+        ACTIVE (boolean):   True while the frames are being recorded.
+        COUNTS (Dict->String:int):  Counters of the frame in progress. Blits and surfaces created, by default.
+        PHASES (Tuple->String): Phases of a frame, in the order that the game loop executes them.
+        PERCENTILES (Tuple->int):   Percentiles shown and saved of each phase.
+    Attributes:
+        frames (:obj: collections.deque):   Last recorded frames. Each one is a dict with its start, its duration,
+                                            the spans of its phases and its counters. In seconds.
+        frame (Dict->String:Any):   Frame in progress. None if there isn't one.
+        phase (String): Phase in progress. None if there isn't one.
+        phase_start (float):    Start of the phase in progress. In seconds.
+    """
+    ACTIVE = False
+    COUNTS = {'blits': 0, 'surfaces': 0}
+    PHASES = ('events', 'todo', 'update', 'screen', 'popups', 'display')
+    PERCENTILES = (50, 90, 99)
+
+    def __init__(self, max_frames=600):
+        """FrameProfiler constructor.
+        Args:
+            max_frames (int, default=600):  Frames kept. The older ones are discarded."""
+        self.frames         = deque(maxlen=max_frames)
+        self.frame          = None
+        self.phase          = None
+        self.phase_start    = 0
+
+    @staticmethod
+    def count(counter, amount=1):
+        """Adds to a counter of the frame in progress. Does nothing if the profiler is not active.
+        Args:
+            counter (String):   Name of the counter. 'blits' or 'surfaces', or a new one.
+            amount (int, default=1):    Value added."""
+        if FrameProfiler.ACTIVE:
+            FrameProfiler.COUNTS[counter] = FrameProfiler.COUNTS.get(counter, 0)+amount
+
+    def toggle(self):
+        """Starts or stops the recording. The recorded frames are discarded when it starts again.
+        Returns:
+            (boolean):  True if the profiler is active now."""
+        FrameProfiler.ACTIVE = not FrameProfiler.ACTIVE
+        if FrameProfiler.ACTIVE:
+            self.frames.clear()
+        self.frame = None
+        self.phase = None
+        return FrameProfiler.ACTIVE
+
+    def start_frame(self):
+        """Starts a new frame, resetting the counters."""
+        if FrameProfiler.ACTIVE:
+            for counter in FrameProfiler.COUNTS:
+                FrameProfiler.COUNTS[counter] = 0
+            self.frame = {'start': time.perf_counter(), 'duration': 0, 'spans': [], 'counts': None}
+            self.phase = None
+
+    def start_phase(self, phase):
+        """Ends the phase in progress and starts a new one. The same phase can be started more than once in a frame.
+        Does nothing outside of a frame.
+        Args:
+            phase (String): Name of the phase. One of FrameProfiler.PHASES."""
+        if self.frame is not None:
+            now = time.perf_counter()
+            self.end_phase(now)
+            self.phase = phase
+            self.phase_start = now
+
+    def end_phase(self, now=None):
+        """Ends the phase in progress, saving its span in the frame.
+        Args:
+            now (float, default=None):  End of the phase. The current time if None."""
+        if self.phase is not None:
+            now = now if now is not None else time.perf_counter()
+            self.frame['spans'].append((self.phase, self.phase_start-self.frame['start'], now-self.phase_start))
+            self.phase = None
+
+    def end_frame(self):
+        """Ends the frame in progress, saving it with its counters."""
+        if self.frame is not None:
+            now = time.perf_counter()
+            self.end_phase(now)
+            self.frame['duration'] = now-self.frame['start']
+            self.frame['counts'] = dict(FrameProfiler.COUNTS)
+            self.frames.append(self.frame)
+            self.frame = None
+
+    @staticmethod
+    def phase_duration(frame, phase):
+        """Returns:
+            (float):    Time spent in a phase of a frame, adding all its spans. In seconds."""
+        return sum(span[2] for span in frame['spans'] if span[0] == phase)
+
+    def percentiles(self, phase=None, frames=None):
+        """Calculates the percentiles (Nearest rank) of the duration of a phase, or of the whole frames.
+        Args:
+            phase (String, default=None):   Phase measured. The whole frame if None.
+            frames (Iterable->Dict, default=None):  Frames measured. All the recorded ones if None.
+        Returns:
+            (Dict->int:float):  Duration of each percentile of FrameProfiler.PERCENTILES. In milliseconds."""
+        frames = self.frames if frames is None else frames
+        durations = sorted(frame['duration'] if phase is None else FrameProfiler.phase_duration(frame, phase) for frame in frames)
+        if not durations:
+            return {percent: 0.0 for percent in FrameProfiler.PERCENTILES}
+        return {percent: durations[min(len(durations)-1, int(len(durations)*percent/100))]*1000 for percent in FrameProfiler.PERCENTILES}
+
+    def mean_counts(self, frames=None):
+        """Returns:
+            (Dict->String:float):   Mean of each counter per frame."""
+        frames = list(self.frames if frames is None else frames)
+        totals = {}
+        for frame in frames:
+            for counter, value in frame['counts'].items():
+                totals[counter] = totals.get(counter, 0)+value
+        return {counter: total/len(frames) for counter, total in totals.items()}
+
+    def summary(self, frames=None):
+        """Returns:
+            (Dict->String:Any): Number of frames, percentiles of the frames and of each phase, and mean counters."""
+        frames = list(self.frames if frames is None else frames)
+        return {'frames': len(frames), 'frame': self.percentiles(frames=frames),\
+                'phases': {phase: self.percentiles(phase, frames) for phase in FrameProfiler.PHASES},\
+                'counts': self.mean_counts(frames) if frames else {}}
+
+    def render(self, height=16, color=WHITE, background=BLACK):
+        """Renders a table with the percentiles of the frames and their phases, and the mean counters.
+        Args:
+            height (int, default=16):   Height of each line of text. In pixels.
+            color (:tuple: int, int, int, default=WHITE):   Color of the text.
+            background (:tuple: int, int, int, default=BLACK):  Color behind the text.
+        Returns:
+            (:obj: pygame.Surface): The table."""
+        summary = self.summary()
+        header = 'ms'.ljust(8)+''.join(('p'+str(percent)).rjust(8) for percent in FrameProfiler.PERCENTILES)
+        lines = [header, 'frame'.ljust(8)+''.join(('%.2f' % value).rjust(8) for value in summary['frame'].values())]
+        for phase, values in summary['phases'].items():
+            lines.append(phase.ljust(8)+''.join(('%.2f' % value).rjust(8) for value in values.values()))
+        lines.append(', '.join(counter+' '+str(int(value)) for counter, value in summary['counts'].items())+' per frame')
+        font = pygame.font.SysFont('monospace', height)
+        texts = [font.render(line, True, color) for line in lines]
+        table = pygame.Surface((max(text.get_width() for text in texts), sum(text.get_height() for text in texts)))
+        table.fill(background)
+        table.set_alpha(200)
+        y = 0
+        for text in texts:
+            table.blit(text, (0, y))
+            y += text.get_height()
+        return table
+
+    def save(self, filename, frames=None, chrome_trace=False):
+        """Saves the last recorded frames in a JSON file.
+        Args:
+            filename (String):  Path of the file.
+            frames (int, default=None): Number of frames saved, the last ones. All the recorded frames if None.
+            chrome_trace (boolean, default=False):  True to save them in the trace event format of Chrome, with
+                                                    a duration event for each frame and phase, and a counter event for each frame.
+                                                    False to save them with the summary, times in milliseconds."""
+        recorded = list(self.frames)[-frames:] if frames else list(self.frames)
+        origin = recorded[0]['start'] if recorded else 0
+        if chrome_trace:
+            events = []
+            for frame in recorded:
+                start = (frame['start']-origin)*1e6   #Microseconds
+                events.append({'name': 'frame', 'ph': 'X', 'pid': 0, 'tid': 0, 'ts': start, 'dur': frame['duration']*1e6})
+                events.extend({'name': phase, 'ph': 'X', 'pid': 0, 'tid': 0, 'ts': start+offset*1e6, 'dur': duration*1e6}\
+                                for phase, offset, duration in frame['spans'])
+                events.append({'name': 'counts', 'ph': 'C', 'pid': 0, 'tid': 0, 'ts': start, 'args': frame['counts']})
+            data = {'traceEvents': events, 'displayTimeUnit': 'ms'}
+        else:
+            data = {'summary': self.summary(recorded),\
+                    'frames': [{'start': (frame['start']-origin)*1000, 'duration': frame['duration']*1000,\
+                                'phases': {phase: FrameProfiler.phase_duration(frame, phase)*1000 for phase in FrameProfiler.PHASES},\
+                                'counts': frame['counts']} for frame in recorded]}
+        with open(filename, 'w') as profile_file:
+            json.dump(data, profile_file)
@@ -18,8 +18,10 @@ from settings import EXTENSIONS
 from obj.utilities.synch_dict import Dictionary
 from obj.utilities.utility_box import UtilityBox
 from obj.utilities.decorators import time_it
+from obj.utilities.instrumentation import Instrumentation
 from obj.utilities.logger import Logger as LOG
 from obj.utilities.resizer import Resizer
+from obj.utilities.profiler import FrameProfiler
 #from memory_profiler import profile
 
 """This one is a decorator."""
@@ -96,13 +98,16 @@ class ResizedSurface(object):
         surface = ResizedSurface(path, intended_size, resize_mode, resize_smooth, keep_aspect_ratio=keep_aspect_ratio)
         hash_key = hash(surface)
         if hash_key in ResizedSurface.RESIZED_SURFACES_LOADED.keys():
+            Instrumentation.count('resized_surface.hits')
             return ResizedSurface.RESIZED_SURFACES_LOADED.get_item(hash_key).surface
         else:
+            Instrumentation.count('resized_surface.misses')
             orig_surf = SurfaceLoader.get_surface(path) #Getting the original file
             final_surf = Resizer.resize(orig_surf, intended_size, mode=resize_mode, smooth=resize_smooth,\
                                         keep_aspect_ratio=keep_aspect_ratio)
             surface.set_surface(final_surf)
             ResizedSurface.add_surface(surface)
+            FrameProfiler.count('surfaces')
             return final_surf
 
     # @staticmethod
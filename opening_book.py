@@ -0,0 +1,164 @@
+"""--------------------------------------------
+opening_book module. Builds the opening books of the board presets offline, without any screen.
+Each line of the book is a headless game in which every player searches its first movements
+deeply, and those movements are saved by position. Some movements of each line are changed by
+random ones, so the lines branch and the book covers more than one opening.
+The books are merged with the existing ones, and saved in the folder that the Board reads them from.
+Usage:
+    python opening_book.py -b classic -p 2 --plies 8 -g 16 -t 20
+Have the following classes:
+    BookBuilder
+--------------------------------------------"""
+
+__all__ = ['BookBuilder']
+__version__ = '1.0'
+__author__ = 'David Flaity Pardo'
+
+#Python libraries
+import sys
+import time
+import argparse
+import itertools
+import multiprocessing
+
+#Selfmade libraries
+from obj.rules import GameState, RandomStreams
+from obj.search import SearchAgent, SearchToken, OpeningBook
+from obj.utilities.logger import Logger as LOG
+from tournament import Tournament, PRESETS, SEATS, AI_MODES, get_topology
+
+def build_line(line):
+    """Plays the first plies of a headless game, searching the first movement of each turn. Executed in the worker processes.
+    Args:
+        line (Dict->String:Any):    Settings of the line. Id, preset, players, seats, plies, mode, timeout, max_depth,
+                                    variety, random_filling and seed. The seats are the quadrants of the players in order of turn.
+    Returns:
+        (Dict->String:List):    Movement of each position searched, keyed as the OpeningBook does."""
+    streams = RandomStreams(line['seed'])
+    topology = get_topology(line['preset'])
+    players = list(range(1, line['players']+1))
+    state = GameState.new_game(topology, players, random_filling=line['random_filling'], streams=streams, seats=line['seats'],\
+                                **PRESETS[line['preset']][1](len(players)))
+    agents = {player: SearchAgent(topology.graph, topology.distances, topology.level_size, ai_mode=line['mode'], order=order, name=line['mode'],\
+                                    max_depth=line['max_depth'], adaptative_max_depth=False, timeout=line['timeout'], rng=streams.get('search', order))\
+                for order, player in enumerate(players)}
+    book = OpeningBook()
+    plies = 0
+    while not state.is_over() and plies < line['plies']:
+        if state.pending_promotion is not None:
+            state.promote()
+            continue
+        legal = state.get_movements()
+        if not legal:
+            state.throw_dice()
+            continue
+        player = state.get_current_player()
+        alive = [p for p in players if p not in state.dead]
+        if state.char_turns > 0:    #Second movement of a character, the book only has the first one of each turn
+            movement = agents[player].choose_movement(hash(topology), {index: piece.copy() for index, piece in state.pieces.items()},\
+                                                    state.get_map(player), player, alive, allowed_movements=legal,\
+                                                    restricted_movements=(state.last_movement,), stop_token=SearchToken(line['timeout']))
+        else:
+            movement = agents[player].choose_movement(hash(topology), {index: piece.copy() for index, piece in state.pieces.items()},\
+                                                    state.get_map(player), player, alive, stop_token=SearchToken(line['timeout']))
+            if movement is not None and (movement[0], movement[-1]) in legal:
+                book.add(state.pieces, player, alive, movement)
+            plies += 1
+            if streams.get('book').random() < line['variety']:  #Branching the line, the searched movement is still saved
+                movement = streams.get('book').choice(legal)
+        if movement is None or (movement[0], movement[-1]) not in legal:
+            movement = streams.get('book').choice(legal)
+        state.apply_movement((movement[0], movement[-1]))
+    return book.entries
+
+class BookBuilder(object):
+    """BookBuilder class. Generates the lines of the book of a preset, plays them in a pool of processes,
+    and merges the positions found with the existing book.
+    Attributes:
+        preset (String):    Board preset of the book.
+        player_counts (List->int):  Number of players of the lines. Each one has its own positions in the same book.
+        lines (int):    Lines per number of players. Each one has a different order of turns of the quadrants, in turns. The Board
+                        orders the players with the starting dices, so any order can happen.
+        plies (int):    Turns searched in each line.
+        mode (String):  Ai mode of the searchs.
+        timeout (float):    Seconds of each search.
+        max_depth (int):    Maximum depth of the alpha-beta searchs.
+        variety (float):    Chance of playing a random movement instead of the searched one, to branch the lines.
+        random_filling (boolean):   True to place the characters in random cells, like the Board does with that option.
+        seed (int): Base seed. Each line uses its own one, derived from this.
+        workers (int):  Number of processes.
+        folder (String):    Folder of the books. OpeningBook.FOLDER if None.
+        book (:obj: OpeningBook):   The book, loaded when running.
+    """
+    def __init__(self, preset='classic', player_counts=(2,), lines=16, plies=8, mode='alpha-beta w/ ordering', timeout=20, max_depth=4,\
+                variety=0.25, random_filling=False, seed=0, workers=None, folder=None):
+        self.preset = preset.lower()
+        self.player_counts = player_counts
+        self.lines = lines
+        self.plies = plies
+        self.mode = mode.lower()
+        self.timeout = timeout
+        self.max_depth = max_depth
+        self.variety = variety
+        self.random_filling = random_filling
+        self.seed = seed
+        self.workers = workers if workers else multiprocessing.cpu_count()
+        self.folder = folder
+        self.book = None
+
+    def generate_lines(self):
+        """Returns:
+            (List->Dict):   Settings of all the lines. The presets in which the pieces don't fit are skipped."""
+        all_lines = []
+        for players in self.player_counts:
+            if not Tournament.fits(self.preset, players):
+                continue
+            orders = list(itertools.permutations(SEATS[players]))
+            for line_index in range(0, self.lines):
+                all_lines.append({'id': len(all_lines), 'preset': self.preset, 'players': players, 'seats': orders[line_index%len(orders)],\
+                                'plies': self.plies, 'mode': self.mode, 'timeout': self.timeout, 'max_depth': self.max_depth,\
+                                'variety': self.variety if line_index >= len(orders) else 0, 'random_filling': self.random_filling,\
+                                'seed': self.seed+len(all_lines)})    #The first line of each order of turns is the main one, without branches
+        return all_lines
+
+    def run(self):
+        """Plays all the lines and saves the merged book.
+        Returns:
+            (:obj: OpeningBook):    The book."""
+        self.book = OpeningBook.load(get_topology(self.preset), folder=self.folder)
+        previous_size = len(self.book)
+        all_lines = self.generate_lines()
+        start = time.time()
+        LOG.log('warning', 'Searching ', len(all_lines), ' lines of ', self.plies, ' plies in ', self.workers, ' processes')
+        with multiprocessing.Pool(self.workers) as pool:
+            for entries in pool.imap_unordered(build_line, all_lines):
+                self.book.update(entries)
+                print('Line completed with '+str(len(entries))+' positions, '+str(len(self.book))+' in the book')
+        self.book.save()
+        LOG.log('warning', 'Book completed in ', time.time()-start, ' seconds, ', len(self.book)-previous_size, ' new positions')
+        return self.book
+
+def parse_arguments(args):
+    """Parses the command line arguments of the book builder."""
+    parser = argparse.ArgumentParser(description='Builds the opening book of a board preset with deep searchs.')
+    parser.add_argument('-b', '--board', default='classic', choices=sorted(PRESETS.keys()), help='Board preset')
+    parser.add_argument('-p', '--players', nargs='+', type=int, default=[2], choices=(2, 3, 4), help='Number of players of the lines')
+    parser.add_argument('-g', '--lines', type=int, default=16, help='Lines per number of players')
+    parser.add_argument('--plies', type=int, default=8, help='Turns searched in each line')
+    parser.add_argument('-m', '--mode', default='alpha-beta w/ ordering', help='Ai mode of the searchs. Any of: '+', '.join(AI_MODES))
+    parser.add_argument('-t', '--timeout', type=float, default=20, help='Seconds of each search')
+    parser.add_argument('-d', '--depth', type=int, default=4, help='Maximum depth of alpha-beta')
+    parser.add_argument('-v', '--variety', type=float, default=0.25, help='Chance of branching the lines with a random movement')
+    parser.add_argument('--random-filling', action='store_true', help='Place the characters in random cells')
+    parser.add_argument('-s', '--seed', type=int, default=0, help='Base seed of the lines')
+    parser.add_argument('-w', '--workers', type=int, default=None, help='Number of processes. All the cpus by default')
+    parser.add_argument('-f', '--folder', default=None, help='Folder of the books. The one the Board reads by default')
+    parser.add_argument('--log', default='warning', help='Level of the log messages')
+    return parser.parse_args(args)
+
+if __name__ == "__main__":
+    arguments = parse_arguments(sys.argv[1:])
+    LOG.change_level(arguments.log.lower())
+    builder = BookBuilder(arguments.board, arguments.players, arguments.lines, arguments.plies, arguments.mode, arguments.timeout,\
+                            arguments.depth, arguments.variety, arguments.random_filling, arguments.seed, arguments.workers, arguments.folder)
+    builder.run()
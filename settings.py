@@ -20,6 +20,19 @@ class INIT_PARAMS:
     RESOLUTIONS = (INITIAL_RESOLUTION, (1366, 768), (1600, 900), (1920, 1080), (640, 360), (848, 480), (1024, 576))
     INITIAL_FPS = 60
     ALL_FPS     = (INITIAL_FPS, 120, 20, 30)
+    UPDATES_PER_SECOND = 60     #Fixed rate of the animations, the same with any fps
+    MAX_UPDATES_PER_FRAME = 5   #If the game falls behind more than this, the lost time is dropped
+    IDLE_THROTTLING = True      #Stops drawing and sleeps while nothing happens
+    IDLE_FRAMES = 30            #Frames without any input or change before sleeping
+    IDLE_TIMEOUT = 250          #Maximum sleep in milliseconds, to show the changes made by other threads
+    MOUSE_MOVEMENTS_PER_FRAME = 1   #Events per frame that run the hover checks of the screens with the mouse movement
+    PROFILER_KEY = pygame.K_F3      #Shows the frame profiler, and starts recording the frames
+    PROFILER_DUMP_KEY = pygame.K_F9 #Saves the recorded frames in PROFILER_FILE.json, and as a Chrome trace in PROFILER_FILE.trace.json
+    PROFILER_FRAMES = 600           #Last frames kept by the profiler
+    PROFILER_FILE = 'frames'
+    INSTRUMENTATION_KEY = pygame.K_F7       #Starts or stops the timers and counters of the hot paths (Also with the -instrument argument)
+    INSTRUMENTATION_DUMP_KEY = pygame.K_F8  #Saves the timers and counters in INSTRUMENTATION_FILE
+    INSTRUMENTATION_FILE = 'instrumentation.json'
     MIXER       = (44100, -16, 2, 2048)
     MOUSE_VISIBLE = True
     GAME_NAME   = 'Sava Drow'
@@ -27,7 +40,7 @@ class INIT_PARAMS:
 class PARAMS:
     """Hold some of the options for configurations and some default parameters. Further comments in the not so clear ones."""
     BOARD_ID = 'main_board' 
-    AI_MODES = ('Totally random', 'Half random-fitness', 'Fitness best move', 'Alpha-beta', 'Alpha-beta w/ ordering', 'Monte Carlo Search', 'Alpha-Beta VS MonteCarlo')   #All possible IA modes strings. 
+    AI_MODES = ('Totally random', 'Half random-fitness', 'Fitness best move', 'Alpha-beta', 'Alpha-beta w/ ordering', 'Monte Carlo Search', 'Monte Carlo w/ RAVE', 'Alpha-Beta VS MonteCarlo')   #All possible IA modes strings. 
     PLAYERS_AMMOUNT = (2, 3, 4)     #ALl possible ammounts of total players in a game. 1 is for testing
     HUMAN_PLAYERS = (2, 3, 4, 0, 1)
     AI_PLAYERS = (0, 1, 2, 3, 4)          #ALl possible ammounts of computer controlled players in a game. If we want 4, choose 4 playeres and computer vs computer.
@@ -133,6 +146,7 @@ class NETWORK:
     # CLIENT_LOCAL_IP = '127.0.0.1'    #USED IF IM THE SERVER
     CLIENT_TIMEOUT_CONNECT = 30
     CLIENT_TIMEOUT_RECEIVE = 30
+    MOUSE_SENDS_PER_SECOND = 20     #Max messages per second with the mouse position or the dragged character position
     #URLS
     GET_IP = 'http://jsonip.com'
     TABLE_SERVERS_URL = 'http://savadrow.servegame.com'
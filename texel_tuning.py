@@ -0,0 +1,160 @@
+"""--------------------------------------------
+texel_tuning module. Fits the weights of the linear evaluation (Evaluation) to the results of self-play games,
+the texel way: the evaluation of each position, through a sigmoid, should predict the result of its game
+for the player that had the turn. The error is minimized with batched gradient descent, in numpy.
+The positions come from the records of the tournament (python tournament.py --record positions.jsonl).
+The weights are saved in the file that the engine loads when it starts.
+Usage:
+    python tournament.py -m alpha-beta "monte carlo search" -g 50 --record positions.jsonl
+    python texel_tuning.py positions.jsonl
+Have the following classes:
+    TexelTuner
+--------------------------------------------"""
+
+__all__ = ['TexelTuner']
+__version__ = '1.0'
+__author__ = 'David Flaity Pardo'
+
+#Python libraries
+import sys
+import json
+import time
+import numpy
+import argparse
+
+#Selfmade libraries
+from obj.rules import Piece, GameState
+from obj.search import Evaluation
+from obj.utilities.logger import Logger as LOG
+from tournament import get_topology
+
+class TexelTuner(object):
+    """TexelTuner class. Loads the recorded positions, calculates their features, and fits the weights.
+    Attributes:
+        records (List->String): Files with the positions, one JSON per line.
+        features (List->String):    Features whose weights are fitted. The rest get weight 0, so the engine doesn't calculate them.
+        epochs (int):   Passes over all the positions.
+        learning_rate (float):  Step of the gradient descent, over the standardized features.
+        batch_size (int):   Positions of each step.
+        regularization (float): L2 penalty of the weights, to not overfit the few positions of the rare features.
+        k (float):  Scale of the sigmoid. Fitted to the initial weights if None.
+        seed (int): Seed of the order of the batches.
+        positions (int):    Positions loaded.
+    """
+    K_CANDIDATES = numpy.logspace(-3, 2, 51)
+
+    def __init__(self, records, features=Evaluation.DEFAULT_FEATURES, epochs=200, learning_rate=0.05, batch_size=1024, regularization=1e-4, k=None, seed=0):
+        self.records = records
+        self.features = [feature for feature in Evaluation.FEATURES if feature in features]
+        self.epochs = epochs
+        self.learning_rate = learning_rate
+        self.batch_size = batch_size
+        self.regularization = regularization
+        self.k = k
+        self.seed = seed
+        self.positions = 0
+
+    def load(self):
+        """Reads the records and calculates the features of each position.
+        Returns:
+            (Tuple->numpy.ndarray, numpy.ndarray):  Features matrix (positions x features) and results vector."""
+        positions = []
+        for filename in self.records:
+            with open(filename) as record_file:
+                positions.extend(json.loads(line) for line in record_file if line.strip())
+        positions.sort(key=lambda position: position['preset'])    #Each preset regenerates the topology and clears the movements LUT
+        features, results = [], []
+        start = time.time()
+        for position in positions:
+            topology = get_topology(position['preset'])
+            state = GameState(topology, position['players'], {index: Piece(owner, char_type) for index, owner, char_type in position['pieces']})
+            values = Evaluation.features(topology.graph, topology.distances, topology.level_size, state.pieces, state.get_map(position['player']),\
+                                        position['player'], position['players'], set(position['promotion_cells']), needed=self.features)
+            features.append([values[feature] for feature in self.features])
+            results.append(position['result'])
+        self.positions = len(positions)
+        LOG.log('warning', 'Calculated the features of ', self.positions, ' positions in ', time.time()-start, ' seconds')
+        return numpy.array(features, dtype=numpy.float64).reshape(-1, len(self.features)), numpy.array(results, dtype=numpy.float64)
+
+    @staticmethod
+    def sigmoid(x):
+        return 1/(1+numpy.exp(-numpy.clip(x, -500, 500)))
+
+    @staticmethod
+    def error(features, results, weights, k):
+        """Returns:
+            (float):    Mean squared error between the results and the predictions of the weights."""
+        return float(numpy.mean((results-TexelTuner.sigmoid(k*features.dot(weights)))**2))
+
+    def initial_weights(self):
+        """Returns:
+            (numpy.ndarray):    The current weights if there are tuned ones. Otherwise, the value of each type of character for the material."""
+        if Evaluation.WEIGHTS:
+            return numpy.array([Evaluation.WEIGHTS.get(feature, 0) for feature in self.features], dtype=numpy.float64)
+        return numpy.array([Piece.TYPES.get(feature, {}).get('value', 1) if feature in Evaluation.MATERIAL else 0 for feature in self.features],\
+                            dtype=numpy.float64)
+
+    def fit_k(self, features, results, weights):
+        """Returns:
+            (float):    The scale of the sigmoid that minimizes the error of the input weights."""
+        return float(min(TexelTuner.K_CANDIDATES, key=lambda k: TexelTuner.error(features, results, weights, k)))
+
+    def tune(self, features, results):
+        """Fits the weights with minibatch gradient descent. The features are divided by their standard deviation,
+        so the same learning rate fits all of them; the weights are scaled back at the end.
+        Returns:
+            (Dict->String:float):   Weight of each feature, in the scale of the raw features."""
+        scale = features.std(axis=0)
+        scale[scale == 0] = 1
+        scaled = features/scale
+        weights = self.initial_weights()
+        self.k = self.k if self.k else self.fit_k(features, results, weights)
+        weights = weights*scale     #Weights of the scaled features
+        rng = numpy.random.default_rng(self.seed)
+        LOG.log('warning', 'Initial error ', TexelTuner.error(scaled, results, weights, self.k), ' with k=', self.k)
+        for epoch in range(0, self.epochs):
+            order = rng.permutation(len(results))
+            for batch_start in range(0, len(results), self.batch_size):
+                batch = order[batch_start:batch_start+self.batch_size]
+                predictions = TexelTuner.sigmoid(self.k*scaled[batch].dot(weights))
+                gradient = scaled[batch].T.dot((predictions-results[batch])*predictions*(1-predictions))*(2*self.k/len(batch))
+                weights -= self.learning_rate*(gradient+self.regularization*weights)
+            if epoch%max(1, self.epochs//10) == 0:
+                LOG.log('warning', 'Epoch ', epoch, ', error ', TexelTuner.error(scaled, results, weights, self.k))
+        LOG.log('warning', 'Final error ', TexelTuner.error(scaled, results, weights, self.k))
+        return {feature: float(weight) for feature, weight in zip(self.features, weights/scale)}
+
+    def run(self, output=None):
+        """Loads the positions, tunes the weights, and saves them (Evaluation.FILENAME if output is None).
+        Returns:
+            (Dict->String:float):   The weights."""
+        features, results = self.load()
+        if not self.positions:
+            sys.exit('There are no positions in the records')
+        weights = self.tune(features, results)
+        weights = {feature: weights.get(feature, 0.0) for feature in Evaluation.FEATURES}
+        Evaluation.save(weights, output, k=self.k, positions=self.positions, error=TexelTuner.error(features, results,\
+                        numpy.array([weights[feature] for feature in self.features]), self.k))
+        return weights
+
+def parse_arguments(args):
+    """Parses the command line arguments of the tuning."""
+    parser = argparse.ArgumentParser(description='Fits the weights of the evaluation to the results of self-play games.')
+    parser.add_argument('records', nargs='+', help='Files with the positions recorded by the tournament')
+    parser.add_argument('-o', '--output', default=None, help='Weights file. The one that the engine loads by default')
+    parser.add_argument('-f', '--features', nargs='+', default=Evaluation.DEFAULT_FEATURES, choices=Evaluation.FEATURES, help='Features to fit')
+    parser.add_argument('-e', '--epochs', type=int, default=200, help='Passes over all the positions')
+    parser.add_argument('-l', '--learning-rate', type=float, default=0.05, help='Step of the gradient descent')
+    parser.add_argument('-b', '--batch-size', type=int, default=1024, help='Positions of each step')
+    parser.add_argument('--l2', type=float, default=1e-4, help='L2 regularization of the weights')
+    parser.add_argument('-k', type=float, default=None, help='Scale of the sigmoid. Fitted if not supplied')
+    parser.add_argument('-s', '--seed', type=int, default=0, help='Seed of the order of the batches')
+    parser.add_argument('--log', default='warning', help='Level of the log messages')
+    return parser.parse_args(args)
+
+if __name__ == "__main__":
+    arguments = parse_arguments(sys.argv[1:])
+    LOG.change_level(arguments.log.lower())
+    tuner = TexelTuner(arguments.records, arguments.features, arguments.epochs, arguments.learning_rate, arguments.batch_size,\
+                        arguments.l2, arguments.k, arguments.seed)
+    print(json.dumps(tuner.run(arguments.output), indent=2))
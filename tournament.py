@@ -0,0 +1,313 @@
+"""--------------------------------------------
+tournament module. Plays headless games between the computer players, without any screen,
+to compare the ai modes between them. Each pairing of modes plays the requested games in each
+board preset and number of players, spread between processes.
+Reports the win rate (With its confidence interval) and Elo rating of each mode, and how each one
+searched (Nodes per second, depth reached, rollouts and time per movement).
+Usage:
+    python tournament.py -m alpha-beta "monte carlo search" -b classic -p 2 4 -g 20 -t 2
+Have the following classes:
+    Tournament
+--------------------------------------------"""
+
+__all__ = ['Tournament', 'PRESETS']
+__version__ = '1.0'
+__author__ = 'David Flaity Pardo'
+
+#Python libraries
+import sys
+import math
+import time
+import json
+import argparse
+import itertools
+import multiprocessing
+
+#Selfmade libraries
+from obj.rules import Topology, GameState, RandomStreams
+from obj.search import SearchAgent, SearchToken, RolloutPolicy, TimeManager
+from obj.utilities.exceptions import TooManyCharactersException
+from obj.utilities.logger import Logger as LOG
+
+AI_MODES = ('random', 'half random-fitness', 'fitness best move', 'alpha-beta', 'alpha-beta w/ ordering', 'monte carlo search', 'monte carlo w/ rave')
+#The same boards that the BoardGenerator creates. Topology params, and ammount of pieces depending on the number of players.
+PRESETS = { 'classic'   : ({'max_levels': 4, 'circles_per_lvl': 16, 'center_cell': False},\
+                            lambda players: {'pawn': 7, 'warrior': 3, 'wizard': 2, 'priestess': 2, 'matron_mother': 1} if players <= 2\
+                                            else {'pawn': 5, 'warrior': 1, 'wizard': 1, 'priestess': 1, 'matron_mother': 1}),
+            'great wheel':({'max_levels': 5, 'circles_per_lvl': 16, 'center_cell': True},\
+                            lambda players: {'pawn': 9, 'warrior': 4, 'wizard': 2, 'priestess': 2, 'holy_champion': 2, 'matron_mother': 1} if players <= 2\
+                                            else {'pawn': 7, 'warrior': 1, 'wizard': 1, 'priestess': 1, 'holy_champion': 1, 'matron_mother': 1}),
+            'default'   : ({'max_levels': 4, 'circles_per_lvl': 16}, lambda players: {}),
+            'lite'      : ({'max_levels': 3, 'circles_per_lvl': 16}, lambda players: {}),
+            'small'     : ({'max_levels': 3, 'circles_per_lvl': 8}, lambda players: {}),
+            'extra'     : ({'max_levels': 5, 'circles_per_lvl': 16}, lambda players: {}),
+            'huge'      : ({'max_levels': 5, 'circles_per_lvl': 32}, lambda players: {}),
+            'insane'    : ({'max_levels': 6, 'circles_per_lvl': 32}, lambda players: {}),
+            'test'      : ({'max_levels': 6, 'circles_per_lvl': 64}, lambda players: {})}
+#Quadrant of each player. Two players face each other, so the shared cells of the quadrants don't matter
+SEATS = {2: (0, 2), 3: (0, 1, 2), 4: (0, 1, 2, 3)}
+ELO_START = 1500
+ELO_K = 16
+Z_95 = 1.96
+
+#The movements LUT is global, so each process keeps the topology of its last game, and only regenerates it when the preset changes
+_TOPOLOGY = {}
+
+def get_topology(preset):
+    """Returns the generated topology of a preset, reusing the last one of this process if it's the same preset.
+    Args:
+        preset (String):    Name of the preset.
+    Returns:
+        (:obj: Topology):   Generated topology."""
+    if preset not in _TOPOLOGY:
+        _TOPOLOGY.clear()
+        _TOPOLOGY[preset] = Topology(**PRESETS[preset][0]).generate()
+    return _TOPOLOGY[preset]
+
+def play_game(game):
+    """Plays a headless game until someone wins or the movements limit is reached. Executed in the worker processes.
+    Args:
+        game (Dict->String:Any):    Settings of the game. Id, preset, seats (ai mode of each player), timeout, max_depth, max_moves, rollout_policy,
+                                    time_bank, record, stats and seed.
+    Returns:
+        (Dict->String:Any): Result of the game. Mode of the winner (None if it's a draw), number of movements,
+                            the statistics of each movement (mode, seconds, nodes, depth and rollouts), and the positions
+                            with the result of the game for the player with the turn, if the game records them,
+                            and the SearchStats of each movement, if the game saves them."""
+    streams = RandomStreams(game['seed'])
+    topology = get_topology(game['preset'])
+    players = list(range(1, len(game['seats'])+1))
+    state = GameState.new_game(topology, players, streams=streams, seats=SEATS[len(players)], **PRESETS[game['preset']][1](len(players)))
+    agents = {player: SearchAgent(topology.graph, topology.distances, topology.level_size, ai_mode=mode, order=order, name=mode,\
+                                    max_depth=game['max_depth'], timeout=game['timeout'], rollout_policy=game['rollout_policy'],\
+                                    rng=streams.get('search', order), time_manager=TimeManager(game['timeout']) if game['time_bank'] else None,\
+                                    promotion_cells=state.promotion_cells.keys())\
+                for order, (player, mode) in enumerate(zip(players, game['seats']))}
+    moves = []
+    positions = []
+    search_stats = []
+    while not state.is_over() and len(moves) < game['max_moves']:
+        if state.pending_promotion is not None:
+            state.promote()
+            continue
+        legal = state.get_movements()
+        if not legal:   #Nothing to move, the player throws the dice
+            state.throw_dice()
+            continue
+        player = state.get_current_player()
+        agent = agents[player]
+        if game['record'] and state.char_turns == 0:
+            positions.append(serialize_position(state, game['preset']))
+        all_cells = {index: piece.copy() for index, piece in state.pieces.items()}
+        token = SearchToken(game['timeout'])
+        start = time.time()
+        movement = agent.choose_movement(hash(topology), all_cells, state.get_map(player), player, [p for p in players if p not in state.dead],\
+                                        allowed_movements=legal if state.char_turns > 0 else (),\
+                                        restricted_movements=(state.last_movement,) if state.char_turns > 0 else (), stop_token=token)
+        elapsed = time.time()-start
+        if movement is None or (movement[0], movement[-1]) not in legal:
+            LOG.log('warning', 'The ', agent.ai_mode, ' agent chose an illegal movement ', movement, ', using a random one instead')
+            movement = streams.get('search', agent.order).choice(legal)
+        moves.append((agent.ai_mode, elapsed, token.nodes, token.depth, token.rollouts))
+        if game['stats']:
+            search_stats.append(dict(agent.search_stats.json(), game=game['id'], preset=game['preset'], players=len(players)))
+        state.apply_movement((movement[0], movement[-1]))
+    winner = game['seats'][players.index(state.winner)] if state.winner is not None else None
+    for position in positions:  #Result of the game for the player that had the turn
+        position['result'] = 0.5 if state.winner is None else 1.0 if state.winner == position['player'] else 0.0
+    return {'id': game['id'], 'preset': game['preset'], 'seats': game['seats'], 'seed': streams.seed, 'winner': winner, 'moves': moves,\
+            'positions': positions, 'search_stats': search_stats}
+
+def serialize_position(state, preset):
+    """Returns:
+        (Dict->String:Any): Position of the state, to save it in the records. Preset, player with the turn, players still playing,
+                            promotion cells and pieces (index, owner, type)."""
+    return {'preset': preset, 'player': state.get_current_player(), 'players': [player for player in state.players if player not in state.dead],\
+            'promotion_cells': sorted(state.promotion_cells.keys()),\
+            'pieces': sorted([index, piece.owner_uuid, piece.get_type()] for index, piece in state.pieces.items())}
+
+class Tournament(object):
+    """Tournament class. Generates the games between each pair of ai modes, plays them in a pool of processes,
+    and summarizes the results.
+    Attributes:
+        modes (List->String):   Ai modes that take part.
+        presets (List->String): Board presets in which each pairing plays.
+        player_counts (List->int):  Number of players of the games. The seats are shared in turns between the two modes of a pairing.
+        games (int):    Games per pairing, preset and number of players. Half of them with each mode starting.
+        timeout (float):    Seconds per movement of the tree searchs.
+        max_depth (int):    Maximum depth of the alpha-beta searchs.
+        max_moves (int):    Movements after which a game is declared a draw.
+        seed (int): Base seed. Each game uses its own one, derived from this.
+        workers (int):  Number of processes.
+        rollout_policy (String):    Name of the RolloutPolicy of the montecarlo modes. None for the default one.
+        time_bank (boolean):    True to give each player a TimeManager with a bank of timeout per expected movement.
+        record (String):    File in which the positions of the games are saved (JSON lines), for texel_tuning.py. None to not save them.
+        stats (String): File in which the SearchStats of each movement are saved (JSON lines). None to not save them.
+        results (List->Dict):   Results of the games played."""
+    def __init__(self, modes, presets=('classic',), player_counts=(2,), games=10, timeout=2, max_depth=3, max_moves=400, seed=0, workers=None, rollout_policy=None,\
+                time_bank=False, record=None, stats=None):
+        self.modes = [mode.lower() for mode in modes]
+        self.presets = [preset.lower() for preset in presets]
+        self.player_counts = player_counts
+        self.games = games
+        self.timeout = timeout
+        self.max_depth = max_depth
+        self.max_moves = max_moves
+        self.seed = seed
+        self.workers = workers if workers else multiprocessing.cpu_count()
+        self.rollout_policy = rollout_policy
+        self.time_bank = time_bank
+        self.record = record
+        self.stats = stats
+        self.results = []
+
+    def generate_games(self):
+        """Returns:
+            (List->Dict):   Settings of all the games. Grouped by preset, so each process regenerates its topology as few times as possible."""
+        all_games = []
+        for preset, players in itertools.product(self.presets, self.player_counts):
+            if not Tournament.fits(preset, players):
+                continue
+            for (mode_a, mode_b), game_index in itertools.product(itertools.combinations(self.modes, 2), range(0, self.games)):
+                first, second = (mode_a, mode_b) if game_index%2 == 0 else (mode_b, mode_a)
+                all_games.append({'id': len(all_games), 'preset': preset, 'seats': tuple(first if seat%2 == 0 else second for seat in range(0, players)),\
+                                'timeout': self.timeout, 'max_depth': self.max_depth, 'max_moves': self.max_moves,\
+                                'rollout_policy': self.rollout_policy, 'time_bank': self.time_bank, 'record': bool(self.record),\
+                                'stats': bool(self.stats), 'seed': self.seed+len(all_games)})
+        return all_games
+
+    @staticmethod
+    def fits(preset, players):
+        """Checks if the pieces of each player fit in a preset, the same way that the Board would raise it.
+        Returns:
+            (boolean):  True if the starting position can be created."""
+        try:
+            GameState.new_game(get_topology(preset), list(range(0, players)), seats=SEATS[players], **PRESETS[preset][1](players))
+            return True
+        except TooManyCharactersException:
+            LOG.log('warning', 'The pieces of '+str(players)+' players do not fit in the '+preset+' board, skipping it')
+            return False
+
+    def run(self):
+        """Plays all the games, printing the progress, and returns the results."""
+        all_games = self.generate_games()
+        start = time.time()
+        LOG.log('warning', 'Playing ', len(all_games), ' games in ', self.workers, ' processes')
+        with multiprocessing.Pool(self.workers) as pool:
+            for result in pool.imap_unordered(play_game, all_games, chunksize=max(1, self.games//2)):
+                if self.record:
+                    self.save_positions(result.pop('positions'))
+                if self.stats:
+                    self.save_search_stats(result.pop('search_stats'))
+                self.results.append(result)
+                print('Game '+str(result['id'])+' ('+result['preset']+', '+' / '.join(result['seats'])+'): '\
+                    +(result['winner'] if result['winner'] else 'draw')+' after '+str(len(result['moves']))+' movements')
+        self.results.sort(key=lambda result: result['id'])
+        LOG.log('warning', 'Tournament completed in ', time.time()-start, ' seconds')
+        return self.results
+
+    def save_positions(self, positions):
+        """Appends the positions of a game to the record file, one JSON per line."""
+        with open(self.record, 'a') as record_file:
+            for position in positions:
+                record_file.write(json.dumps(position)+'\n')
+
+    def save_search_stats(self, search_stats):
+        """Appends the statistics of the movements of a game to the stats file, one JSON per line."""
+        with open(self.stats, 'a') as stats_file:
+            for stats in search_stats:
+                stats_file.write(json.dumps(stats)+'\n')
+
+    @staticmethod
+    def wilson_interval(score, games, z=Z_95):
+        """Returns the Wilson confidence interval of a win rate.
+        Args:
+            score (float):  Games won. The draws count as half a game.
+            games (int):    Games played.
+            z (float, default=1.96):    Quantile of the normal distribution of the confidence level.
+        Returns:
+            (Tuple->float, float):  Lower and upper limits of the interval."""
+        if games == 0:
+            return (0.0, 1.0)
+        rate = score/games
+        center = (rate+z*z/(2*games))/(1+z*z/games)
+        margin = z*math.sqrt(rate*(1-rate)/games+z*z/(4*games*games))/(1+z*z/games)
+        return (max(0.0, center-margin), min(1.0, center+margin))
+
+    @staticmethod
+    def elo_ratings(results, modes, k=ELO_K):
+        """Computes the Elo rating of each mode, updating it game by game in the order in which they were generated.
+        The winner of a game wins against the other mode, and a draw counts as a draw.
+        Returns:
+            (Dict->String:float):   Rating of each mode."""
+        ratings = {mode: ELO_START for mode in modes}
+        for result in results:
+            mode_a, mode_b = sorted(set(result['seats']))
+            expected = 1/(1+10**((ratings[mode_b]-ratings[mode_a])/400))
+            score = 0.5 if result['winner'] is None else 1.0 if result['winner'] == mode_a else 0.0
+            ratings[mode_a] += k*(score-expected)
+            ratings[mode_b] -= k*(score-expected)
+        return ratings
+
+    def summary(self):
+        """Returns:
+            (Dict->String:Dict):    Statistics of each mode. Games, wins, draws, win rate with its confidence interval, Elo,
+                                    nodes per second, average depth, average rollouts and average seconds per movement."""
+        ratings = Tournament.elo_ratings(self.results, self.modes)
+        stats = {}
+        for mode in self.modes:
+            games = [result for result in self.results if mode in result['seats']]
+            wins = sum(1 for result in games if result['winner'] == mode)
+            draws = sum(1 for result in games if result['winner'] is None)
+            moves = [move for result in games for move in result['moves'] if move[0] == mode]
+            total_time = sum(move[1] for move in moves)
+            stats[mode] = {'games': len(games), 'wins': wins, 'draws': draws,\
+                            'win_rate': (wins+draws/2)/len(games) if games else 0.0,\
+                            'interval': Tournament.wilson_interval(wins+draws/2, len(games)), 'elo': ratings[mode],\
+                            'nodes_per_second': sum(move[2] for move in moves)/total_time if total_time else 0.0,\
+                            'depth': sum(move[3] for move in moves)/len(moves) if moves else 0.0,\
+                            'rollouts': sum(move[4] for move in moves)/len(moves) if moves else 0.0,\
+                            'time_per_move': total_time/len(moves) if moves else 0.0}
+        return stats
+
+    def report(self):
+        """Returns the summary as a table, ordered by Elo."""
+        stats = self.summary()
+        lines = ['{:<24}{:>6}{:>6}{:>6}{:>9}{:>17}{:>8}{:>11}{:>7}{:>10}{:>9}'.format('mode', 'games', 'wins', 'draws', 'win%',\
+                'CI 95%', 'elo', 'nodes/s', 'depth', 'rollouts', 's/move')]
+        for mode, stat in sorted(stats.items(), key=lambda item: item[1]['elo'], reverse=True):
+            lines.append('{:<24}{:>6}{:>6}{:>6}{:>9.1f}{:>17}{:>8.0f}{:>11.0f}{:>7.2f}{:>10.1f}{:>9.3f}'.format(mode[:23], stat['games'], stat['wins'],\
+                        stat['draws'], 100*stat['win_rate'], '{:.1f}-{:.1f}'.format(100*stat['interval'][0], 100*stat['interval'][1]),\
+                        stat['elo'], stat['nodes_per_second'], stat['depth'], stat['rollouts'], stat['time_per_move']))
+        return '\n'.join(lines)
+
+def parse_arguments(args):
+    """Parses the command line arguments of the tournament."""
+    parser = argparse.ArgumentParser(description='Plays headless games between the ai modes and compares them.')
+    parser.add_argument('-m', '--modes', nargs='+', default=['fitness best move', 'alpha-beta', 'monte carlo search'],\
+                        help='Ai modes that take part. Any of: '+', '.join(AI_MODES))
+    parser.add_argument('-b', '--boards', nargs='+', default=['classic'], choices=sorted(PRESETS.keys()), help='Board presets')
+    parser.add_argument('-p', '--players', nargs='+', type=int, default=[2], choices=(2, 3, 4), help='Number of players of the games')
+    parser.add_argument('-g', '--games', type=int, default=10, help='Games per pairing, board and number of players')
+    parser.add_argument('-t', '--timeout', type=float, default=2, help='Seconds per movement of the tree searchs')
+    parser.add_argument('-d', '--depth', type=int, default=3, help='Maximum depth of alpha-beta')
+    parser.add_argument('--max-moves', type=int, default=400, help='Movements after which a game is a draw')
+    parser.add_argument('-r', '--rollout', default=None, choices=sorted(RolloutPolicy.POLICIES.keys()), help='Rollout policy of montecarlo')
+    parser.add_argument('--time-bank', action='store_true', help='Split a time bank between the movements instead of a fixed timeout')
+    parser.add_argument('--record', default=None, help='File in which to append the positions of the games, for the evaluation tuning')
+    parser.add_argument('--stats', default=None, help='File in which to append the search statistics of each movement')
+    parser.add_argument('-s', '--seed', type=int, default=0, help='Base seed of the games')
+    parser.add_argument('-w', '--workers', type=int, default=None, help='Number of processes. All the cpus by default')
+    parser.add_argument('--log', default='warning', help='Level of the log messages')
+    return parser.parse_args(args)
+
+if __name__ == "__main__":
+    arguments = parse_arguments(sys.argv[1:])
+    if len(arguments.modes) < 2:
+        sys.exit('At least two ai modes are needed to play a tournament')
+    LOG.change_level(arguments.log.lower())
+    tournament = Tournament(arguments.modes, arguments.boards, arguments.players, arguments.games, arguments.timeout,\
+                            arguments.depth, arguments.max_moves, arguments.seed, arguments.workers,\
+                            arguments.rollout, arguments.time_bank, arguments.record, arguments.stats)
+    tournament.run()
+    print(tournament.report())